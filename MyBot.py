@@ -10,69 +10,290 @@ to log anything use the logging module.
 """
 
 import hlt
-from math import cos, sin, radians, floor, isclose, sqrt
-from logging import basicConfig, info, DEBUG
+import json
+import sys
+import numpy as np
+from math import floor, ceil, sqrt, inf
+from logging import getLogger, info, DEBUG, INFO
 from os.path import exists
 from os import remove, mkdir
-from time import clock
+from time import perf_counter
+
+
+class TurnPlan:
+    """
+    The commands that would be sent if the turn ended right now, one per ship. Every pass of the planner overwrites
+    entries only with complete commands, so the plan can be sent at any point before the deadline.
+    """
+    def __init__(self, deadline):
+        self.deadline = deadline
+        self.commands = {}  # ship id -> command
+        self.ships = {}  # ship id -> ship
+        self.goals = {}  # ship id -> (target, speed) of the last navigate call that produced the command
+        self.routed = {}  # ship id -> command taken from the flow fields, already the shortest way around planets
+        self.nearby_friendly_ships_ids = {}
+
+    def time_left(self):
+        return self.deadline - perf_counter()
+
+    def set(self, ship, command):
+        self.commands[ship.id] = command
+        self.ships[ship.id] = ship
+        ship.command = command
+
+    def queue(self):
+        return list(self.commands.values())
+
+
+class MoveCache:
+    """
+    The heading each ship was sent on last turn, the target it was heading for and the corridor ahead of it: the
+    straight line along the heading, up to the target or scan_range away, whichever is nearer. A ship going for the same
+    target can keep that heading without searching for a new one as long as no ship or planet entered the rest of the
+    corridor, enough of it is left for this turn's move and the ship has not turned further away from the target.
+
+    Moves are matched by what the ship is after, which for an attack is the enemy ship rather than the point aimed at:
+    that is where the enemy is predicted to be, a new point every turn, and the cached corridor is checked against it.
+
+    :ivar hits: Number of moves reused
+    :ivar misses: Number of cacheable moves searched for again
+    """
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._moves = {}  # ship id -> (target key, angle, deviation, corridor end) of the move sent last turn
+        self._next = {}
+
+    @staticmethod
+    def _key(target):
+        if isinstance(target, hlt.entity.Position):
+            return target.x, target.y
+        return type(target).__name__, target.id
+
+    def get(self, ship, target, subject=None):
+        """
+        :param hlt.entity.Ship ship: The ship
+        :param target: Where the ship is heading
+        :param subject: What the ship is after, if target is only a point aimed at for it
+        :return: The heading of last turn's move, its deviation from the straight line to the target and the far end of
+            its corridor, or None if the ship was heading somewhere else
+        :rtype: (int, float, hlt.entity.Position)
+        """
+        move = self._moves.get(ship.id)
+        if move is None or move[0] != self._key(subject or target):
+            return None
+        return move[1:]
+
+    def put(self, ship, target, angle, reach, subject=None):
+        """
+        :param hlt.entity.Ship ship: The ship, where it was when the move was sent
+        :param target: Where the ship is heading
+        :param int angle: The heading sent
+        :param float reach: Longest corridor kept
+        :param subject: What the ship is after, if target is only a point aimed at for it
+        """
+        deviation = abs((angle - ship.calculate_angle_between(target) + 180) % 360 - 180)
+        # short of the target itself, which obstacles_between would count as in the way
+        length = ship.calculate_distance_between(target) - target.radius - ship.radius - 0.1
+        dx, dy = hlt.motion.offset(max(0, min(length, reach)), angle)
+        self._next[ship.id] = (self._key(subject or target), angle, deviation,
+                               hlt.entity.Position(ship.x + dx, ship.y + dy))
+
+    def next_turn(self):
+        self._moves, self._next = self._next, {}
+
+
+class QualityController:
+    """
+    Picks how much search effort every ship gets, from a ladder of settings ordered from the most thorough to the
+    cheapest. The decision loop's cost per ship is measured every turn; when this turn's ships at that cost are
+    projected to take longer than the target, the controller steps down the ladder, and it steps back up once the
+    projection falls under a quarter of the target. After a change the cost is measured afresh before moving again.
+
+    :ivar level: Index of the settings in use
+    :ivar cost: Smoothed decision time per ship at the current level, None until measured
+    """
+    def __init__(self, levels, level, target, smoothing=0.5):
+        """
+        :param list[dict] levels: Settings, most thorough first
+        :param int level: Index of the settings to start with
+        :param float target: Time the decision loop should take, in seconds
+        :param float smoothing: Weight of the latest measurement in the smoothed cost
+        """
+        self.levels = levels
+        self.level = level
+        self.target = target
+        self.smoothing = smoothing
+        self.cost = None
+
+    @property
+    def settings(self):
+        return self.levels[self.level]
+
+    def record(self, elapsed, ships):
+        if not ships:
+            return
+        cost = elapsed / ships
+        self.cost = cost if self.cost is None else self.smoothing * cost + (1 - self.smoothing) * self.cost
+
+    def adjust(self, ships):
+        """
+        :param int ships: Number of ships to decide for this turn
+        :return: The new settings if the level changed, else None
+        :rtype: dict
+        """
+        if self.cost is None:
+            return None
+        projected = self.cost * ships
+        if projected > self.target and self.level < len(self.levels) - 1:
+            level = self.level + 1
+        elif projected < self.target / 4 and self.level > 0:
+            level = self.level - 1
+        else:
+            return None
+        info('Quality level %d -> %d: %.2fms per ship, %d ships, projected %.3fs for a target of %.3fs, settings %s',
+             self.level, level, self.cost * 1000, ships, projected, self.target, self.levels[level])
+        self.level = level
+        self.cost = None
+        return self.settings
+
+
+#: The bot's tunable parameters (see benchmarks.tune): the search effort per ship whenever the turn time allows it
+#: (the most thorough quality level, the others are scaled from it by QUALITY_LADDER), the share of all ships from
+#: which the bot plays the end game, and the distance from its target at which an attacking ship stops
+PARAMETERS = dict(angular_step=5, max_corrections=18, scan_range=hlt.constants.MAX_SPEED * 5, end_game_share=0.8,
+                  engagement_distance=hlt.constants.WEAPON_RADIUS - 1)
+
+#: The quality levels relative to PARAMETERS, most thorough first: the factor on the angular step (the number of
+#: corrections shrinks by the same factor, so every level sweeps the same angle on either side), the factor on the scan
+#: range, and whether friendly collisions are fixed and headings refined while refining
+QUALITY_LADDER = ((1, 1, True, True), (2, 0.8, True, True), (3, 0.6, True, True), (6, 0.6, True, False),
+                  (9, 0.4, False, False))
+
 
 class Halite2:
-    def __init__(self):
+    def __init__(self, engine_input='./data/engine_input.gz', timed=True, parameters=None):
+        """
+        :param str engine_input: File the engine's input is captured to for offline re-runs, None to not capture
+        :param bool timed: Whether the clock limits the turn; offline re-runs switch it off so that the same input
+            always gives the same commands, however slow the run (e.g. under a profiler)
+        :param dict parameters: Values replacing some of PARAMETERS
+        """
         if exists('./game_output.log'):
             remove('./game_output.log')
         if exists('./data/turn_times.csv'):
             remove('./data/turn_times.csv')
+        if exists('./data/command_log.bin'):
+            remove('./data/command_log.bin')
+        if engine_input and exists(engine_input):
+            remove(engine_input)
         if not exists('./data'):
             mkdir('./data')
-        basicConfig(filename='game_output.log', filemode='a', level=DEBUG)
+        self.log_level = DEBUG
+        self.async_logging = True  # format and write log messages in a background thread, outside the turn time
+        hlt.networking.Game.set_up_logging('game_output.log', level=self.log_level,
+                                           asynchronous=self.async_logging, filemode='a')
 
-        self.game = hlt.Game("Zerg")
+        self.game = hlt.Game("Zerg", prepare=self.prepare, capture=engine_input)
         # print our start message to the logs
         info("Zerg infestation begins")
 
         self.opponents = {player.id: player for player in self.game.map.all_players() if player != self.game.map.get_me()}
 
         ### parameters
-        self.max_corrections = 9
-        self.angular_step = 10
-        self.scan_range = hlt.constants.MAX_SPEED * 4
-        self.scan_radius = sqrt(self.scan_range**2 + self.scan_range**2)
+        self.parameters = dict(PARAMETERS, **(parameters or {}))
+        # search effort per ship, most thorough first, scaled from the tuned values so that every level is coarser than
+        # the one before it whatever they are
+        self.quality_levels = [
+            dict(angular_step=self.parameters['angular_step'] * coarser,
+                 max_corrections=max(1, round(self.parameters['max_corrections'] / coarser)),
+                 scan_range=round(self.parameters['scan_range'] * reach), check_collisions=check_collisions,
+                 heading_refinement=heading_refinement)
+            for coarser, reach, check_collisions, heading_refinement in QUALITY_LADDER
+        ]
+        self.tangent_navigation = True  # try the closed-form tangent navigator before stepping the heading
+        self.flow_navigation = True  # travel to planets along the precomputed flow fields
+        self.move_cache = MoveCache()  # reuse last turn's heading when nothing got in the way
+        self.collision_margin = 0.1  # distance kept between friendly ships on top of their radii
+        self.timed = timed
+        self.turn_deadline = 1.85 if timed else inf
+        self.refine_margin = 0.05  # time left for sending the commands once refining stops
+        self.refine_passes = 3  # most refining passes per turn, the deadline does not bound untimed runs
+        # the decision loop gets half the turn, refining the rest
+        self.quality = QualityController(self.quality_levels, 1, self.turn_deadline / 2)
+        self.apply_quality(self.quality.settings)
 
         ### data collection
         self.turn_counter = 0
         self.turn_times_file = open('./data/turn_times.csv', 'w')
         self.turn_times_file.write('Turn Number,Turn Time\n')
 
-        self.command_queue = {}
+        self.command_history_depth = 10
+        self.command_queue = hlt.history.CommandHistory(self.command_history_depth, './data/command_log.bin')
+        self.influence = hlt.influence.InfluenceMap(self.game.map.width, self.game.map.height)
 
         while True:
             try:
                 self.turn()
+            except EOFError:
+                info('Engine input ended after %d turns', self.turn_counter - 1)
+                self.turn_times_file.close()
+                self.command_queue.close()
+                break
             except Exception as e:
                 info(e)
                 raise e
 
+    def apply_quality(self, settings):
+        self.max_corrections = settings['max_corrections']
+        self.angular_step = settings['angular_step']
+        self.scan_range = settings['scan_range']
+        self.scan_radius = sqrt(self.scan_range**2 + self.scan_range**2)
+        self.check_collisions = settings['check_collisions']  # fix friendly collisions while refining
+        self.heading_refinement = settings['heading_refinement']  # retry ships with finer angular steps
+
+    def prepare(self, game):
+        # planets never move, so the routes to them are computed once, inside the initialization time limit; maps are
+        # symmetric between the players, so only one planet of every symmetric set needs them
+        initial_map = game.initial_map
+        self.symmetry = hlt.symmetry.Symmetry(initial_map.all_planets(), initial_map.width, initial_map.height)
+        info('Map symmetry of order %d, %d of %d planets precomputed', len(self.symmetry),
+             len(self.symmetry.representatives()), len(initial_map.all_planets()))
+        self.flow = hlt.flow.FlowFields(initial_map, symmetry=self.symmetry)
+
     def turn(self):
-        startTime = clock()
+        startTime = perf_counter()
         # TODO order of changes - 1. ship attributes, 2. use self.endGame instead of calculating every ship iteration
 
         self.turn_counter += 1
         self.game_map = self.game.update_map()
         self.command_queue[self.turn_counter] = []
-        self.endGame = len(self.game_map.get_me().all_ships())/len(self.game_map._all_ships()) > 0.8
+        self.stats = hlt.stats.TurnStats(self.game_map)
+        self.endGame = self.stats.ship_share(self.game_map.my_id) > self.parameters['end_game_share']
         # TODO switch this to be based on planets instead of ships
 
         self.update_my_ship_positions()
         self.update_enemy_ship_positions()
+        self.influence.update(self.game_map)
 
         ### commands for docked ships
         self.command_docked_ships()
 
         self.staticTime = 0
 
-        for ship in self.game_map.get_me().all_ships():
-            if ship.docking_status != ship.DockingStatus.UNDOCKED:
-                continue
+        # cheap answer first: every undocked ship stays, so the plan is valid even if the decision loop is cut short
+        self.plan = TurnPlan(startTime + self.turn_deadline)
+        undocked_ships = self.game_map.player_ships(self.game_map.my_id, hlt.entity.Ship.DockingStatus.UNDOCKED)
+        for ship in undocked_ships:
+            ship.action = 'stay'
+            self.plan.set(ship, ship.thrust(magnitude=0, angle=0))
+
+        settings = self.quality.adjust(len(undocked_ships)) if self.timed else None
+        if settings:
+            self.apply_quality(settings)
+        decisions_start = perf_counter()
+        decided = 0
+        for ship in undocked_ships:
 
             ordered_planets = [planet[0] for planet in sorted([
                 [planet, ship.calculate_distance_between(planet)] for planet in self.game_map.all_planets()
@@ -90,35 +311,39 @@ class Halite2:
             ## TODO new option 4??): If destroying enemy ships requires more resources than destroying planet, navigate around ships to destroy planets instead
             # TODO (option 1): target planets with minimal ships rather than more ships (easier to take over)
 
-            self.update_relative_strength()
-
             decision = self.decision(ship, ordered_planets)
 
             if not decision:
                 decision = self.last_minute_decision(ship, ordered_planets)
 
-            self.command_queue[self.turn_counter].append(decision)
-            ship.command = decision
+            self.plan.set(ship, decision)
+            self.plan.nearby_friendly_ships_ids[ship.id] = self.nearby_friendly_ships_ids
+            decided += 1
 
-            if clock() - startTime > 1.85:
+            if self.plan.time_left() < self.refine_margin:
                 info('Loop broken')
                 break
+        self.quality.record(perf_counter() - decisions_start, decided)
+        if decided == len(undocked_ships):
+            self.refine(self.plan)
 
+        self.command_queue[self.turn_counter].extend(self.plan.queue())
         self.game.send_command_queue(self.command_queue[self.turn_counter])
+        self.command_queue.commit(self.turn_counter)
+        self.cache_moves(self.plan)
 
         to_be_logged = '{turn},{turn_time} undocked start time:{staticTime}\n'.format(turn=self.turn_counter,
-                                                                                       turn_time=clock()-startTime,
+                                                                                       turn_time=perf_counter()-startTime,
                                                                                        staticTime=self.staticTime)
         info(to_be_logged)
-        commands_given = len(self.command_queue[self.turn_counter])
-        commandable_ships = len([ship for ship in self.game_map.get_me().all_ships()
-                                 if ship.docking_status == ship.DockingStatus.UNDOCKED])
-        info('Commands given:')
-        info(commands_given)
-        info('Commandable ships:')
-        info(commandable_ships)
+        if getLogger().isEnabledFor(INFO):
+            info('Commands given: %d, commandable ships: %d', len(self.command_queue[self.turn_counter]),
+                 len(undocked_ships))
+            info('Move cache hits: %d, misses: %d', self.move_cache.hits, self.move_cache.misses)
 
         self.turn_times_file.write(to_be_logged)
+        # the engine kills the bot when the game ends, whatever is still buffered then is lost
+        self.turn_times_file.flush()
 
     def decision(self, ship, ordered_planets):
         self.nearby_friendly_ships_ids, self.nearby_enemy_ships_ids = self.update_nearby_entities(ship)
@@ -162,19 +387,15 @@ class Halite2:
                         if self.nearby_enemy_ships_ids:
                             return self.attack(ship, self.nearby_enemy_ships_ids[0], self.nearby_friendly_ships_ids)
 
-                        # checks commands_tracker to see which planets other ships are heading to
-                        elif self.check_if_planet_will_have_space(self.game_map.get_me().all_ships(), planet,
-                                                                  docked_tracker={planet: len(planet.all_docked_ships())
-                                                                                  for planet in self.game_map.all_planets()}):
+                        # checks the docking ledger to see which planets other ships are heading to
+                        elif self.game_map.docking.has_space(planet):
                             ship.target = planet
                             if ship.can_dock(planet):
                                 ship.action = 'stay'
-                                return ship.dock(planet)
+                                return self.dock(ship, planet)
                             else:
                                 ship.action = 'travel'
-                                return self.navigate(ship, ship.target, ship.target, self.game_map,
-                                        hlt.constants.MAX_SPEED, self.max_corrections, self.angular_step,
-                                                     self.nearby_friendly_ships_ids)
+                                return self.travel_to_planet(ship, planet)
 
         ## TODO prioritize establishing position away from other players
         ## TODO prioritize targeting weaker players when attacking
@@ -189,25 +410,38 @@ class Halite2:
         target = self.game_map.get_player(target_id[1]).get_ship(target_id[0])
         ship.action = 'attack'
         ship.target = target
+        # aim where the target will be at the end of the turn rather than where it is now
+        aim = self.game_map.history.predicted_position(target)
 
-        # attack only if hp is higher (won't die) otherwise crash into them
-
-        distance_between = max(0, ship.calculate_distance_between(target) - hlt.constants.WEAPON_RADIUS + 1)
+        distance_between = max(0, ship.calculate_distance_between(aim) - self.parameters['engagement_distance'])
         speed = hlt.constants.MAX_SPEED if distance_between > hlt.constants.MAX_SPEED else distance_between
-        return self.navigate(ship, target, target, self.game_map, speed, self.max_corrections,
+        speed = self.choose_attack_speed(ship, aim, speed, nearby_friendly_ships_ids)
+        return self.navigate(ship, aim, aim, self.game_map, speed, self.max_corrections,
                              self.angular_step, nearby_friendly_ships_ids)
 
-    def check_if_planet_will_have_space(self, ships, planet, docked_tracker):
-        count = 0
-        for ship in ships:
-            if ship.action != 'attack' and ship.target == planet:
-                count += 1
-        return (count + docked_tracker[planet]) < planet.num_docking_spots
+    def choose_attack_speed(self, ship, aim, speed, nearby_friendly_ships_ids):
+        # attack only if the exchange of fire is favourable (won't die for nothing), otherwise close in slower
+        enemies = [self.game_map.get_player(owner).get_ship(enemy) for enemy, owner in self.nearby_enemy_ships_ids]
+        enemies = [enemy for enemy in enemies if enemy is not None]
+        friendlies = [self.game_map.get_me().get_ship(friendly) for friendly in nearby_friendly_ships_ids]
+        friendlies = [friendly for friendly in friendlies if friendly is not ship]
+        skirmish = hlt.combat.Skirmish.from_ships([ship] + friendlies + enemies)
+        # candidate 0 is the planned speed so ties keep it
+        speeds = [speed] + [s for s in range(hlt.constants.MAX_SPEED, -1, -1) if s < speed]
+        unit_x, unit_y = hlt.motion.UNIT[hlt.motion.heading(ship.calculate_angle_between(aim))]
+        dx = np.zeros((len(speeds), len(skirmish)), dtype=np.float32)
+        dy = np.zeros((len(speeds), len(skirmish)), dtype=np.float32)
+        dx[:, 0] = np.array(speeds, dtype=int) * unit_x
+        dy[:, 0] = np.array(speeds, dtype=int) * unit_y
+        if enemies:
+            # enemies keep moving as they did last turn
+            history = self.game_map.history
+            dx[:, -len(enemies):], dy[:, -len(enemies):] = history.displacement([history.row(enemy) for enemy in enemies])
+        best, _ = skirmish.best(dx, dy, self.game_map.my_id)
+        return speeds[best]
 
     def calculate_endpoint(self, ship, speed, angle):
-        new_target_dx = cos(radians(angle)) * speed
-        new_target_dy = sin(radians(angle)) * speed
-        return hlt.entity.Position(x=ship.x+new_target_dx, y=ship.y+new_target_dy)
+        return hlt.motion.endpoint(ship, speed, angle)
 
     def check_for_nearby_owned_planets(self, ship, ordered_planets):
         for planet in ordered_planets:
@@ -243,30 +477,35 @@ class Halite2:
             for item in iterator:
                 yield item
 
-        for planet in [planet for planet in self.game_map.all_planets() if planet.owner == self.game_map.get_me()]:
-            nearby_friendly_ships_ids, nearby_enemy_ships_ids = self.update_nearby_entities(planet)
-            for friendly in nearby_friendly_ships_ids:
-                friendly_ship = self.game_map.get_me().get_ship(friendly)
-                if friendly_ship.docking_status == friendly_ship.DockingStatus.UNDOCKED:
+        for planet in self.game_map.owned_planets(self.game_map.my_id):
+            docked = self.game_map.docked_ships(planet)
+            if not docked:
+                continue
+            # strongest enemy presence and weakest undocked friendly presence around the docked ships. Only ships
+            # able to fire at them next turn count: undocked ones within MAX_SPEED + WEAPON_RADIUS, weighted by health.
+            # A planet is defended once every docked ship is covered by some friendly; for every enemy ship able to
+            # reach the most exposed docked ship, two are undocked
+            threat = max(self.influence.threat(docked_ship) for docked_ship in docked)
+            support = min(self.influence.support(docked_ship) for docked_ship in docked)
+            if threat < 0.01 or support >= 0.01:
+                continue
+            docked_ships = generate(docked)
+            for _ in range(ceil(threat)):
+                # for every enemy ship in range of the planet, undock 2 friendly ships
+                try:
+                    fighter1 = next(docked_ships)
+                    fighter1.target = planet
+                    fighter1.action = 'stay'
+                    command = self.undock(fighter1)
+                    self.command_queue[self.turn_counter].append(command)
+
+                    fighter2 = next(docked_ships)
+                    fighter2.target = planet
+                    fighter2.action = 'stay'
+                    command = self.undock(fighter2)
+                    self.command_queue[self.turn_counter].append(command)
+                except StopIteration:
                     break
-            else:  # if no undocked friendly ship found
-                docked_ships = generate(planet.all_docked_ships())
-                for _ in nearby_enemy_ships_ids:
-                    # for every enemy ship near owned planet, undock 2 friendly ships
-                    try:
-                        fighter1 = next(docked_ships)
-                        fighter1.target = planet
-                        fighter1.action = 'stay'
-                        command = fighter1.undock()
-                        self.command_queue[self.turn_counter].append(command)
-
-                        fighter2 = next(docked_ships)
-                        fighter2.target = planet
-                        fighter2.action = 'stay'
-                        command = fighter2.undock()
-                        self.command_queue[self.turn_counter].append(command)
-                    except StopIteration:
-                        break
 
     def last_minute_decision(self, ship, ordered_planets):
         closest_enemy = decision = None
@@ -275,16 +514,13 @@ class Halite2:
                 closest_enemy = planet
                 break
         if closest_enemy:
-            if closest_enemy.all_docked_ships():
-                target = closest_enemy.all_docked_ships()[0]
+            if self.game_map.docked_ships(closest_enemy):
+                target = self.game_map.docked_ships(closest_enemy)[0]
                 decision = self.attack(ship, [target.id, target.owner], self.nearby_friendly_ships_ids)
         else:
             for planet in ordered_planets:
                 if planet.owner is None:
-                    target = ship.closest_point_to(planet)
-                    decision = self.navigate(ship, target, target, self.game_map,
-                                             hlt.constants.MAX_SPEED, self.max_corrections,
-                                             self.angular_step, self.nearby_friendly_ships_ids)
+                    decision = self.travel_to_planet(ship, planet)
         if not decision:
             # TODO maybe have stay counteract effects of previous velocity?
             ship.action = 'stay'
@@ -302,138 +538,236 @@ class Halite2:
                 ship.target = planet
                 if ship.can_dock(planet):
                     ship.action = 'stay'
-                    return ship.dock(planet)
+                    return self.dock(ship, planet)
                 else:
                     ship.action = 'travel'
-                    return self.navigate(ship, ship.target, ship.target, self.game_map,
-                                         hlt.constants.MAX_SPEED, self.max_corrections, self.angular_step,
-                                         self.nearby_friendly_ships_ids)
+                    return self.travel_to_planet(ship, planet)
 
         nearby_enemy_planets = self.get_nearby_enemy_planets(ship, ordered_planets)
         if not nearby_enemy_planets:
             output = []
-            for planet in [planet for planet in self.game_map.all_planets() if
-                           (planet.owner != self.game_map.get_me() and planet.owner is not None)]:
+            for planet in self.game_map.enemy_planets():
                 output.append([planet, ship.calculate_distance_between(planet)])
             ordered_enemy_planets = [planet[0] for planet in sorted(output, key=lambda x: x[1])]
             if ordered_enemy_planets:
                 ship.target = ordered_enemy_planets[0]
-                return self.navigate(ship, ship.target, ship.target, self.game_map,
-                                     hlt.constants.MAX_SPEED, self.max_corrections, self.angular_step,
-                                     self.nearby_friendly_ships_ids)
+                return self.travel_to_planet(ship, ship.target)
         else:
             ship.target = nearby_enemy_planets[0]
-            return self.navigate(ship, ship.target, ship.target, self.game_map,
-                                 hlt.constants.MAX_SPEED, self.max_corrections, self.angular_step,
-                                 self.nearby_friendly_ships_ids)
-
-    def update_relative_strength(self):
-        self.relative_player_strength = {player.id: 0 for player in self.game_map.all_players()}
-        for planet in [planet for planet in self.game_map.all_planets() if planet.owner is not None]:
-            self.relative_player_strength[planet.owner.id] += 1
-        for key in self.relative_player_strength.keys():
-            self.relative_player_strength[key] /= len(self.game_map.all_planets())
-
-    def check_friendly_collisions(self, ship, speed, angle, nearby_friendly_ships_ids):
-        def check_intersect(A, B, C, D):
-            # Return true if line segments AB and CD intersect
-            def ccw(A, B, C):
-                return (C.y - A.y) * (B.x - A.x) > (B.y - A.y) * (C.x - A.x)
-            if (ccw(A, C, D) != ccw(B, C, D) and ccw(A, B, C) != ccw(A, B, D)) or (B.x == D.x and B.y == D.y):
-                # also check if end points are an intersection (no need to check start points)
-                return True
-            return False
+            return self.travel_to_planet(ship, ship.target)
 
-        ### these functions are used to check if a line and point intersect (docking ship collisions)
-        def check_stationary_friendly(ship, friendly_ship, ship_target):
-            def distance(a, b):
-                return sqrt((a.x - b.x) ** 2 + (a.y - b.y) ** 2)
+    def dock(self, ship, planet):
+        self.stats.set_status(ship, ship.DockingStatus.DOCKING)
+        return ship.dock(planet)
 
-            def is_between(a, c, b):
-                # check if c lies between a and b
-                return isclose(distance(a, c) + distance(c, b), distance(a, b))
-
-            if is_between(a=ship, c=friendly_ship, b=ship_target):
-                return True
-
-            ship.y += 0.55
-            ship_target.y += 0.55
-            if is_between(a=ship, c=friendly_ship, b=ship_target):
-                return True
-            ship.y -= 1.1
-            ship_target.y -= 1.1
-            if is_between(a=ship, c=friendly_ship, b=ship_target):
-                return True
-
-            return False
+    def undock(self, ship):
+        self.stats.set_status(ship, ship.DockingStatus.UNDOCKING)
+        return ship.undock()
 
-        # check if upper boundary (+0.5) intersects, and if lower boundary (-0.5) intersects
+    def check_friendly_collisions(self, ship, speed, angle, nearby_friendly_ships_ids):
+        # every nearby friendly follows its planned command (docked ships stand still), and the move collides if the two
+        # ships touch at any time during the turn
+        others = []
         for friendly in nearby_friendly_ships_ids:
             friendly_ship = self.game_map.get_me().get_ship(friendly)
-            ship_target = self.calculate_endpoint(ship, speed, angle)
-
+            if friendly_ship is ship:
+                continue
             if friendly_ship.docking_status != friendly_ship.DockingStatus.UNDOCKED:
-                return check_stationary_friendly(ship, friendly_ship, ship_target)
-
-            if not friendly_ship.command:
+                others.append((friendly_ship.x, friendly_ship.y, 0, 0, friendly_ship.radius))
+            elif not friendly_ship.command:
                 continue
-            elif friendly_ship.action == 'stay':
-                return check_stationary_friendly(ship, friendly_ship, ship_target)
-
-            friendly_ship_command = friendly_ship.command.split()
-            if friendly_ship_command[0] == 'd':
-                return check_stationary_friendly(ship, friendly_ship, ship_target)
-
-            friendly_ship_target = self.calculate_endpoint(ship=friendly_ship,
-                                                      speed=int(friendly_ship_command[2]),
-                                                      angle=int(friendly_ship_command[3]))
-
-            if check_intersect(A=ship, B=ship_target, C=friendly_ship, D=friendly_ship_target):
-                return True
-
-
-            ship.y += 0.55
-            ship_target.y += 0.55
-            if check_intersect(A=ship, B=ship_target, C=friendly_ship, D=friendly_ship_target):
-                return True
-
-            ship.y -= 1.1
-            ship_target.y -= 1.1
-            if check_intersect(A=ship, B=ship_target, C=friendly_ship, D=friendly_ship_target):
-                return True
-
-        return False
+            elif not friendly_ship.command.is_thrust():
+                others.append((friendly_ship.x, friendly_ship.y, 0, 0, friendly_ship.radius))
+            else:
+                dx, dy = hlt.motion.displacement(friendly_ship.command.magnitude, friendly_ship.command.angle)
+                others.append((friendly_ship.x, friendly_ship.y, dx, dy, friendly_ship.radius))
+        if not others:
+            return False
 
-    def navigate(self, ship, target, original_target, game_map, speed, max_corrections, angular_step, nearby_friendly_ships_ids):
-        start = clock()
+        vel_x, vel_y = hlt.motion.displacement(speed, angle)
+        x, y, other_vel_x, other_vel_y, radius = np.array(others).T
+        contact = hlt.collision.time_of_impact(ship.x, ship.y, vel_x, vel_y, ship.radius + self.collision_margin,
+                                               x, y, other_vel_x, other_vel_y, radius)
+        return bool(np.isfinite(contact).any())
+
+    def travel_to_planet(self, ship, planet):
+        # far from the planet the flow field heading is already the shortest way around the other planets, only ships
+        # can be in the way; the last move onto the docking ring is left to navigate
+        start = perf_counter()
+        if self.flow_navigation and self.flow.distance(planet, ship) > hlt.constants.MAX_SPEED:
+            angle = self.flow.heading(planet, ship)
+            if angle is not None:
+                endpoint = self.calculate_endpoint(ship, hlt.constants.MAX_SPEED, angle)
+                if (0 < endpoint.x < self.game_map.width and 0 < endpoint.y < self.game_map.height
+                        and not self.game_map.obstacles_between(ship, endpoint)):
+                    command = ship.thrust(hlt.constants.MAX_SPEED, angle)
+                    self.plan.goals[ship.id] = (planet, hlt.constants.MAX_SPEED)
+                    self.plan.routed[ship.id] = command
+                    self.staticTime += perf_counter() - start
+                    return command
+        self.staticTime += perf_counter() - start
+        return self.navigate(ship, planet, planet, self.game_map, hlt.constants.MAX_SPEED, self.max_corrections,
+                             self.angular_step, self.nearby_friendly_ships_ids)
+
+    def cache_moves(self, plan):
+        for ship_id, (target, speed) in plan.goals.items():
+            command = plan.commands[ship_id]
+            if command.is_thrust() and command.magnitude > 0 and plan.routed.get(ship_id) != command:
+                ship = plan.ships[ship_id]
+                self.move_cache.put(ship, target, command.angle, self.scan_range, self.pursued(ship))
+        self.move_cache.next_turn()
+
+    @staticmethod
+    def pursued(ship):
+        # an attacking ship aims at where its target will be, so its moves are cached by the target ship itself
+        return ship.target if ship.action == 'attack' else None
+
+    def reuse_move(self, ship, target, speed):
+        cached = self.move_cache.get(ship, target, self.pursued(ship))
+        if cached is None:
+            return None
+        angle, deviation, corridor_end = cached
+        distance = ship.calculate_distance_between(target)
+        speed = speed if (distance >= speed) else distance
+        # a degree of slack for the truncation of the heading
+        if abs((angle - ship.calculate_angle_between(target) + 180) % 360 - 180) <= deviation + 1:
+            # last turn's move went along the corridor, so the ship is on it; what is left must still be clear
+            endpoint = self.calculate_endpoint(ship, speed, angle)
+            if (ship.calculate_distance_between(corridor_end) >= speed
+                    and 0 < endpoint.x < self.game_map.width and 0 < endpoint.y < self.game_map.height
+                    and 0 < corridor_end.x < self.game_map.width and 0 < corridor_end.y < self.game_map.height
+                    and not self.game_map.obstacles_between(ship, corridor_end)):
+                self.move_cache.hits += 1
+                return ship.thrust(speed, angle)
+        self.move_cache.misses += 1
+        return None
+
+    def navigate(self, ship, target, original_target, game_map, speed, max_corrections, angular_step, nearby_friendly_ships_ids,
+                 avoid_friendlies=False):
+        start = perf_counter()
+        first_pass = not avoid_friendlies and target is original_target and angular_step == self.angular_step
+        if first_pass and max_corrections == self.max_corrections:
+            command = self.reuse_move(ship, target, speed)
+            if command:
+                self.plan.goals[ship.id] = (original_target, speed)
+                self.staticTime += perf_counter() - start
+                return command
+        if self.tangent_navigation and first_pass:
+            command = ship.navigate_tangent(target, game_map, speed,
+                                            max_deviation=self.max_corrections * self.angular_step)
+            if command:
+                endpoint = self.calculate_endpoint(ship, command.magnitude, command.angle)
+                if 0 < endpoint.x < self.game_map.width and 0 < endpoint.y < self.game_map.height:
+                    self.plan.goals[ship.id] = (original_target, speed)
+                    self.staticTime += perf_counter() - start
+                    return command
         if max_corrections <= 0:
             if angular_step < 0:
                 return None
             else:
-                return self.navigate(ship, original_target, original_target, game_map, speed, self.max_corrections, -angular_step, nearby_friendly_ships_ids)
+                # sweep the other side over the same angular range
+                max_corrections = self.max_corrections * self.angular_step // angular_step
+                return self.navigate(ship, original_target, original_target, game_map, speed, max_corrections, -angular_step, nearby_friendly_ships_ids,
+                                     avoid_friendlies)
         distance = ship.calculate_distance_between(target)
-        angle = ship.calculate_angle_between(target)
-        new_target_dx = cos(radians(angle + angular_step)) * distance
-        new_target_dy = sin(radians(angle + angular_step)) * distance
+        angle = hlt.motion.heading(ship.calculate_angle_between(target))
+        new_target_dx, new_target_dy = hlt.motion.offset(distance, angle + angular_step)
 
         adjust_condition = (game_map.obstacles_between(ship, target) or
-                            #self.check_friendly_collisions(ship, speed, angle, nearby_friendly_ships_ids) or
+                           (avoid_friendlies and self.check_friendly_collisions(ship, min(speed, distance), angle,
+                                                                                 nearby_friendly_ships_ids)) or
                            (ship.x + new_target_dx) >= self.game_map.width or (ship.x + new_target_dx) <= 0 or
                            (ship.y + new_target_dy) >= self.game_map.height or (ship.y + new_target_dy) <= 0)
         if adjust_condition:
             new_target = hlt.entity.Position(ship.x + new_target_dx, ship.y + new_target_dy)
-            self.staticTime += clock() - start
-            return self.navigate(ship, new_target, original_target, game_map, speed, max_corrections - 1, angular_step, nearby_friendly_ships_ids)
+            self.staticTime += perf_counter() - start
+            return self.navigate(ship, new_target, original_target, game_map, speed, max_corrections - 1, angular_step, nearby_friendly_ships_ids,
+                                 avoid_friendlies)
+        self.plan.goals[ship.id] = (original_target, speed)
         speed = speed if (distance >= speed) else distance
-        self.staticTime += clock() - start
+        self.staticTime += perf_counter() - start
         return ship.thrust(speed, angle)
 
+    def refine(self, plan):
+        """
+        Spend the rest of the turn budget improving the plan: first fix friendly collisions, then retry travelling ships
+        with a finer angular step so they deviate less from the straight line to their target. Stops when a pass
+        changes no command, after refine_passes passes or when the deadline is near, the plan stays sendable
+        throughout.
+        """
+        angular_step = self.angular_step
+        renavigated = set()  # ships whose collisions were already fixed this turn
+        for _ in range(self.refine_passes):
+            if plan.time_left() <= self.refine_margin:
+                break
+            changed = self.check_collisions and self.refine_collisions(plan, renavigated)
+            if self.heading_refinement and angular_step > 1:
+                angular_step = max(1, angular_step // 2)
+                changed = self.refine_headings(plan, angular_step) or changed
+            if not changed:
+                break
+
+    def refine_collisions(self, plan, renavigated):
+        """
+        :param TurnPlan plan: The plan to fix
+        :param set renavigated: Ids of the ships already navigated again this turn, which are left as they are; the
+            ships navigated again by this call are added
+        :return: Whether any command changed
+        :rtype: bool
+        """
+        changed = False
+        for ship_id, command in list(plan.commands.items()):
+            if plan.time_left() < self.refine_margin:
+                break
+            if (not command.is_thrust() or command.magnitude == 0 or ship_id not in plan.goals
+                    or ship_id in renavigated):
+                continue
+            ship = plan.ships[ship_id]
+            nearby_friendly_ships_ids = plan.nearby_friendly_ships_ids.get(ship_id, [])
+            if not self.check_friendly_collisions(ship, command.magnitude, command.angle, nearby_friendly_ships_ids):
+                continue
+            renavigated.add(ship_id)
+            target, speed = plan.goals[ship_id]
+            new_command = self.navigate(ship, target, target, self.game_map, speed, self.max_corrections,
+                                        self.angular_step, nearby_friendly_ships_ids, avoid_friendlies=True)
+            if not new_command:
+                ship.action = 'stay'
+                new_command = ship.thrust(magnitude=0, angle=0)
+            if new_command != command:
+                plan.set(ship, new_command)
+                changed = True
+        return changed
+
+    def refine_headings(self, plan, angular_step):
+        changed = False
+        # cover the same angular range as the first pass, at the finer resolution
+        max_corrections = self.max_corrections * self.angular_step // angular_step
+        for ship_id, command in list(plan.commands.items()):
+            if plan.time_left() < self.refine_margin:
+                break
+            if not command.is_thrust() or ship_id not in plan.goals or plan.routed.get(ship_id) == command:
+                continue
+            ship = plan.ships[ship_id]
+            target, speed = plan.goals[ship_id]
+            direct = ship.calculate_angle_between(target)
+            deviation = abs((command.angle - direct + 180) % 360 - 180)
+            if deviation < angular_step:
+                continue
+            command = self.navigate(ship, target, target, self.game_map, speed, max_corrections, angular_step,
+                                    plan.nearby_friendly_ships_ids.get(ship_id, []), avoid_friendlies=True)
+            if not command:
+                continue
+            new_deviation = abs((command.angle - direct + 180) % 360 - 180)
+            if new_deviation < deviation:
+                plan.set(ship, command)
+                changed = True
+        return changed
 
     def update_my_ship_positions(self):
         self.my_ships_x = {x: set() for x in range(self.game.map.width)}
         self.my_ships_y = {y: set() for y in range(self.game.map.height)}
 
-        for ship in self.game_map.get_me().all_ships():
+        for ship in self.game_map.player_ships(self.game_map.my_id):
             self.my_ships_x[floor(ship.x)].add(ship.id)
             self.my_ships_y[floor(ship.y)].add(ship.id)
 
@@ -441,7 +775,7 @@ class Halite2:
         self.enemy_ships_x = {x: set() for x in range(self.game.map.width)}
         self.enemy_ships_y = {y: set() for y in range(self.game.map.height)}
 
-        self.all_enemy_ships = [ship for ship in self.game_map._all_ships() if ship.owner != self.game_map.get_me()]
+        self.all_enemy_ships = self.game_map.enemy_ships()
 
         for ship in self.all_enemy_ships:
             self.enemy_ships_x[floor(ship.x)].add((ship.id, ship.owner.id))
@@ -545,5 +879,10 @@ class Halite2:
                         continue
         return nearby_friendly_ships_ids, nearby_enemy_ships_ids
 
-Halite2()
-
+if __name__ == '__main__':
+    # the engine runs the bot as: python MyBot.py [parameters.json]
+    if len(sys.argv) > 1:
+        with open(sys.argv[1]) as parameters:
+            Halite2(parameters=json.load(parameters))
+    else:
+        Halite2()
@@ -0,0 +1,84 @@
+"""
+Throughput of hlt.simulation.BatchedGames with the batch size: two players running nearest_planet_bot, starting from
+synthetic maps (benchmarks.frames) with three ships each near opposite corners, as real games start.
+
+Run from the repository root: python -m benchmarks.batch_sim
+"""
+
+from time import perf_counter
+
+import numpy as np
+
+from hlt import constants
+from hlt.entity import Ship
+from hlt.game_map import Map
+from hlt.simulation import BatchedGames
+
+from .frames import synthetic_map_string
+
+BATCH_SIZES = (1, 16, 64, 256)
+TURNS = 100
+SLOTS = 64
+
+
+def nearest_planet_bot(games, player_id):
+    """
+    Every undocked ship docks to the nearest planet with a free spot it may dock to, or flies to it, or to the
+    nearest enemy ship once there is no such planet left. Paths are not checked for obstacles.
+    """
+    speed, angle, dock, undock = games.commands()
+    mine = games.alive & (games.owner == player_id) & (games.status == Ship.DockingStatus.UNDOCKED.value)
+    open_planets = games.planet_alive & (games.attached() < games.planet_spots)
+    open_planets &= (games.planet_owner == -1) | (games.planet_owner == player_id)
+
+    dx = games.planet_x[:, None, :] - games.x[:, :, None]
+    dy = games.planet_y[:, None, :] - games.y[:, :, None]
+    surface = np.where(open_planets[:, None, :], np.hypot(dx, dy) - games.planet_radius[:, None, :], np.inf)
+    target = surface.argmin(axis=2)
+    surface = surface.min(axis=2)
+    rows = np.arange(len(games))[:, None]
+
+    docking = mine & (surface <= constants.DOCK_RADIUS)
+    dock[docking] = target[docking]
+    travelling = mine & ~docking & np.isfinite(surface)
+    speed[travelling] = np.minimum(np.floor(surface[travelling] - 1), constants.MAX_SPEED)
+    angle[travelling] = np.degrees(np.arctan2(dy[rows, np.arange(dy.shape[1]), target],
+                                              dx[rows, np.arange(dx.shape[1]), target]))[travelling]
+
+    enemy = games.alive & (games.owner != player_id)
+    ex = games.x[:, None, :] - games.x[:, :, None]
+    ey = games.y[:, None, :] - games.y[:, :, None]
+    distance = np.where(enemy[:, None, :], np.hypot(ex, ey), np.inf)
+    nearest = distance.argmin(axis=2)
+    hunting = mine & ~docking & ~travelling & np.isfinite(distance.min(axis=2))
+    speed[hunting] = np.minimum(np.floor(distance.min(axis=2)[hunting] - 2), constants.MAX_SPEED)
+    angle[hunting] = np.degrees(np.arctan2(ey[rows, np.arange(ey.shape[1]), nearest],
+                                           ex[rows, np.arange(ex.shape[1]), nearest]))[hunting]
+    np.maximum(speed, 0, out=speed)
+    np.round(angle, out=angle)
+    return speed, angle, dock, undock
+
+
+def starting_maps(count):
+    maps = []
+    for seed in range(count):
+        game_map = Map(0, 240, 160)
+        game_map._parse(synthetic_map_string(6, num_players=2, docked=0, pattern='home', spread=3, seed=seed))
+        maps.append(game_map)
+    return maps
+
+
+def main():
+    print('{:>6} {:>12} {:>16} {:>12}'.format('games', 'seconds', 'game turns/s', 'ships left'))
+    for batch_size in BATCH_SIZES:
+        games = BatchedGames.from_maps(starting_maps(batch_size), SLOTS)
+        bots = {0: nearest_planet_bot, 1: nearest_planet_bot}
+        start = perf_counter()
+        games.play(bots, TURNS)
+        elapsed = perf_counter() - start
+        print('{:>6} {:>12.2f} {:>16.0f} {:>12.1f}'.format(batch_size, elapsed, batch_size * TURNS / elapsed,
+                                                           games.alive.sum(axis=1).mean()))
+
+
+if __name__ == '__main__':
+    main()
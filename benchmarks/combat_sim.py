@@ -0,0 +1,51 @@
+"""
+Times hlt.combat.Skirmish on random local fights: two players, 20% of the ships docked, every ship given a random
+displacement of up to MAX_SPEED in every candidate move set.
+
+Run from the repository root: python -m benchmarks.combat_sim
+"""
+
+from statistics import median
+from time import perf_counter
+
+import numpy as np
+
+from hlt import constants
+from hlt.combat import Skirmish
+
+SHIP_COUNTS = (10, 20, 40)
+CANDIDATE_COUNTS = (100, 1000, 2000)
+REPEATS = 50
+
+
+def random_skirmish(num_ships, rng):
+    return Skirmish(rng.uniform(0, 20, num_ships), rng.uniform(0, 20, num_ships),
+                    np.full(num_ships, constants.BASE_SHIP_HEALTH), rng.integers(0, 2, num_ships),
+                    rng.random(num_ships) < 0.2, np.zeros(num_ships))
+
+
+def random_moves(num_candidates, num_ships, rng):
+    speed = rng.uniform(0, constants.MAX_SPEED, (num_candidates, num_ships)).astype(np.float32)
+    angle = rng.uniform(0, 2 * np.pi, (num_candidates, num_ships)).astype(np.float32)
+    return speed * np.cos(angle), speed * np.sin(angle)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print('{:>6} {:>11} {:>10} {:>14}'.format('ships', 'candidates', 'ms', 'us/candidate'))
+    for num_ships in SHIP_COUNTS:
+        skirmish = random_skirmish(num_ships, rng)
+        for num_candidates in CANDIDATE_COUNTS:
+            dx, dy = random_moves(num_candidates, num_ships, rng)
+            times = []
+            for _ in range(REPEATS):
+                start = perf_counter()
+                skirmish.best(dx, dy, 0)
+                times.append(perf_counter() - start)
+            elapsed = median(times)
+            print('{:>6} {:>11} {:>10.3f} {:>14.3f}'.format(num_ships, num_candidates, elapsed * 1000,
+                                                            elapsed / num_candidates * 1e6))
+
+
+if __name__ == '__main__':
+    main()
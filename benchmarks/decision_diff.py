@@ -0,0 +1,135 @@
+"""
+What-if diffing of the bot's decisions over recorded games: every .hlt replay in a directory is fed, as our player
+saw it, to the bot of this tree and to a baseline bot (another tree, or a git revision of this one), and the commands
+they send are compared frame by frame, as are the turn times.
+
+Both bots run untimed (see benchmarks.replay), so differences come from the code, not from the clock. Every replay
+and bot runs in its own worker process, started fresh so that the two trees' modules never mix, and in its own
+temporary directory for the bot's data files. Frames are rendered from the replay as the bot reads them and workers
+send back only the commands and times, so memory stays bounded by one decoded replay per worker.
+
+Writes one CSV row per frame (replay, turn, ships commanded, ships whose command changed, turn times) and prints the
+totals: frames with any change, the changed-command rate and the turn time deltas. The baseline needs
+Halite2(engine_input, timed) in its MyBot.
+
+Run from the repository root: python -m benchmarks.decision_diff REPLAY_DIR [--baseline REV_OR_DIR] [--name Zerg]
+    [--workers N] [--csv FILE]
+"""
+
+import argparse
+import csv
+import glob
+import io
+import multiprocessing
+import os
+import re
+import subprocess
+import sys
+import tarfile
+import tempfile
+from statistics import mean, median
+
+# no hlt imports at module level: every worker imports hlt from the tree it runs
+
+_COMMAND = re.compile(r't (\d+) -?\d+ -?\d+|d (\d+) \d+|u (\d+)')
+
+
+def _run(task):
+    """
+    :param (str, str, str) task: Root of the tree to run, replay file, name of our bot in the replay
+    :return: The task, then the commands and time of every turn, None if our bot is not in the replay
+    :rtype: ((str, str, str), list[(str, float)])
+    """
+    root, path, name = task
+    sys.path.insert(0, root)
+    os.chdir(tempfile.mkdtemp(prefix='decision_diff'))
+    from . import replays
+    from .replay import replay
+
+    game = replays.load(path)
+    player = replays.player_id(game, name)
+    if player is None:
+        return task, None
+    sent, times = replay(replays.engine_input(game, player))
+    del game
+    # the first line sent is the name; every later one ends a turn
+    return task, [(commands, end - start) for commands, start, end in zip(sent[1:], times, times[1:])]
+
+
+def _commands(line):
+    """The commands of one turn by ship id; the engine takes them concatenated, without separators."""
+    return {next(ship for ship in match.groups() if ship is not None): match.group(0)
+            for match in _COMMAND.finditer(line)}
+
+
+def _checkout(revision):
+    """Extract a git revision of this repository to a temporary directory."""
+    root = tempfile.mkdtemp(prefix='baseline')
+    archive = subprocess.run(['git', 'archive', '--format=tar', revision], check=True, stdout=subprocess.PIPE).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(root)
+    return root
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('replays', help='directory of .hlt replays')
+    parser.add_argument('--baseline', default='HEAD', help='directory or git revision of the baseline bot')
+    parser.add_argument('--name', default='Zerg', help='name of our bot in the replays')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--csv', default='decision_diff.csv', help='file to write the per frame results to')
+    args = parser.parse_args()
+
+    current = os.path.abspath('.')
+    baseline = os.path.abspath(args.baseline) if os.path.isdir(args.baseline) else _checkout(args.baseline)
+    paths = sorted(glob.glob(os.path.join(args.replays, '*.hlt')))
+    tasks = [(root, os.path.abspath(path), args.name) for path in paths for root in (current, baseline)]
+
+    frames = changed_frames = commands = changed_commands = 0
+    deltas = []
+    pending = {}  # replay -> the first of its two results
+    # fresh processes, so that every worker imports hlt and MyBot from its own tree
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(args.workers, maxtasksperchild=1) as pool, open(args.csv, 'w', newline='') as output:
+        writer = csv.writer(output)
+        writer.writerow(('replay', 'turn', 'ships', 'changed', 'current ms', 'baseline ms'))
+        for (root, path, _), turns in pool.imap_unordered(_run, tasks):
+            if path not in pending:
+                pending[path] = (root, turns)
+                continue
+            _, other_turns = pending.pop(path)
+            if root != current:
+                turns, other_turns = other_turns, turns
+            name = os.path.basename(path)
+            if turns is None:
+                print('{}: no player named {}'.format(name, args.name))
+                continue
+
+            replay_changed = 0
+            for turn, ((line, elapsed), (other_line, other_elapsed)) in enumerate(zip(turns, other_turns), 1):
+                mine, theirs = _commands(line), _commands(other_line)
+                ships = mine.keys() | theirs.keys()
+                changed = sum(mine.get(ship) != theirs.get(ship) for ship in ships)
+                writer.writerow((name, turn, len(ships), changed, round(elapsed * 1000, 3),
+                                 round(other_elapsed * 1000, 3)))
+                frames += 1
+                changed_frames += changed > 0
+                commands += len(ships)
+                changed_commands += changed
+                replay_changed += changed
+                deltas.append(elapsed - other_elapsed)
+            print('{}: {} turns, {} commands changed'.format(name, len(turns), replay_changed))
+
+    if not frames:
+        print('No frames compared')
+        return
+    print('{} frames, {} ({:.1%}) with changed decisions'.format(frames, changed_frames, changed_frames / frames))
+    print('{} commands, {} ({:.1%}) changed'.format(commands, changed_commands,
+                                                   changed_commands / commands if commands else 0))
+    print('turn time delta, current - baseline (ms): mean {:+.2f}, median {:+.2f}, min {:+.2f}, max {:+.2f}'.format(
+        mean(deltas) * 1000, median(deltas) * 1000, min(deltas) * 1000, max(deltas) * 1000))
+    print('per frame results written to {}'.format(args.csv))
+
+
+if __name__ == '__main__':
+    main()
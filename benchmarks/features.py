@@ -0,0 +1,229 @@
+"""
+Feature extraction from recorded games into a columnar dataset, so that analyses over hundreds of games are array
+queries instead of replay-by-replay scripts.
+
+Every .hlt replay under a directory is decoded in a process pool (benchmarks.replays) and reduced to two tables:
+
+- players: one row per game, frame and player: ships, docked ships, planets owned, production per turn, ships that
+  started docking or undocking, ships spawned, ships destroyed and health lost
+- ships: one row per game, frame and ship: owner, position, health, docking status and distance to the nearest enemy
+  ship (inf if there is none)
+
+Both carry the game index and frame number; games.json lists the replay, player names and final ranks of every game
+index. Each column is a flat binary file, appended to as the games come in and read back memory-mapped by Dataset:
+
+    dataset = Dataset('features')
+    players = dataset['players']
+    ours = players['player'] == 0
+    lost_per_frame = players['destroyed'][ours].mean()
+
+Run from the repository root: python -m benchmarks.features REPLAY_DIR [--output DIR] [--workers N]
+"""
+
+import argparse
+import glob
+import json
+import os
+from multiprocessing import Pool
+
+import numpy as np
+
+from hlt.entity import Ship
+
+from . import replays
+
+#: Columns of every table and their types
+SCHEMA = {
+    'players': {
+        'game': np.int32, 'frame': np.int16, 'player': np.int8, 'ships': np.int16, 'docked': np.int16,
+        'planets': np.int16, 'production': np.int32, 'docking': np.int16, 'undocking': np.int16,
+        'spawned': np.int16, 'destroyed': np.int16, 'health_lost': np.int32,
+    },
+    'ships': {
+        'game': np.int32, 'frame': np.int16, 'id': np.int32, 'owner': np.int8, 'x': np.float32, 'y': np.float32,
+        'health': np.int16, 'status': np.int8, 'nearest_enemy': np.float32,
+    },
+}
+
+
+def extract(path):
+    """
+    :param str path: A .hlt replay
+    :return: The game's description for games.json, and the columns of its rows of every table
+    :rtype: (dict, dict[str, dict[str, numpy.ndarray]])
+    """
+    game = replays.load(path)
+    num_players = game['num_players']
+    productivity = game['constants']['BASE_PRODUCTIVITY']
+    players = {column: [] for column in SCHEMA['players']}
+    ships = {column: [] for column in SCHEMA['ships']}
+    previous = {}  # ship id -> (owner, status, health) in the previous frame
+
+    for frame_number, frame in enumerate(game['frames']):
+        records = [ship for owned in frame['ships'].values() for ship in owned.values()]
+        ids = np.array([ship['id'] for ship in records], dtype=np.int32)
+        owner = np.array([ship['owner'] for ship in records], dtype=np.int8)
+        x = np.array([ship['x'] for ship in records], dtype=np.float32)
+        y = np.array([ship['y'] for ship in records], dtype=np.float32)
+        health = np.array([ship['health'] for ship in records], dtype=np.int16)
+        status = np.array([replays.STATUS[ship['docking']['status']] for ship in records], dtype=np.int8)
+
+        distance = np.hypot(x[:, None] - x[None, :], y[:, None] - y[None, :])
+        distance[owner[:, None] == owner[None, :]] = np.inf
+        nearest = distance.min(axis=1) if len(records) else np.zeros(0, dtype=np.float32)
+
+        for column, values in (('id', ids), ('owner', owner), ('x', x), ('y', y), ('health', health),
+                               ('status', status), ('nearest_enemy', nearest)):
+            ships[column].append(values)
+        ships['game'].append(np.zeros(len(records), dtype=np.int32))
+        ships['frame'].append(np.full(len(records), frame_number, dtype=np.int16))
+
+        # changes since the previous frame, per owner
+        docking = np.zeros(num_players, dtype=np.int16)
+        undocking = np.zeros(num_players, dtype=np.int16)
+        health_lost = np.zeros(num_players, dtype=np.int32)
+        current = {}
+        for ship_id, ship_owner, ship_status, ship_health in zip(ids.tolist(), owner.tolist(), status.tolist(),
+                                                                 health.tolist()):
+            current[ship_id] = (ship_owner, ship_status, ship_health)
+            _, previous_status, previous_health = previous.get(ship_id, (ship_owner, None, ship_health))
+            if ship_status != previous_status:
+                docking[ship_owner] += ship_status == Ship.DockingStatus.DOCKING.value
+                undocking[ship_owner] += ship_status == Ship.DockingStatus.UNDOCKING.value
+            health_lost[ship_owner] += max(previous_health - ship_health, 0)
+        for ship_id, (ship_owner, _, ship_health) in previous.items():
+            if ship_id not in current:
+                health_lost[ship_owner] += ship_health
+        previous = current
+
+        spawned = np.zeros(num_players, dtype=np.int16)
+        destroyed = np.zeros(num_players, dtype=np.int16)
+        for event in frame.get('events', ()):
+            entity = event['entity']
+            if entity['type'] == 'ship' and event['event'] == 'spawned':
+                spawned[entity['owner']] += 1
+            elif entity['type'] == 'ship' and event['event'] == 'destroyed':
+                destroyed[entity['owner']] += 1
+
+        docked = np.bincount(owner[status == Ship.DockingStatus.DOCKED.value], minlength=num_players)
+        owners = [planet['owner'] for planet in frame['planets'].values() if planet['owner'] is not None]
+        for column, values in (('player', np.arange(num_players)),
+                               ('ships', np.bincount(owner, minlength=num_players)),
+                               ('docked', docked),
+                               ('planets', np.bincount(owners, minlength=num_players)),
+                               ('production', docked * productivity),
+                               ('docking', docking), ('undocking', undocking), ('spawned', spawned),
+                               ('destroyed', destroyed), ('health_lost', health_lost)):
+            players[column].append(values)
+        players['game'].append(np.zeros(num_players, dtype=np.int32))
+        players['frame'].append(np.full(num_players, frame_number, dtype=np.int16))
+
+    description = {'replay': os.path.basename(path), 'players': game['player_names'],
+                   'ranks': [game['stats'][str(player)]['rank'] for player in range(num_players)]}
+    tables = {'players': players, 'ships': ships}
+    return description, {table: {column: np.concatenate(values).astype(SCHEMA[table][column])
+                                 for column, values in columns.items()}
+                         for table, columns in tables.items()}
+
+
+def write(paths, output, workers=None):
+    """
+    Extract the features of the replays into a new dataset.
+
+    :param list[str] paths: The replay files, in game index order
+    :param str output: Directory of the dataset, created if needed; existing tables are overwritten
+    :param int workers: Number of worker processes, one per CPU if None
+    :return: Number of rows of every table
+    :rtype: dict[str, int]
+    """
+    files = {}
+    for table, columns in SCHEMA.items():
+        os.makedirs(os.path.join(output, table), exist_ok=True)
+        for column in columns:
+            files[table, column] = open(os.path.join(output, table, column + '.bin'), 'wb')
+    rows = dict.fromkeys(SCHEMA, 0)
+    games = []
+    try:
+        with Pool(workers) as pool:
+            for game, (description, tables) in enumerate(pool.imap(extract, paths)):
+                games.append(description)
+                for table, columns in tables.items():
+                    columns['game'][:] = game
+                    for column, values in columns.items():
+                        values.tofile(files[table, column])
+                    rows[table] += len(columns['game'])
+    finally:
+        for file in files.values():
+            file.close()
+    with open(os.path.join(output, 'games.json'), 'w') as description:
+        json.dump({'games': games, 'rows': rows}, description, indent=1)
+    return rows
+
+
+class Dataset:
+    """
+    A dataset written by write, its columns memory-mapped on access.
+
+    :ivar games: Replay, player names and ranks of every game index
+    :ivar rows: Number of rows of every table
+    """
+
+    def __init__(self, path):
+        """
+        :param str path: Directory of the dataset
+        """
+        self.path = path
+        with open(os.path.join(path, 'games.json')) as description:
+            description = json.load(description)
+        self.games = description['games']
+        self.rows = description['rows']
+
+    def __getitem__(self, table):
+        """
+        :param str table: Name of the table, a key of SCHEMA
+        :return: The table's columns, read-only memory maps
+        :rtype: dict[str, numpy.memmap]
+        """
+        return {column: self.column(table, column) for column in SCHEMA[table]}
+
+    def column(self, table, column):
+        """
+        :param str table: Name of the table
+        :param str column: Name of the column
+        :return: The column, a read-only memory map
+        :rtype: numpy.memmap
+        """
+        if not self.rows[table]:
+            return np.zeros(0, dtype=SCHEMA[table][column])
+        return np.memmap(os.path.join(self.path, table, column + '.bin'), dtype=SCHEMA[table][column], mode='r',
+                         shape=(self.rows[table],))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('replays', help='directory searched for .hlt replays, recursively')
+    parser.add_argument('--output', default='features', help='directory to write the dataset to')
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.replays, '**', '*.hlt'), recursive=True))
+    if not paths:
+        print('No .hlt replays found under {}'.format(args.replays))
+        return
+    rows = write(paths, args.output, args.workers)
+    print('{} games, {} player rows, {} ship rows written to {}'.format(len(paths), rows['players'], rows['ships'],
+                                                                        args.output))
+
+    if not rows['players']:
+        return
+    # an example of a query over all games: ships destroyed per game and player
+    dataset = Dataset(args.output)
+    players = dataset['players']
+    keys = players['game'].astype(np.int64) * 256 + players['player']
+    _, index = np.unique(keys, return_inverse=True)
+    lost = np.bincount(index, weights=players['destroyed'])
+    print('ships destroyed per game and player: mean {:.1f}, max {:.0f}'.format(lost.mean(), lost.max()))
+
+
+if __name__ == '__main__':
+    main()
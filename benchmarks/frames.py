@@ -0,0 +1,188 @@
+"""
+Synthetic engine input at any scale, for stress-testing the parser and the bot beyond the few hundred ships of
+recorded games. The frames are valid engine map strings: planets do not overlap, undocked ships are outside every
+planet, and every docking, docked or undocking ship sits at an owned planet's surface and is listed among its docked
+ships, within its docking spots.
+
+Ships are placed by pattern:
+
+- uniform: anywhere on the map
+- home: around their player's starting point, one per corner (two players start in opposite corners)
+- battle: every player's ships around the centre of the map, all mixed up
+
+synthetic_map_string gives a single frame, synthetic_game a whole engine session (player tag, map size, initial map,
+frames) that can be fed to the bot, e.g. with benchmarks.replay.replay. Undocked ships drift up to MAX_SPEED per
+frame.
+"""
+
+import math
+import random
+
+from hlt import constants
+from hlt.entity import Ship
+
+PATTERNS = ('uniform', 'home', 'battle')
+
+
+class SyntheticMap:
+    """
+    A random map state, rendered as engine map strings frame after frame.
+
+    :ivar ships: Per player, lists [id, x, y, docking status, planet id] of its ships
+    :ivar planets: Lists [id, x, y, radius, docking spots, owner id or None, docked ship ids]
+    """
+
+    def __init__(self, num_ships, width=240, height=160, num_players=4, num_planets=28, docked=0.2, pattern='uniform',
+                 spread=10.0, seed=0):
+        """
+        :param int num_ships: Number of ships, split evenly between the players
+        :param int width: Map width
+        :param int height: Map height
+        :param int num_players: Number of players, 2 or 4 in real games
+        :param int num_planets: Number of planets
+        :param float docked: Fraction of every player's ships attached to its planets (docking, docked or
+            undocking), as far as the planets' docking spots allow
+        :param str pattern: How the undocked ships are placed, one of PATTERNS
+        :param float spread: Standard deviation of the ship positions around their centre, for home and battle
+        :param int seed: Seed of the random generator
+        """
+        if pattern not in PATTERNS:
+            raise ValueError("Unknown pattern {!r}, expected one of {}".format(pattern, PATTERNS))
+        self.width = width
+        self.height = height
+        self.spread = spread
+        self._rng = random.Random(seed)
+        self.planets = self._place_planets(num_planets)
+        corners = [(0.15, 0.15), (0.85, 0.85), (0.85, 0.15), (0.15, 0.85)]
+
+        self.ships = []
+        ship_id = 0
+        per_player = num_ships // num_players
+        planets = iter(self._rng.sample(self.planets, len(self.planets)))
+        for player_id in range(num_players):
+            ships = []
+            to_dock = int(per_player * docked)
+            planet = None
+            while to_dock:
+                if planet is None or len(planet[6]) == planet[4]:
+                    planet = next(planets, None)
+                    if planet is None:
+                        break
+                    planet[5] = player_id
+                status = self._rng.choices((Ship.DockingStatus.DOCKING, Ship.DockingStatus.DOCKED,
+                                            Ship.DockingStatus.UNDOCKING), (1, 8, 1))[0]
+                angle = self._rng.uniform(0, 2 * math.pi)
+                distance = planet[3] + constants.SHIP_RADIUS + 0.5
+                ships.append([ship_id, planet[1] + distance * math.cos(angle), planet[2] + distance * math.sin(angle),
+                              status, planet[0]])
+                planet[6].append(ship_id)
+                ship_id += 1
+                to_dock -= 1
+
+            if pattern == 'home':
+                centre = corners[player_id % len(corners)]
+                centre = centre[0] * width, centre[1] * height
+            else:
+                centre = width / 2, height / 2
+            while len(ships) < per_player:
+                x, y = self._free_point(None if pattern == 'uniform' else centre)
+                ships.append([ship_id, x, y, Ship.DockingStatus.UNDOCKED, 0])
+                ship_id += 1
+            self.ships.append(ships)
+
+    def _place_planets(self, num_planets):
+        planets = []
+        for planet_id in range(num_planets):
+            for _ in range(1000):
+                radius = self._rng.uniform(3, 10)
+                x = self._rng.uniform(radius + 10, self.width - radius - 10)
+                y = self._rng.uniform(radius + 10, self.height - radius - 10)
+                if all(math.hypot(x - other[1], y - other[2]) > radius + other[3] + 5 for other in planets):
+                    break
+            else:
+                raise ValueError("Could not fit {} planets on a {}x{} map".format(num_planets, self.width, self.height))
+            planets.append([planet_id, x, y, radius, max(2, int(radius / 2)), None, []])
+        return planets
+
+    def _free_point(self, centre):
+        """A random point on the map outside every planet, uniform or normally distributed around centre."""
+        while True:
+            if centre is None:
+                x, y = self._rng.uniform(0, self.width), self._rng.uniform(0, self.height)
+            else:
+                x, y = self._rng.gauss(centre[0], self.spread), self._rng.gauss(centre[1], self.spread)
+            if 0 <= x < self.width and 0 <= y < self.height and self._outside_planets(x, y):
+                return x, y
+
+    def _outside_planets(self, x, y):
+        return all(math.hypot(x - planet[1], y - planet[2]) > planet[3] + constants.SHIP_RADIUS + 0.5
+                   for planet in self.planets)
+
+    def step(self):
+        """
+        Move every undocked ship by up to MAX_SPEED in a random direction, where that keeps it on the map and outside
+        the planets.
+
+        :return: nothing
+        """
+        for ships in self.ships:
+            for ship in ships:
+                if ship[3] != Ship.DockingStatus.UNDOCKED:
+                    continue
+                angle = self._rng.uniform(0, 2 * math.pi)
+                speed = self._rng.uniform(0, constants.MAX_SPEED)
+                x, y = ship[1] + speed * math.cos(angle), ship[2] + speed * math.sin(angle)
+                if 0 <= x < self.width and 0 <= y < self.height and self._outside_planets(x, y):
+                    ship[1], ship[2] = x, y
+
+    def frame(self):
+        """
+        :return: The map in the engine's format
+        :rtype: str
+        """
+        tokens = [str(len(self.ships))]
+        for player_id, ships in enumerate(self.ships):
+            tokens += [str(player_id), str(len(ships))]
+            for ship_id, x, y, status, planet_id in ships:
+                docking = status in (Ship.DockingStatus.DOCKING, Ship.DockingStatus.UNDOCKING)
+                tokens += [str(ship_id), repr(x), repr(y), str(constants.BASE_SHIP_HEALTH), '0.0', '0.0',
+                           str(status.value), str(planet_id), str(constants.DOCK_TURNS if docking else 0), '0']
+        tokens.append(str(len(self.planets)))
+        for planet_id, x, y, radius, spots, owner, docked_ships in self.planets:
+            tokens += [str(planet_id), repr(x), repr(y), '1500', repr(radius), str(spots), '0', '900',
+                       '0' if owner is None else '1', '0' if owner is None else str(owner), str(len(docked_ships))]
+            tokens += [str(ship_id) for ship_id in docked_ships]
+        return ' '.join(tokens)
+
+
+def synthetic_map_string(num_ships, width=240, height=160, seed=0, **options):
+    """
+    :param int num_ships: Number of ships
+    :param int width: Map width
+    :param int height: Map height
+    :param int seed: Seed of the random generator
+    :param options: Further SyntheticMap parameters
+    :return: One random frame in the engine's format
+    :rtype: str
+    """
+    return SyntheticMap(num_ships, width, height, seed=seed, **options).frame()
+
+
+def synthetic_game(num_ships, turns, width=240, height=160, player_id=0, seed=0, **options):
+    """
+    :param int num_ships: Number of ships
+    :param int turns: Number of frames after the initial map
+    :param int width: Map width
+    :param int height: Map height
+    :param int player_id: The tag of the player the input is for
+    :param int seed: Seed of the random generator
+    :param options: Further SyntheticMap parameters
+    :return: The engine's input to the player, line by line
+    :rtype: list[str]
+    """
+    game_map = SyntheticMap(num_ships, width, height, seed=seed, **options)
+    lines = [str(player_id), '{} {}'.format(width, height), game_map.frame()]
+    for _ in range(turns):
+        game_map.step()
+        lines.append(game_map.frame())
+    return lines
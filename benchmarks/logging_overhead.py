@@ -0,0 +1,63 @@
+"""
+Measures how much of a turn is spent in logging calls when the log is written synchronously, through the
+background listener (Game.set_up_logging(asynchronous=True)), and when the level gates the messages out.
+
+Each simulated turn issues the bot's per-turn messages plus one debug line per ship. Every mode runs in its own
+process since the root logger can only be configured once.
+
+Run from the repository root: python -m benchmarks.logging_overhead
+"""
+
+import logging
+import os
+import tempfile
+from multiprocessing import Process, Queue
+from statistics import mean, median
+from time import perf_counter
+
+from hlt.networking import Game
+
+TURNS = 300
+SHIPS_PER_TURN = (10, 100, 400)
+MODES = (
+    ('sync', logging.DEBUG, False),
+    ('async', logging.DEBUG, True),
+    ('gated', logging.WARNING, False),
+)
+
+
+def _log_turn(turn, num_ships):
+    logging.info("---NEW TURN---")
+    for ship_id in range(num_ships):
+        logging.debug("ship %d heading %d at speed %d", ship_id, (ship_id * 37) % 360, 7)
+    logging.info("%d,%f undocked start time:%f", turn, 0.05, 0.002)
+    logging.info("Commands given: %d, commandable ships: %d", num_ships, num_ships)
+
+
+def _run_mode(level, asynchronous, num_ships, results):
+    path = os.path.join(tempfile.mkdtemp(), 'bench.log')
+    listener = Game.set_up_logging(path, level=level, asynchronous=asynchronous)
+    times = []
+    for turn in range(TURNS):
+        start = perf_counter()
+        _log_turn(turn, num_ships)
+        times.append(perf_counter() - start)
+    if listener is not None:
+        listener.stop()
+    results.put(times)
+
+
+def main():
+    print('{:>6} {:>6} {:>14} {:>14}'.format('ships', 'mode', 'median (ms)', 'mean (ms)'))
+    for num_ships in SHIPS_PER_TURN:
+        for mode, level, asynchronous in MODES:
+            results = Queue()
+            worker = Process(target=_run_mode, args=(level, asynchronous, num_ships, results))
+            worker.start()
+            times = results.get()
+            worker.join()
+            print('{:>6} {:>6} {:>14.3f} {:>14.3f}'.format(num_ships, mode, median(times) * 1000, mean(times) * 1000))
+
+
+if __name__ == '__main__':
+    main()
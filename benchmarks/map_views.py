@@ -0,0 +1,105 @@
+"""
+Counts the lists built by the map accessors during one turn of the bot's bookkeeping, before and after it switched
+to the indexed views of hlt.game_map.Map (player_ships, owned_planets, docked_ships, enemy_planets, enemy_ships).
+
+Each turn replays the accesses the bot makes outside navigation: the end-game ratio, the undocked ship list, the
+per-ship planet ordering and relative strength (before only, it is now computed once by hlt.stats.TurnStats), the
+docked ships of owned planets, and the ship position tables. Every call to all_players, all_planets, _all_ships,
+Player.all_ships or Planet.all_docked_ships counts as one list built.
+
+Run from the repository root: python -m benchmarks.map_views
+"""
+
+import functools
+import tracemalloc
+from statistics import median
+from time import perf_counter
+
+import hlt
+from hlt.entity import Planet, Ship
+from hlt.game_map import Map, Player
+
+from .frames import synthetic_map_string
+
+SHIP_COUNTS = (50, 500, 2000)
+REPEATS = 20
+MY_ID = 0
+
+_ACCESSORS = ((Map, 'all_players'), (Map, 'all_planets'), (Map, '_all_ships'), (Player, 'all_ships'),
+              (Planet, 'all_docked_ships'))
+lists_built = 0
+
+
+def _counting(method):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        global lists_built
+        lists_built += 1
+        return method(*args, **kwargs)
+    return wrapper
+
+
+def turn_before(game_map):
+    me = game_map.get_me()
+    end_game = len(me.all_ships()) / len(game_map._all_ships()) > 0.8
+    undocked = [ship for ship in me.all_ships() if ship.docking_status == Ship.DockingStatus.UNDOCKED]
+    for ship in undocked:
+        sorted(game_map.all_planets(), key=ship.calculate_distance_between)
+        strength = {player.id: 0 for player in game_map.all_players()}
+        for planet in [planet for planet in game_map.all_planets() if planet.owner is not None]:
+            strength[planet.owner.id] += 1 / len(game_map.all_planets())
+    for planet in [planet for planet in game_map.all_planets() if planet.owner == me]:
+        planet.all_docked_ships()
+    my_ships = [ship.id for ship in me.all_ships()]
+    enemy_ships = [ship for ship in game_map._all_ships() if ship.owner != me]
+    commandable = len([ship for ship in me.all_ships() if ship.docking_status == Ship.DockingStatus.UNDOCKED])
+    return end_game, my_ships, enemy_ships, commandable
+
+
+def turn_after(game_map):
+    stats = hlt.stats.TurnStats(game_map)
+    end_game = stats.ship_share(MY_ID) > 0.8
+    undocked = game_map.player_ships(MY_ID, Ship.DockingStatus.UNDOCKED)
+    for ship in undocked:
+        sorted(game_map.all_planets(), key=ship.calculate_distance_between)
+    for planet in game_map.owned_planets(MY_ID):
+        game_map.docked_ships(planet)
+    my_ships = [ship.id for ship in game_map.player_ships(MY_ID)]
+    enemy_ships = game_map.enemy_ships()
+    return end_game, my_ships, enemy_ships, len(undocked)
+
+
+def measure(turn, game_map):
+    global lists_built
+    lists_built = 0
+    turn(game_map)
+    built = lists_built
+
+    tracemalloc.start()
+    turn(game_map)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    times = []
+    for _ in range(REPEATS):
+        start = perf_counter()
+        turn(game_map)
+        times.append(perf_counter() - start)
+    return built, peak, median(times)
+
+
+def main():
+    for cls, name in _ACCESSORS:
+        setattr(cls, name, _counting(getattr(cls, name)))
+    print('{:>6} {:>7} {:>12} {:>14} {:>10}'.format('ships', 'views', 'lists/turn', 'peak KiB', 'ms'))
+    for num_ships in SHIP_COUNTS:
+        game_map = Map(MY_ID, 240, 160)
+        game_map._parse(synthetic_map_string(num_ships))
+        for label, turn in (('before', turn_before), ('after', turn_after)):
+            built, peak, elapsed = measure(turn, game_map)
+            print('{:>6} {:>7} {:>12} {:>14.1f} {:>10.3f}'.format(num_ships, label, built, peak / 1024,
+                                                                  elapsed * 1000))
+
+
+if __name__ == '__main__':
+    main()
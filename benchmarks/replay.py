@@ -0,0 +1,109 @@
+"""
+Re-runs a game captured by the bot (hlt.networking.Game's capture mode, on by default in MyBot.Halite2, written to
+./data/engine_input.gz) offline: the captured engine lines are fed to MyBot.Halite2 in place of stdin and the commands
+it sends are collected in place of stdout. The bot runs untimed, so the same capture always gives the same commands
+however slow the run, e.g. under the profiler.
+
+Prints the turn time distribution and the slowest turns, optionally writes the commands (one line per turn) and a
+cProfile dump of the whole run.
+
+Run from the repository root: python -m benchmarks.replay [capture] [--commands FILE] [--profile FILE]
+"""
+
+import argparse
+import cProfile
+import io
+import pstats
+import sys
+from statistics import median
+from time import perf_counter
+
+from hlt.networking import Game
+
+SLOWEST = 5
+
+
+class _LineReader(io.TextIOBase):
+    """Stands in for stdin, taking the lines from an iterable as they are read."""
+
+    def __init__(self, lines):
+        self._lines = iter(lines)
+
+    def readline(self, size=-1):
+        line = next(self._lines, None)
+        return '' if line is None else line + '\n'
+
+
+class _CommandSink(io.TextIOBase):
+    """Stands in for stdout, keeping every turn's commands and the time they were sent."""
+
+    def __init__(self):
+        self.turns = []
+        self.sent = []
+        self._pending = []
+
+    def write(self, text):
+        self._pending.append(text)
+        if text.endswith('\n'):
+            self.turns.append(''.join(self._pending))
+            self.sent.append(perf_counter())
+            self._pending = []
+        return len(text)
+
+
+def replay(lines, profile=None):
+    """
+    :param collections.Iterable[str] lines: The engine lines, read as the bot asks for them
+    :param cProfile.Profile profile: Profiler to run the bot under, if any
+    :return: The lines the bot sent, the bot's name first, and the time after which each one was sent
+    :rtype: (list[str], list[float])
+    """
+    import MyBot
+
+    sink = _CommandSink()
+    stdin, stdout = sys.stdin, sys.stdout
+    sys.stdin, sys.stdout = _LineReader(lines), sink
+    try:
+        start = perf_counter()
+        if profile is not None:
+            profile.runcall(MyBot.Halite2, engine_input=None, timed=False)
+        else:
+            MyBot.Halite2(engine_input=None, timed=False)
+    finally:
+        sys.stdin, sys.stdout = stdin, stdout
+    return sink.turns, [sent - start for sent in sink.sent]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('capture', nargs='?', default='./data/engine_input.gz')
+    parser.add_argument('--commands', help='file to write the commands of every turn to')
+    parser.add_argument('--profile', help='file to write the cProfile statistics to')
+    args = parser.parse_args()
+
+    # read it all first, the bot clears its data files when it starts
+    lines = Game.read_capture(args.capture)
+    profile = cProfile.Profile() if args.profile else None
+    sent, times = replay(lines, profile)
+
+    # the first line sent is the name, after the initialization; every later one ends a turn
+    turn_times = [end - start for start, end in zip(times, times[1:])]
+    print('{} frames, initialization {:.3f}s'.format(len(lines) - 2, times[0] if times else 0))
+    if turn_times:
+        ordered = sorted(turn_times)
+        print('turn time (ms): median {:.1f}, p99 {:.1f}, max {:.1f}'.format(
+            median(ordered) * 1000, ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000,
+            ordered[-1] * 1000))
+        slowest = sorted(range(len(turn_times)), key=turn_times.__getitem__, reverse=True)[:SLOWEST]
+        print('slowest turns: ' + ', '.join('{} ({:.1f}ms)'.format(turn + 1, turn_times[turn] * 1000)
+                                            for turn in slowest))
+    if args.commands:
+        with open(args.commands, 'w') as commands:
+            commands.writelines(sent[1:])
+    if profile is not None:
+        profile.dump_stats(args.profile)
+        pstats.Stats(profile).sort_stats('cumulative').print_stats(20)
+
+
+if __name__ == '__main__':
+    main()
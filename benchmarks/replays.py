@@ -0,0 +1,82 @@
+"""
+Reading the engine's replay files (.hlt): zstandard compressed JSON holding the static planet data and one frame per
+turn. Frames can be rendered back into the map strings the engine sends the bots, so recorded games can be fed to
+the bot or parsed into hlt.game_map.Map.
+
+Needs the zstandard package, only imported when a replay is loaded.
+"""
+
+import json
+
+#: Ship.DockingStatus values by the replays' docking status names
+STATUS = {'undocked': 0, 'docking': 1, 'docked': 2, 'undocking': 3}
+
+
+def load(path):
+    """
+    :param str path: A .hlt replay file
+    :return: The decoded replay
+    :rtype: dict
+    """
+    import zstandard
+
+    with open(path, 'rb') as replay:
+        return json.loads(zstandard.ZstdDecompressor().decompressobj().decompress(replay.read()))
+
+
+def player_id(replay, name):
+    """
+    :param dict replay: A decoded replay
+    :param str name: A bot name
+    :return: The id of the first player with the name, None if no player has it
+    :rtype: int
+    """
+    return next((i for i, player_name in enumerate(replay['player_names']) if player_name == name), None)
+
+
+def map_string(replay, frame):
+    """
+    :param dict replay: A decoded replay
+    :param dict frame: One of its frames
+    :return: The frame in the format the engine sends it to the bots
+    :rtype: str
+    """
+    planets = {planet['id']: planet for planet in replay['planets']}
+    tokens = [str(replay['num_players'])]
+    for owner in range(replay['num_players']):
+        ships = frame['ships'].get(str(owner), {})
+        tokens += [str(owner), str(len(ships))]
+        for ship in ships.values():
+            docking = ship['docking']
+            tokens += [str(ship['id']), repr(ship['x']), repr(ship['y']), str(ship['health']), repr(ship['vel_x']),
+                       repr(ship['vel_y']), str(STATUS[docking['status']]), str(docking.get('planet_id', 0)),
+                       str(docking.get('turns_left', 0)), str(ship['cooldown'])]
+    tokens.append(str(len(frame['planets'])))
+    for planet in frame['planets'].values():
+        static = planets[planet['id']]
+        owned = planet['owner'] is not None
+        tokens += [str(planet['id']), repr(static['x']), repr(static['y']), str(planet['health']), repr(static['r']),
+                   str(static['docking_spots']), str(planet['current_production']),
+                   str(planet['remaining_production']), str(int(owned)), str(planet['owner'] if owned else 0),
+                   str(len(planet['docked_ships']))]
+        tokens += [str(ship_id) for ship_id in planet['docked_ships']]
+    return ' '.join(tokens)
+
+
+def engine_input(replay, player):
+    """
+    The lines the engine sent the player during the game: player tag, map size, initial map, then the map at the
+    start of every turn. Frames are rendered as they are read.
+
+    :param dict replay: A decoded replay
+    :param int player: The player id
+    :return: The lines, without line ends
+    :rtype: collections.Iterable[str]
+    """
+    yield str(player)
+    yield '{} {}'.format(replay['width'], replay['height'])
+    frames = replay['frames']
+    yield map_string(replay, frames[0])
+    # the last frame is the final state, nobody moves in it
+    for frame in frames[:-1]:
+        yield map_string(replay, frame)
@@ -0,0 +1,78 @@
+"""
+Scaling of the parser and the bot's per-ship work with the number of ships, on synthetic frames (benchmarks.frames)
+far larger than recorded games.
+
+Map._parse is timed directly on single frames. The bot subsystems are measured by running MyBot.Halite2 untimed on a
+short synthetic game under cProfile (benchmarks.replay) and taking the cumulative time of update_nearby_entities,
+navigate, refine and the whole turn; profiling slows everything down about alike, so the curves keep their shape.
+
+Run from the repository root: python -m benchmarks.scaling [--pattern uniform|home|battle] [--csv FILE]
+"""
+
+import argparse
+import cProfile
+import csv
+import pstats
+from statistics import median
+from time import perf_counter
+
+from hlt.game_map import Map
+
+from .frames import PATTERNS, synthetic_game, synthetic_map_string
+from .replay import replay
+
+SHIP_COUNTS = (250, 1000, 2500, 5000)
+REPEATS = 10
+TURNS = 2
+SUBSYSTEMS = ('turn', 'update_nearby_entities', 'navigate', 'refine')
+
+
+def time_parse(num_ships, pattern):
+    map_string = synthetic_map_string(num_ships, pattern=pattern)
+    times = []
+    for _ in range(REPEATS):
+        game_map = Map(0, 240, 160)
+        start = perf_counter()
+        game_map._parse(map_string)
+        times.append(perf_counter() - start)
+    return median(times)
+
+
+def time_bot(num_ships, pattern):
+    """
+    :return: Cumulative time per turn of each of SUBSYSTEMS in MyBot, under the profiler
+    :rtype: dict[str, float]
+    """
+    profile = cProfile.Profile()
+    replay(synthetic_game(num_ships, TURNS, pattern=pattern), profile)
+    stats = pstats.Stats(profile).stats
+    times = dict.fromkeys(SUBSYSTEMS, 0.0)
+    for (filename, _, function), (_, _, _, cumulative, _) in stats.items():
+        if function in times and filename.endswith('MyBot.py'):
+            times[function] += cumulative / TURNS
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pattern', choices=PATTERNS, default='uniform')
+    parser.add_argument('--csv', help='file to write the results to, for plotting')
+    args = parser.parse_args()
+
+    columns = ('ships', 'parse') + SUBSYSTEMS
+    rows = []
+    print(' '.join('{:>22}'.format(column + ('' if column == 'ships' else ' (ms)')) for column in columns))
+    for num_ships in SHIP_COUNTS:
+        times = time_bot(num_ships, args.pattern)
+        row = [num_ships, time_parse(num_ships, args.pattern) * 1000] + [times[name] * 1000 for name in SUBSYSTEMS]
+        rows.append(row)
+        print('{:>22}'.format(num_ships) + ''.join(' {:>22.1f}'.format(value) for value in row[1:]))
+    if args.csv:
+        with open(args.csv, 'w', newline='') as output:
+            writer = csv.writer(output)
+            writer.writerow(columns)
+            writer.writerows(rows)
+
+
+if __name__ == '__main__':
+    main()
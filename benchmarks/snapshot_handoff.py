@@ -0,0 +1,91 @@
+"""
+Compares two ways of handing the current map to a worker process every turn:
+
+1. pickle - send the linked hlt.game_map.Map through a pipe (what a multiprocessing.Pool would do)
+2. shared memory - write hlt.snapshot.MapSnapshot (as the parser does), only the generation number goes through the pipe
+
+The map is parsed once up front, so the timings only cover the handoff and the worker's first read.
+
+Run from the repository root: python -m benchmarks.snapshot_handoff
+"""
+
+from multiprocessing import Pipe, Process
+from statistics import median
+from time import perf_counter
+
+import hlt
+from hlt.snapshot import MapSnapshot
+
+from .frames import synthetic_map_string
+
+SHIP_COUNTS = (50, 500, 2000)
+REPEATS = 50
+
+
+def _pickle_worker(conn):
+    while True:
+        game_map = conn.recv()
+        if game_map is None:
+            break
+        conn.send(len(game_map._all_ships()))
+
+
+def _snapshot_worker(conn, name):
+    snapshot = MapSnapshot.attach(name)
+    while True:
+        generation = conn.recv()
+        if generation is None:
+            break
+        _, ships, _ = snapshot.read()
+        conn.send(len(ships))
+    snapshot.close()
+
+
+def time_pickle(map_string):
+    game_map = hlt.game_map.Map(0, 240, 160)
+    game_map._parse(map_string)
+    parent, child = Pipe()
+    worker = Process(target=_pickle_worker, args=(child,))
+    worker.start()
+    times = []
+    for _ in range(REPEATS):
+        start = perf_counter()
+        parent.send(game_map)
+        parent.recv()
+        times.append(perf_counter() - start)
+    parent.send(None)
+    worker.join()
+    return median(times)
+
+
+def time_snapshot(map_string):
+    game_map = hlt.game_map.Map(0, 240, 160)
+    game_map._parse(map_string)
+    snapshot = game_map.share_snapshot()
+    parent, child = Pipe()
+    worker = Process(target=_snapshot_worker, args=(child, snapshot.name))
+    worker.start()
+    times = []
+    for _ in range(REPEATS):
+        start = perf_counter()
+        snapshot.write(game_map)
+        parent.send(snapshot.generation)
+        parent.recv()
+        times.append(perf_counter() - start)
+    parent.send(None)
+    worker.join()
+    snapshot.close()
+    return median(times)
+
+
+def main():
+    print('{:>6} {:>14} {:>14} {:>8}'.format('ships', 'pickle (ms)', 'shm (ms)', 'ratio'))
+    for num_ships in SHIP_COUNTS:
+        map_string = synthetic_map_string(num_ships)
+        pickled = time_pickle(map_string)
+        shared = time_snapshot(map_string)
+        print('{:>6} {:>14.3f} {:>14.3f} {:>8.2f}'.format(num_ships, pickled * 1000, shared * 1000, pickled / shared))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""
+Random search over the bot's tunable parameters (MyBot.PARAMETERS), maximizing the win rate against a pool of
+opponents subject to a limit on the 99th percentile turn time.
+
+Every parameter set plays the same seeded games through the Halite engine, in a process pool, each game in its own
+temporary directory holding the parameters file (the bot reads it from its command line) and the bot's data files,
+from which the turn times are read. The engine runs in quiet mode and its JSON output gives the ranks. Evaluations
+are cached on disk, keyed by the parameter set, a hash of the bot's code and the game settings, so a rerun only
+plays what is missing, and an interrupted search keeps every evaluation it completed.
+
+Opponent commands may use {python} (this interpreter) and {root} (the repository root) since games do not run from
+the repository root.
+
+Run from the repository root: python -m benchmarks.tune --engine ./halite [--samples N] [--games N]
+    [--opponent COMMAND ...] [--players 2] [--p99-limit SECONDS] [--workers N] [--cache FILE]
+"""
+
+import argparse
+import glob
+import hashlib
+import itertools
+import json
+import os
+import random
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+from multiprocessing import Pool
+
+from MyBot import PARAMETERS
+
+ROOT = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+
+#: Values tried for every parameter
+SPACE = {
+    'angular_step': [3, 5, 10],
+    'max_corrections': [9, 18, 27],
+    'scan_range': [21, 28, 35, 42],
+    'end_game_share': [0.6, 0.7, 0.8, 0.9],
+    'engagement_distance': [2, 3, 4, 5],
+}
+
+
+def bot_hash():
+    """
+    :return: Hash of the bot's code: MyBot.py and the hlt package
+    :rtype: str
+    """
+    digest = hashlib.sha256()
+    for path in [os.path.join(ROOT, 'MyBot.py')] + sorted(glob.glob(os.path.join(ROOT, 'hlt', '*.py'))):
+        with open(path, 'rb') as source:
+            digest.update(source.read())
+    return digest.hexdigest()
+
+
+def cache_key(parameters, settings):
+    """
+    :param dict parameters: A parameter set
+    :param dict settings: Everything else deciding the outcome: bot hash, opponents, games, map size
+    :return: The key of the evaluation in the cache
+    :rtype: str
+    """
+    return hashlib.sha256(json.dumps([parameters, settings], sort_keys=True).encode()).hexdigest()
+
+
+def play(task):
+    """
+    Play one game.
+
+    :param (str, dict, int, list[str], dict) task: Cache key and parameters of the evaluation the game is for, map
+        seed, opponent commands and the settings
+    :return: The cache key, our rank and our turn times in seconds
+    :rtype: (str, int, list[float])
+    """
+    key, parameters, seed, opponents, settings = task
+    workdir = tempfile.mkdtemp(prefix='tune')
+    try:
+        with open(os.path.join(workdir, 'parameters.json'), 'w') as output:
+            json.dump(parameters, output)
+        ours = '{} {} parameters.json'.format(shlex.quote(sys.executable), shlex.quote(os.path.join(ROOT, 'MyBot.py')))
+        command = shlex.split(settings['engine']) + ['-q', '-d', '{} {}'.format(*settings['size']), '-s', str(seed),
+                                                     ours] + opponents
+        result = subprocess.run(command, cwd=workdir, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                universal_newlines=True, check=True)
+        rank = json.loads(result.stdout)['stats']['0']['rank']
+        times = []
+        with open(os.path.join(workdir, 'data', 'turn_times.csv')) as turn_times:
+            next(turn_times)  # header
+            for line in turn_times:
+                # "turn,time undocked start time:..."; a line without its end was cut short when the bot was killed
+                if line.endswith('\n'):
+                    times.append(float(line.split(',')[1].split()[0]))
+        return key, rank, times
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def load_cache(path):
+    cache = {}
+    if os.path.exists(path):
+        with open(path) as entries:
+            for line in entries:
+                entry = json.loads(line)
+                cache[entry['key']] = entry
+    return cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--engine', required=True, help='command running the Halite engine')
+    parser.add_argument('--samples', type=int, default=20, help='parameter sets tried besides the defaults')
+    parser.add_argument('--games', type=int, default=10, help='games per parameter set')
+    parser.add_argument('--opponent', action='append', help='opponent command, may be repeated to form a pool')
+    parser.add_argument('--players', type=int, default=2, choices=(2, 4))
+    parser.add_argument('--size', type=int, nargs=2, default=(240, 160), metavar=('WIDTH', 'HEIGHT'))
+    parser.add_argument('--p99-limit', type=float, default=1.5, help='largest 99th percentile turn time, seconds')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--cache', default='./data/tune_cache.jsonl')
+    args = parser.parse_args()
+
+    pool = [opponent.format(python=shlex.quote(sys.executable), root=shlex.quote(ROOT))
+            for opponent in args.opponent or ['{python} {root}/oldBot.py']]
+    settings = dict(bot=bot_hash(), engine=args.engine, opponents=pool, players=args.players, games=args.games,
+                    size=args.size, seed=args.seed)
+    rng = random.Random('parameters {}'.format(args.seed))
+    candidates = {cache_key(PARAMETERS, settings): dict(PARAMETERS)}  # key -> parameters, without duplicates
+    for _ in range(args.samples):
+        parameters = {name: rng.choice(values) for name, values in SPACE.items()}
+        candidates.setdefault(cache_key(parameters, settings), parameters)
+    # the same maps and opponents for every parameter set, so that they are compared on equal terms
+    maps = random.Random('maps {}'.format(args.seed))
+    seeds = [maps.randrange(1 << 31) for _ in range(args.games)]
+    opponents = itertools.cycle(pool)
+    games = [(seed, [next(opponents) for _ in range(args.players - 1)]) for seed in seeds]
+
+    cache = load_cache(args.cache)
+    tasks = [(key, parameters, seed, game_opponents, settings)
+             for key, parameters in candidates.items() if key not in cache
+             for seed, game_opponents in games]
+    cached = len(candidates.keys() & cache.keys())
+    print('{} parameter sets, {} cached, {} games to play'.format(len(candidates), cached, len(tasks)))
+
+    results = {}  # key -> (ranks, turn times) of the games played so far
+    os.makedirs(os.path.dirname(os.path.abspath(args.cache)), exist_ok=True)
+    with Pool(args.workers) as workers, open(args.cache, 'a') as output:
+        for key, rank, times in workers.imap_unordered(play, tasks):
+            ranks, turn_times = results.setdefault(key, ([], []))
+            ranks.append(rank)
+            turn_times.extend(times)
+            if len(ranks) == args.games:
+                cache[key] = dict(key=key, parameters=candidates[key], games=len(ranks),
+                                  wins=sum(rank == 1 for rank in ranks), p99=percentile(turn_times, 0.99))
+                output.write(json.dumps(cache[key]) + '\n')
+                output.flush()
+                del results[key]
+
+    evaluations = [cache[key] for key in candidates]
+    evaluations.sort(key=lambda entry: (entry['p99'] <= args.p99_limit, entry['wins']), reverse=True)
+    print('{:>6} {:>8} {:>8}  {}'.format('wins', 'p99 (s)', 'within', 'parameters'))
+    for entry in evaluations:
+        print('{:>3}/{:<2} {:>8.3f} {:>8}  {}'.format(entry['wins'], entry['games'], entry['p99'],
+                                                     'yes' if entry['p99'] <= args.p99_limit else 'no',
+                                                     json.dumps(entry['parameters'], sort_keys=True)))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,7 @@
+import math
+
+import numpy as np
+
 from .entity import Position, Entity
 
 
@@ -38,3 +42,93 @@ def intersect_segment_circle(start, end, circle, *, fudge=0.5):
     closest_distance = Position(closest_x, closest_y).calculate_distance_between(circle)
 
     return closest_distance <= circle.radius + fudge
+
+
+def intersect_segment_circles(start, end, x, y, radius, *, fudge=0.5):
+    """
+    intersect_segment_circle against many circles at once, with the same arithmetic so the results agree exactly.
+
+    :param Entity start: The start of the line segment. (Needs x, y attributes)
+    :param Entity end: The end of the line segment. (Needs x, y attributes)
+    :param numpy.ndarray x: Circle centre x coordinates
+    :param numpy.ndarray y: Circle centre y coordinates
+    :param numpy.ndarray radius: Circle radii
+    :param float fudge: Additional distance to leave between the segment and the circles
+    :return: Whether the segment intersects each circle
+    :rtype: numpy.ndarray
+    """
+    dx = end.x - start.x
+    dy = end.y - start.y
+
+    a = dx**2 + dy**2
+    if a == 0.0:
+        return np.sqrt((start.x - x)**2 + (start.y - y)**2) <= radius + fudge
+    b = -2 * (start.x**2 - start.x*end.x - start.x*x + end.x*x +
+              start.y**2 - start.y*end.y - start.y*y + end.y*y)
+
+    t = np.minimum(-b / (2 * a), 1.0)
+    closest_x = start.x + dx * t
+    closest_y = start.y + dy * t
+    closest_distance = np.sqrt((closest_x - x)**2 + (closest_y - y)**2)
+    return (t >= 0) & (closest_distance <= radius + fudge)
+
+
+def time_of_impact(x, y, vel_x, vel_y, radius, other_x, other_y, other_vel_x, other_vel_y, other_radius):
+    """
+    Earliest time within a turn at which two circles moving in straight lines at constant velocity touch, the way the
+    engine moves ships. Works element-wise on arrays, so one call tests a move against many other trajectories.
+
+    Circles already touching at the start of the turn count as hitting at time 0 only if they are closing in, so a
+    ship can always move away from one it is next to.
+
+    :param x: X coordinate of the first circle at the start of the turn
+    :param y: Y coordinate of the first circle at the start of the turn
+    :param vel_x: X displacement of the first circle over the turn
+    :param vel_y: Y displacement of the first circle over the turn
+    :param radius: Radius of the first circle
+    :param other_x: X coordinate of the second circle at the start of the turn
+    :param other_y: Y coordinate of the second circle at the start of the turn
+    :param other_vel_x: X displacement of the second circle over the turn
+    :param other_vel_y: Y displacement of the second circle over the turn
+    :param other_radius: Radius of the second circle
+    :return: Time of first contact as a fraction of the turn in [0, 1], inf where they do not touch this turn
+    :rtype: numpy.ndarray
+    """
+    dx = np.asarray(other_x, dtype=float) - x
+    dy = np.asarray(other_y, dtype=float) - y
+    dvx = np.asarray(other_vel_x, dtype=float) - vel_x
+    dvy = np.asarray(other_vel_y, dtype=float) - vel_y
+    reach = np.asarray(other_radius, dtype=float) + radius
+
+    # |d + dv * t| = reach
+    a = dvx**2 + dvy**2
+    b = 2 * (dx*dvx + dy*dvy)
+    c = dx**2 + dy**2 - reach**2
+    discriminant = b**2 - 4*a*c
+    with np.errstate(divide='ignore', invalid='ignore'):
+        entry = (-b - np.sqrt(discriminant)) / (2*a)
+    moving_in = (a > 0) & (discriminant >= 0) & (entry >= 0) & (entry <= 1)
+    return np.where(c <= 0, np.where(b < 0, 0.0, np.inf), np.where(moving_in, entry, np.inf))
+
+
+def tangent_headings(start, circle, clearance):
+    """
+    The two whole-degree headings from start which graze circle, inflated by clearance, on either side. Each is
+    rounded away from the circle, so a segment along it never comes within clearance of the circle's edge.
+
+    :param Entity start: Where the segment starts. (Needs x, y attributes)
+    :param Entity circle: The circle to pass. (Needs x, y, radius attributes)
+    :param float clearance: Distance to keep from the circle's edge
+    :return: The counter-clockwise and clockwise tangent headings in degrees, or an empty list if start is within
+        clearance of the circle (no tangent exists)
+    :rtype: list[int]
+    """
+    dx = circle.x - start.x
+    dy = circle.y - start.y
+    distance = math.sqrt(dx**2 + dy**2)
+    radius = circle.radius + clearance
+    if distance <= radius:
+        return []
+    centre = math.degrees(math.atan2(dy, dx))
+    half_width = math.degrees(math.asin(radius / distance))
+    return [int(math.ceil(centre + half_width)) % 360, int(math.floor(centre - half_width)) % 360]
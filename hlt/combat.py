@@ -0,0 +1,109 @@
+import numpy as np
+
+from . import constants
+from .entity import Ship
+
+#: Centre-to-centre distance at which two ships can shoot each other
+ATTACK_RANGE = constants.WEAPON_RADIUS + 2 * constants.SHIP_RADIUS
+
+
+class Skirmish:
+    """
+    The state of a local fight as flat arrays, one entry per ship. Docked, docking and undocking ships take damage
+    but never fire, and ships with a weapon cooldown left do not fire this turn.
+
+    :ivar x: Ship x-coordinates, shape (n,)
+    :ivar y: Ship y-coordinates, shape (n,)
+    :ivar health: Ship health, shape (n,)
+    :ivar owner: Owner player ids, shape (n,)
+    :ivar can_fire: Whether each ship fires this turn, shape (n,)
+    :ivar ships: The ship objects in array order, if built with from_ships
+    """
+
+    def __init__(self, x, y, health, owner, docked, cooldown, ships=None):
+        self.x = np.asarray(x, dtype=np.float32)
+        self.y = np.asarray(y, dtype=np.float32)
+        self.health = np.asarray(health, dtype=np.float32)
+        self.owner = np.asarray(owner, dtype=np.int32)
+        self.can_fire = ~np.asarray(docked, dtype=bool) & (np.asarray(cooldown) <= 0)
+        self.ships = ships
+        # only (attacker, enemy) pairs which can get in range this turn deal damage. The gathers and per-pair sums
+        # are written as products with one-hot matrices so they run as matmuls rather than fancy indexing
+        pairs = self.can_fire[:, None] & (self.owner[:, None] != self.owner[None, :])
+        reach = ATTACK_RANGE + 2 * constants.MAX_SPEED
+        pairs &= (self.x[:, None] - self.x[None, :]) ** 2 + (self.y[:, None] - self.y[None, :]) ** 2 <= reach ** 2
+        attackers, targets = np.nonzero(pairs)
+        self._by_attacker = np.zeros((len(attackers), len(self.x)), dtype=np.float32)
+        self._by_attacker[np.arange(len(attackers)), attackers] = 1
+        self._by_target = np.zeros((len(targets), len(self.x)), dtype=np.float32)
+        self._by_target[np.arange(len(targets)), targets] = 1
+        self._to_attacker = np.ascontiguousarray(self._by_attacker.T)
+        self._difference = self._to_attacker - self._by_target.T
+
+    @classmethod
+    def from_ships(cls, ships):
+        """
+        :param list[entity.Ship] ships: The ships taking part, of any owners
+        :return: The skirmish with ships in the given order
+        :rtype: Skirmish
+        """
+        return cls([ship.x for ship in ships],
+                   [ship.y for ship in ships],
+                   [ship.health for ship in ships],
+                   [ship.owner.id if hasattr(ship.owner, 'id') else ship.owner for ship in ships],
+                   [ship.docking_status != Ship.DockingStatus.UNDOCKED for ship in ships],
+                   [ship._weapon_cooldown for ship in ships],
+                   ships)
+
+    def __len__(self):
+        return len(self.x)
+
+    def simulate(self, dx, dy):
+        """
+        Resolve one turn of combat for a batch of candidate move sets. Every ship that can fire deals WEAPON_DAMAGE,
+        split evenly between all enemy ships within ATTACK_RANGE of its end position. Movement is applied before
+        firing, ships are assumed to stop at their end point (collisions are not resolved).
+
+        :param dx: x displacement of every ship per candidate, shape (m, n) or (n,)
+        :param dy: y displacement of every ship per candidate, shape (m, n) or (n,)
+        :return: Health of every ship after the turn per candidate, shape (m, n); ships at 0 or below are destroyed
+        :rtype: numpy.ndarray
+        """
+        x = self.x + np.atleast_2d(np.asarray(dx, dtype=np.float32))
+        y = self.y + np.atleast_2d(np.asarray(dy, dtype=np.float32))
+        distance = x @ self._difference
+        distance_y = y @ self._difference
+        distance *= distance
+        distance_y *= distance_y
+        distance += distance_y
+        # in_range[m, p] is 1.0 if the attacker of pair p can hit its target in candidate m
+        in_range = np.less_equal(distance, ATTACK_RANGE ** 2, out=distance_y, casting='unsafe')
+        targets = in_range @ self._by_attacker
+        damage = constants.WEAPON_DAMAGE / np.maximum(targets, 1, out=targets)
+        in_range *= damage @ self._to_attacker
+        return self.health - in_range @ self._by_target
+
+    def score(self, health, player_id, kill_bonus=constants.BASE_SHIP_HEALTH):
+        """
+        Value of an outcome for player_id: enemy health removed minus own health lost, with an extra kill_bonus per
+        ship destroyed on either side.
+
+        :param numpy.ndarray health: Result of simulate, shape (m, n)
+        :param int player_id: The player to score for
+        :param float kill_bonus: Value of a destroyed ship on top of its health
+        :return: Score per candidate, shape (m,)
+        :rtype: numpy.ndarray
+        """
+        mine = self.owner == player_id
+        lost = self.health - np.maximum(health, 0)
+        lost += (health <= 0) * np.float32(kill_bonus)
+        return lost[:, ~mine].sum(axis=1) - lost[:, mine].sum(axis=1)
+
+    def best(self, dx, dy, player_id):
+        """
+        :return: Index of the best candidate move set for player_id and its score
+        :rtype: (int, float)
+        """
+        scores = self.score(self.simulate(dx, dy), player_id)
+        index = int(np.argmax(scores))
+        return index, float(scores[index])
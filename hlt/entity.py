@@ -1,10 +1,43 @@
 import math
 
-from . import constants
+from . import collision, constants, motion
 import abc
+from collections import namedtuple
 from enum import Enum
 
 
+class Command(namedtuple('Command', 'kind ship_id magnitude angle planet_id')):
+    """
+    A command for one ship, kept as numbers until Game.send_command_queue turns it into the engine's text format.
+    Commands are immutable tuples, so command sets can be copied cheaply.
+
+    :ivar kind: Command.THRUST, Command.DOCK or Command.UNDOCK
+    :ivar ship_id: The id of the commanded ship
+    :ivar magnitude: The thrust speed (0 unless a thrust)
+    :ivar angle: The thrust angle in degrees (0 unless a thrust)
+    :ivar planet_id: The planet to dock to (None unless a dock)
+    """
+    __slots__ = ()
+
+    THRUST = 't'
+    DOCK = 'd'
+    UNDOCK = 'u'
+
+    def __str__(self):
+        if self.kind == Command.THRUST:
+            return "t {} {} {}".format(self.ship_id, self.magnitude, self.angle)
+        elif self.kind == Command.DOCK:
+            return "d {} {}".format(self.ship_id, self.planet_id)
+        return "u {}".format(self.ship_id)
+
+    def is_thrust(self):
+        """
+        :return: True if the command moves the ship
+        :rtype: bool
+        """
+        return self.kind == Command.THRUST
+
+
 class Entity:
     """
     Then entity abstract base-class represents all game entities possible. As a base all entities possess
@@ -212,9 +245,13 @@ class Ship(Entity):
     :ivar y: The ship y-coordinate.
     :ivar radius: The ship radius.
     :ivar health: The ship's remaining health.
+    :ivar vel_x: The ship's x-velocity.
+    :ivar vel_y: The ship's y-velocity.
     :ivar DockingStatus docking_status: The docking status (UNDOCKED, DOCKED, DOCKING, UNDOCKING)
     :ivar planet: The ID of the planet the ship is docked to, if applicable.
     :ivar owner: The player ID of the owner, if any. If None, Entity is not owned.
+    :ivar action: What the bot decided the ship does this turn ('travel', 'attack', 'stay'), if decided.
+    :ivar target: The entity the ship is heading for this turn, if decided.
     """
 
     class DockingStatus(Enum):
@@ -231,44 +268,71 @@ class Ship(Entity):
         self.owner = player_id
         self.radius = constants.SHIP_RADIUS
         self.health = hp
+        self.vel_x = vel_x
+        self.vel_y = vel_y
         self.previous_health = 0
         self.docking_status = docking_status
         self.planet = planet if (docking_status is not Ship.DockingStatus.UNDOCKED) else None
-        self.action = None
-        self.target = None
+        self._ledger = None
+        self._action = None
+        self._target = None
         self.command = None
         self._docking_progress = progress
         self._weapon_cooldown = cooldown
 
+    @property
+    def action(self):
+        return self._action
+
+    @action.setter
+    def action(self, action):
+        self._replan(action, self._target)
+
+    @property
+    def target(self):
+        return self._target
+
+    @target.setter
+    def target(self, target):
+        self._replan(self._action, target)
+
+    def _replan(self, action, target):
+        if self._ledger is None:
+            self._action, self._target = action, target
+            return
+        before = self._ledger.commitment(self._action, self._target)
+        self._action, self._target = action, target
+        self._ledger.recommit(before, self._ledger.commitment(action, target))
+
     def thrust(self, magnitude, angle):
         """
         Generate a command to accelerate this ship.
 
         :param int magnitude: The speed through which to move the ship
         :param int angle: The angle to move the ship in
-        :return: The command string to be passed to the Halite engine.
-        :rtype: str
+        :return: The command to be passed to the Halite engine.
+        :rtype: Command
         """
-        return "t {} {} {}".format(self.id, int(magnitude), int(angle))
+        return Command(Command.THRUST, self.id, int(magnitude), int(angle), None)
 
     def dock(self, planet):
         """
         Generate a command to dock to a planet.
 
         :param Planet planet: The planet object to dock to
-        :return: The command string to be passed to the Halite engine.
-        :rtype: str
+        :return: The command to be passed to the Halite engine.
+        :rtype: Command
         """
-        return "d {} {}".format(self.id, planet.id)
+        return Command(Command.DOCK, self.id, 0, 0, planet.id)
 
     def undock(self):
         """
         Generate a command to undock from the current planet.
 
         :return: The command trying to be passed to the Halite engine.
-        :rtype: str
+        :rtype: Command
         """
-        return "u {}".format(self.id)
+        return Command(Command.UNDOCK, self.id, 0, 0, None)
 
     def navigate(self, target, game_map, speed, avoid_obstacles=True, max_corrections=90, angular_step=1,
                  ignore_ships=False, ignore_planets=False):
@@ -288,26 +352,77 @@ class Ship(Entity):
         :param int angular_step: The degree difference to deviate if the original destination has obstacles
         :param bool ignore_ships: Whether to ignore ships in calculations (this will make your movement faster, but more precarious)
         :param bool ignore_planets: Whether to ignore planets in calculations (useful if you want to crash onto planets)
-        :return string: The command trying to be passed to the Halite engine or None if movement is not possible within max_corrections degrees.
-        :rtype: str
+        :return Command: The command trying to be passed to the Halite engine or None if movement is not possible within max_corrections degrees.
+        :rtype: Command
         """
         # Assumes a position, not planet (as it would go to the center of the planet otherwise)
         if max_corrections <= 0:
             return None
         distance = self.calculate_distance_between(target)
-        angle = self.calculate_angle_between(target)
+        angle = motion.heading(self.calculate_angle_between(target))
         ignore = () if not (ignore_ships or ignore_planets) \
             else Ship if (ignore_ships and not ignore_planets) \
             else Planet if (ignore_planets and not ignore_ships) \
             else Entity
         if avoid_obstacles and game_map.obstacles_between(self, target, ignore):
-            new_target_dx = math.cos(math.radians(angle + angular_step)) * distance
-            new_target_dy = math.sin(math.radians(angle + angular_step)) * distance
+            new_target_dx, new_target_dy = motion.offset(distance, angle + angular_step)
             new_target = Position(self.x + new_target_dx, self.y + new_target_dy)
             return self.navigate(new_target, game_map, speed, True, max_corrections - 1, angular_step)
         speed = speed if (distance >= speed) else distance
         return self.thrust(speed, angle)
 
+    def navigate_tangent(self, target, game_map, speed, max_checks=8, max_deviation=90, ignore_ships=False,
+                         ignore_planets=False, clearance=0.1):
+        """
+        Move a ship to a specific target position like navigate, but steer around obstacles in closed form. When the
+        straight line is blocked, the headings tangent to the nearest blocking circle (inflated by the ship radius
+        and clearance) are added as candidates, and candidates are tried in order of deviation from the straight
+        line. Planets must be clear along the whole way to the target, ships only along this turn's move. Each try
+        costs one scan of the map's entities, so at most max_checks scans are made instead of one per angular step.
+
+        :param Entity target: The entity to which you will navigate
+        :param game_map.Map game_map: The map of the game, from which obstacles will be extracted
+        :param int speed: The (max) speed to navigate. If the obstacle is nearer, will adjust accordingly.
+        :param int max_checks: The maximum number of headings to test before giving up (and returning None).
+        :param int max_deviation: The maximum number of degrees to deviate from the straight line.
+        :param bool ignore_ships: Whether to ignore ships in calculations (this will make your movement faster, but more precarious)
+        :param bool ignore_planets: Whether to ignore planets in calculations (useful if you want to crash onto planets)
+        :param float clearance: Extra distance kept from obstacles on top of what obstacles_between requires
+        :return Command: The command trying to be passed to the Halite engine or None if no clear heading was found.
+        :rtype: Command
+        """
+        distance = self.calculate_distance_between(target)
+        direct = self.calculate_angle_between(target)
+        move = speed if (distance >= speed) else distance
+        # obstacles_between keeps radius + 0.1 from every obstacle
+        fudge = self.radius + 0.1 + clearance
+
+        def deviation(heading):
+            return abs((heading - direct + 180) % 360 - 180)
+
+        candidates = [motion.heading(direct)]
+        tried = set()
+        for _ in range(max_checks):
+            untried = [heading for heading in candidates if heading not in tried and deviation(heading) <= max_deviation]
+            if not untried:
+                return None
+            heading = min(untried, key=deviation)
+            tried.add(heading)
+            # planets stay put, so the whole path must clear them; ships will have moved by the time we get further
+            # than this turn's move
+            obstacles = []
+            if not ignore_planets:
+                dx, dy = motion.offset(distance, heading)
+                obstacles += game_map.obstacles_between(self, Position(self.x + dx, self.y + dy), Ship)
+            if not ignore_ships:
+                dx, dy = motion.offset(move, heading)
+                obstacles += game_map.obstacles_between(self, Position(self.x + dx, self.y + dy), Planet)
+            if not obstacles:
+                return self.thrust(move, heading)
+            nearest = min(obstacles, key=self.calculate_distance_between)
+            candidates.extend(collision.tangent_headings(self, nearest, fudge))
+        return None
+
     def can_dock(self, planet):
         """
         Determine whether a ship can dock to a planet
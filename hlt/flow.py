@@ -0,0 +1,176 @@
+import math
+
+import numpy as np
+
+from . import constants, symmetry as symmetries
+
+#: Value of a heading or distance grid cell from which the docking ring cannot be reached
+UNREACHABLE = np.iinfo(np.uint16).max
+
+# (row, column) steps of the distance transform. Knight moves on top of the 8 neighbours keep the path length
+# within ~1.5% of the euclidean distance instead of ~8%.
+_STEPS = [(dr, dc) for dr in range(-2, 3) for dc in range(-2, 3)
+          if (dr, dc) != (0, 0) and (abs(dr) < 2 and abs(dc) < 2 or abs(dr) != abs(dc) and 0 not in (dr, dc))]
+
+
+def _shifted(shape, dr, dc):
+    """Source and destination slices for moving a (..., rows, columns) grid by (dr, dc) cells."""
+    rows, columns = shape[-2:]
+    src = (Ellipsis, slice(max(0, -dr), rows - max(0, dr)), slice(max(0, -dc), columns - max(0, dc)))
+    dst = (Ellipsis, slice(max(0, dr), rows - max(0, -dr)), slice(max(0, dc), columns - max(0, -dc)))
+    return src, dst
+
+
+class FlowFields:
+    """
+    For every planet, the path length and first heading from anywhere on the map to the planet's docking ring, going
+    around the other planets. Planets never move, so the fields are computed once, during the initialization window,
+    and every travel move afterwards is a grid lookup.
+
+    The path lengths come from a chamfer distance transform over a coarse grid in which the planets, inflated by the
+    ship radius plus a clearance, are walls. The heading of a cell is the whole-degree heading among `headings` evenly
+    spaced ones whose MAX_SPEED thrust lands on the cell closest to the ring, without the thrust's end or middle
+    point hitting a wall. Both grids are stored as uint16: headings in degrees, distances in tenths of a map unit,
+    UNREACHABLE where there is no path.
+
+    Only planets are obstacles, other ships have to be avoided by the caller.
+
+    Given the map's symmetry, the grids are only computed for one planet of every symmetric set. Lookups for the others
+    go through the transform: the position is mapped onto the representative's side of the map and the heading found
+    there mapped back.
+
+    :ivar cell: Size of a grid cell in map units
+    :ivar rows: Number of grid rows
+    :ivar columns: Number of grid columns
+    :ivar headings: Per representative planet heading grid, shape (planets, rows, columns)
+    :ivar distances: Per representative planet distance grid, shape (planets, rows, columns)
+    """
+
+    def __init__(self, game_map, cell=2, clearance=constants.SHIP_RADIUS + 0.6, headings=72, symmetry=None):
+        """
+        :param game_map.Map game_map: The initial map
+        :param float cell: Size of a grid cell in map units
+        :param float clearance: Distance kept from planet surfaces, on top of the ship radius
+        :param int headings: Number of evenly spaced headings considered per cell
+        :param symmetry.Symmetry symmetry: Symmetry of the planets, every planet gets its own grids if None
+        """
+        self.cell = cell
+        self.width = game_map.width
+        self.height = game_map.height
+        self.rows = int(math.ceil(game_map.height / cell))
+        self.columns = int(math.ceil(game_map.width / cell))
+        obstacles = game_map.all_planets()
+        if symmetry is None:
+            planets = obstacles
+            self._index = {planet.id: (i, symmetries.IDENTITY) for i, planet in enumerate(planets)}
+        else:
+            planets = [game_map.get_planet(planet_id) for planet_id in symmetry.representatives()]
+            rows = {planet.id: i for i, planet in enumerate(planets)}
+            self._index = {}
+            for planet in obstacles:
+                representative, transform = symmetry.representative(planet.id)
+                self._index[planet.id] = (rows[representative], transform)
+
+        centre_y = (np.arange(self.rows) + 0.5) * cell
+        centre_x = (np.arange(self.columns) + 0.5) * cell
+        blocked = np.zeros((self.rows, self.columns), dtype=bool)
+        for planet in obstacles:
+            blocked |= np.hypot(centre_x[None, :] - planet.x, centre_y[:, None] - planet.y) <= planet.radius + clearance
+
+        distance = np.full((len(planets), self.rows, self.columns), np.inf, dtype=np.float32)
+        direct = np.zeros((len(planets), self.rows, self.columns), dtype=np.uint16)
+        for i, planet in enumerate(planets):
+            dx, dy = planet.x - centre_x[None, :], planet.y - centre_y[:, None]
+            to_centre = np.hypot(dx, dy)
+            to_ring = np.maximum(to_centre - planet.radius - constants.DOCK_RADIUS, 0)
+            visible = ~blocked
+            for other in obstacles:
+                if other is not planet:
+                    visible &= ~self._crosses(centre_x[None, :], centre_y[:, None], dx, dy, to_centre, to_ring, other,
+                                              other.radius + clearance)
+            # straight to the ring where nothing is in the way, exact rather than chamfered
+            distance[i][visible] = to_ring[visible]
+            direct[i] = np.round(np.degrees(np.arctan2(dy, dx))).astype(int) % 360
+        straight = np.isfinite(distance)
+
+        distance = self._transform(distance, blocked)
+        self.distances = self._quantize(distance, 10)
+        self.headings = np.where(straight, direct, self._headings(distance, blocked, headings))
+
+    @staticmethod
+    def _crosses(x, y, dx, dy, length, travel, circle, radius):
+        """Whether the segment from (x, y) along the unit vector (dx, dy) / length for travel units hits the circle."""
+        unit_x, unit_y = dx / np.maximum(length, 1e-9), dy / np.maximum(length, 1e-9)
+        along = np.clip((circle.x - x) * unit_x + (circle.y - y) * unit_y, 0, travel)
+        return np.hypot(x + unit_x * along - circle.x, y + unit_y * along - circle.y) <= radius
+
+    def _transform(self, distance, blocked):
+        # relax every step until nothing improves, all planets at once
+        steps = [(_shifted(distance.shape, dr, dc), self.cell * math.hypot(dr, dc)) for dr, dc in _STEPS]
+        while True:
+            previous = distance.copy()
+            for (src, dst), length in steps:
+                np.minimum(distance[dst], distance[src] + np.float32(length), out=distance[dst])
+            distance[:, blocked] = np.inf
+            if np.array_equal(previous, distance):
+                return distance
+
+    def _headings(self, distance, blocked, count):
+        rows = np.arange(self.rows)[:, None]
+        columns = np.arange(self.columns)[None, :]
+        best = np.full(distance.shape, np.inf, dtype=np.float32)
+        heading = np.full(distance.shape, UNREACHABLE, dtype=np.uint16)
+        for angle in np.arange(count) * (360 // count):
+            dx = constants.MAX_SPEED * math.cos(math.radians(angle)) / self.cell
+            dy = constants.MAX_SPEED * math.sin(math.radians(angle)) / self.cell
+            end_row, end_column = np.floor(rows + 0.5 + dy).astype(int), np.floor(columns + 0.5 + dx).astype(int)
+            mid_row, mid_column = np.floor(rows + 0.5 + dy / 2).astype(int), np.floor(columns + 0.5 + dx / 2).astype(int)
+            inside = (end_row >= 0) & (end_row < self.rows) & (end_column >= 0) & (end_column < self.columns)
+            end_row, end_column = np.clip(end_row, 0, self.rows - 1), np.clip(end_column, 0, self.columns - 1)
+            mid_row, mid_column = np.clip(mid_row, 0, self.rows - 1), np.clip(mid_column, 0, self.columns - 1)
+            usable = inside & ~blocked[end_row, end_column] & ~blocked[mid_row, mid_column]
+            reached = np.where(usable, distance[:, end_row, end_column], np.inf)
+            better = reached < best
+            best[better] = reached[better]
+            heading[better] = angle
+        return heading
+
+    @staticmethod
+    def _quantize(distance, scale):
+        return np.where(np.isfinite(distance), np.minimum(np.round(distance * scale), UNREACHABLE - 1),
+                        UNREACHABLE).astype(np.uint16)
+
+    def _lookup(self, planet, entity):
+        index = self._index.get(planet.id)
+        if index is None:
+            return None, None
+        index, transform = index
+        x, y = symmetries.apply(transform, entity.x, entity.y, self.width, self.height)
+        row = min(max(int(y // self.cell), 0), self.rows - 1)
+        column = min(max(int(x // self.cell), 0), self.columns - 1)
+        return (index, row, column), transform
+
+    def heading(self, planet, entity):
+        """
+        :param entity.Planet planet: The planet to go to
+        :param entity.Entity entity: Where to start (needs x, y attributes)
+        :return: Heading in whole degrees of the first MAX_SPEED thrust towards the planet's docking ring, None if the
+            ring cannot be reached from there or the planet is not in the fields
+        :rtype: int
+        """
+        cell, transform = self._lookup(planet, entity)
+        if cell is None or self.headings[cell] == UNREACHABLE:
+            return None
+        return symmetries.apply_heading(transform, int(self.headings[cell]))
+
+    def distance(self, planet, entity):
+        """
+        :param entity.Planet planet: The planet to go to
+        :param entity.Entity entity: Where to start (needs x, y attributes)
+        :return: Length of the path around the planets to the planet's docking ring, inf if there is none
+        :rtype: float
+        """
+        cell, _ = self._lookup(planet, entity)
+        if cell is None or self.distances[cell] == UNREACHABLE:
+            return math.inf
+        return self.distances[cell] / 10
@@ -1,4 +1,6 @@
-from . import collision, entity
+import numpy as np
+
+from . import collision, constants, entity, history, raster
 
 
 class Map:
@@ -8,6 +10,12 @@ class Map:
     :ivar my_id: Current player id associated with the map
     :ivar width: Map width
     :ivar height: Map height
+    :ivar docking: Ledger of docking spots taken or claimed on every planet this turn
+    :ivar history: Recent positions and health of every ship, updated on every parse
+    :ivar snapshot: Shared memory copy of the map rewritten on every parse, if enabled with share_snapshot
+    :ivar planet_raster: Occupancy grid of the planets inflated by the obstacles_between clearance
+    :ivar enemy_x: X coordinates of the enemy ships, in the order of enemy_ships()
+    :ivar enemy_y: Y coordinates of the enemy ships, in the order of enemy_ships()
     """
 
     def __init__(self, my_id, width, height):
@@ -21,6 +29,37 @@ class Map:
         self.height = height
         self._players = {}
         self._planets = {}
+        self.docking = DockingLedger(self._planets)
+        self.history = history.ShipHistory()
+        self.snapshot = None
+        self.planet_raster = None
+        self._ships = []
+        self._ship_x = self._ship_y = self._ship_radius = np.zeros(0)
+        self._build_index()
+
+    def __getstate__(self):
+        # The shared memory block belongs to this process only, copies of the map do not carry it
+        state = self.__dict__.copy()
+        state['snapshot'] = None
+        return state
+
+    def share_snapshot(self, max_ships=5000, max_planets=64, name=None):
+        """
+        Start writing a flat copy of the map into shared memory on every parse, for worker processes to read.
+
+        :param int max_ships: Ship capacity of the shared block
+        :param int max_planets: Planet capacity of the shared block
+        :param str name: Name of the shared block, generated by the OS if None
+        :return: The snapshot; pass snapshot.name to hlt.snapshot.MapSnapshot.attach in the workers
+        :rtype: hlt.snapshot.MapSnapshot
+        """
+        # imported here, shared_memory is only loaded by bots that share the map
+        from .snapshot import MapSnapshot
+        if self.snapshot is None:
+            self.snapshot = MapSnapshot(max_ships, max_planets, name=name)
+            if self._players:
+                self.snapshot.write(self)
+        return self.snapshot
 
     def get_me(self):
         """
@@ -59,6 +98,85 @@ class Map:
         """
         return list(self._planets.values())
 
+    def player_ships(self, player_id, status=None):
+        """
+        Unlike Player.all_ships, no list is built: the ships come from an index made when the map was parsed.
+
+        :param int player_id: The owner
+        :param entity.Ship.DockingStatus status: Only ships in this docking status, all of them if None
+        :return: The ships of the player, read-only
+        :rtype: tuple[entity.Ship]
+        """
+        return self._ships_by_owner.get((player_id, status), ())
+
+    def docked_ships(self, planet):
+        """
+        :param entity.Planet planet: The planet
+        :return: The ships docking, docked or undocking at the planet, as Planet.all_docked_ships but read-only
+        :rtype: tuple[entity.Ship]
+        """
+        return self._docked_by_planet.get(planet.id, ())
+
+    def docking_ships(self, planet):
+        """
+        :param entity.Planet planet: The planet
+        :return: The ships still docking at the planet, read-only
+        :rtype: tuple[entity.Ship]
+        """
+        return self._docking_by_planet.get(planet.id, ())
+
+    def owned_planets(self, player_id):
+        """
+        :param int player_id: The owner
+        :return: The planets owned by the player, read-only
+        :rtype: tuple[entity.Planet]
+        """
+        return self._planets_by_owner.get(player_id, ())
+
+    def enemy_planets(self):
+        """
+        :return: The planets owned by any other player, in map order, read-only
+        :rtype: tuple[entity.Planet]
+        """
+        return self._enemy_planets
+
+    def enemy_ships(self):
+        """
+        :return: The ships of every other player, read-only; their coordinates are in enemy_x and enemy_y
+        :rtype: tuple[entity.Ship]
+        """
+        return self._enemy_ships
+
+    def _build_index(self):
+        """
+        Group the ships and planets of the frame once, so that the views above cost a dict lookup.
+
+        :return: nothing
+        """
+        by_owner = {}
+        docking = {}
+        for ship in self._ships:
+            owner = ship.owner.id
+            by_owner.setdefault((owner, None), []).append(ship)
+            by_owner.setdefault((owner, ship.docking_status), []).append(ship)
+            if ship.docking_status == entity.Ship.DockingStatus.DOCKING and ship.planet is not None:
+                docking.setdefault(ship.planet.id, []).append(ship)
+        planets_by_owner = {}
+        for planet in self._planets.values():
+            if planet.owner is not None:
+                planets_by_owner.setdefault(planet.owner.id, []).append(planet)
+
+        self._ships_by_owner = {key: tuple(ships) for key, ships in by_owner.items()}
+        self._docking_by_planet = {planet_id: tuple(ships) for planet_id, ships in docking.items()}
+        self._docked_by_planet = {planet.id: tuple(planet._docked_ships.values())
+                                  for planet in self._planets.values() if planet._docked_ships}
+        self._planets_by_owner = {owner: tuple(planets) for owner, planets in planets_by_owner.items()}
+        self._enemy_planets = tuple(planet for planet in self._planets.values()
+                                    if planet.owner is not None and planet.owner.id != self.my_id)
+        self._enemy_ships = tuple(ship for ship in self._ships if ship.owner.id != self.my_id)
+        self.enemy_x = np.array([ship.x for ship in self._enemy_ships])
+        self.enemy_y = np.array([ship.y for ship in self._enemy_ships])
+
     def nearby_entities_by_distance(self, entity):
         """
         :param entity: The source entity to find distances from
@@ -94,7 +212,23 @@ class Map:
         self._planets, tokens = entity.Planet._parse(tokens)
 
         assert(len(tokens) == 0)  # There should be no remaining tokens at this point
+        self._ships = [ship for player in self._players.values() for ship in player._ships.values()]
         self._link()
+        if self.planet_raster is None:
+            self.planet_raster = raster.PlanetRaster(self.width, self.height, self.all_planets(),
+                                                     clearance=constants.SHIP_RADIUS + 0.1)
+        elif len(self.planet_raster) != len(self._planets):
+            self.planet_raster.rebuild(self.all_planets())
+        self._build_index()
+        self._ship_x = np.array([ship.x for ship in self._ships])
+        self._ship_y = np.array([ship.y for ship in self._ships])
+        self._ship_radius = np.array([ship.radius for ship in self._ships])
+        self.docking = DockingLedger(self._planets)
+        for ship in self.player_ships(self.my_id):
+            ship._ledger = self.docking
+        self.history.record(self._ships)
+        if self.snapshot is not None:
+            self.snapshot.write(self)
 
     def _all_ships(self):
         """
@@ -103,10 +237,7 @@ class Map:
         :return: List of ships
         :rtype: List[Ship]
         """
-        all_ships = []
-        for player in self.all_players():
-            all_ships.extend(player.all_ships())
-        return all_ships
+        return list(self._ships)
 
     def _intersects_entity(self, target):
         """
@@ -135,16 +266,96 @@ class Map:
         :rtype: list[entity.Entity]
         """
         obstacles = []
-        entities = ([] if issubclass(entity.Planet, ignore) else self.all_planets()) \
-            + ([] if issubclass(entity.Ship, ignore) else self._all_ships())
-        for foreign_entity in entities:
-            if foreign_entity == ship:
-                continue
-            if collision.intersect_segment_circle(ship, target, foreign_entity, fudge=ship.radius + 0.1):
-                obstacles.append(foreign_entity)
+        fudge = ship.radius + 0.1
+        # planets only need the exact test if the segment touches their cells of the raster
+        if not issubclass(entity.Planet, ignore) and not (
+                fudge <= self.planet_raster.clearance
+                and self.planet_raster.segment_clear(ship, target, max_lines=len(self._planets))):
+            for planet in self.all_planets():
+                if collision.intersect_segment_circle(ship, target, planet, fudge=fudge):
+                    obstacles.append(planet)
+        if not issubclass(entity.Ship, ignore):
+            hits = collision.intersect_segment_circles(ship, target, self._ship_x, self._ship_y, self._ship_radius,
+                                                      fudge=fudge)
+            obstacles.extend(foreign_entity for foreign_entity in (self._ships[i] for i in np.flatnonzero(hits))
+                             if foreign_entity != ship)
         return obstacles
 
 
+class DockingLedger:
+    """
+    Per planet counts of the docking spots in use and of my ships committed to a planet this turn, kept up to date
+    as the bot sets ship.target and ship.action. A ship is committed to a planet while its target is that planet and
+    its action is anything but 'attack'.
+    """
+    def __init__(self, planets):
+        """
+        :param dict[int, entity.Planet] planets: The planets of the current frame, keyed by id
+        """
+        self._planets = planets
+        self._docked = {}
+        self._docking = {}
+        self._committed = {}
+        for planet in planets.values():
+            self._docked[planet.id] = len(planet._docked_ship_ids)
+            self._docking[planet.id] = 0
+            self._committed[planet.id] = 0
+            for ship in planet.all_docked_ships():
+                if ship is not None and ship.docking_status == entity.Ship.DockingStatus.DOCKING:
+                    self._docking[planet.id] += 1
+
+    @staticmethod
+    def commitment(action, target):
+        """
+        :return: The id of the planet a ship with this action and target is committed to, or None
+        :rtype: int
+        """
+        if action != 'attack' and isinstance(target, entity.Planet):
+            return target.id
+        return None
+
+    def recommit(self, before, after):
+        """
+        Move one ship's commitment from planet id before to planet id after (either may be None).
+
+        :return: nothing
+        """
+        if before == after:
+            return
+        if before in self._committed:
+            self._committed[before] -= 1
+        if after in self._committed:
+            self._committed[after] += 1
+
+    def docked(self, planet):
+        """
+        :return: Number of ships docked or docking on the planet, as reported by the engine
+        :rtype: int
+        """
+        return self._docked.get(planet.id, 0)
+
+    def docking(self, planet):
+        """
+        :return: Number of ships still in the process of docking on the planet
+        :rtype: int
+        """
+        return self._docking.get(planet.id, 0)
+
+    def committed(self, planet):
+        """
+        :return: Number of my ships committed to the planet this turn
+        :rtype: int
+        """
+        return self._committed.get(planet.id, 0)
+
+    def has_space(self, planet):
+        """
+        :return: True if the planet has a docking spot neither in use nor claimed by one of my ships this turn
+        :rtype: bool
+        """
+        return self.docked(planet) + self.committed(planet) < planet.num_docking_spots
+
+
 class Player:
     """
     :ivar id: The player's unique id
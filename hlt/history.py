@@ -0,0 +1,239 @@
+import os
+from collections import deque
+
+import numpy as np
+
+from . import constants, entity
+
+#: Layout of one command in a command log (14 bytes). planet_id is -1 unless the command is a dock.
+COMMAND_LOG_DTYPE = np.dtype([
+    ('turn', '<u4'),
+    ('kind', 'S1'),
+    ('ship_id', '<i4'),
+    ('magnitude', 'u1'),
+    ('angle', '<u2'),
+    ('planet_id', '<i2'),
+])
+
+
+class ShipHistory:
+    """
+    Positions, velocities and health of every ship over the last few turns, kept in fixed-size ring buffers. Each
+    live ship owns one row of the buffers; the row is recycled once the ship disappears from the map.
+
+    The engine applies full drag at the end of every turn, so the velocities it reports are always ~0. Movement is
+    therefore estimated from the change in position between frames.
+
+    :ivar depth: Number of turns remembered per ship
+    :ivar capacity: Number of ships which can be tracked at once
+    :ivar turn: Number of frames recorded so far
+    """
+
+    def __init__(self, depth=5, capacity=8192):
+        """
+        :param int depth: Number of turns remembered per ship
+        :param int capacity: Number of ships which can be tracked at once
+        """
+        self.depth = depth
+        self.capacity = capacity
+        self.turn = 0
+        self.x = np.zeros((capacity, depth))
+        self.y = np.zeros((capacity, depth))
+        self.vel_x = np.zeros((capacity, depth))
+        self.vel_y = np.zeros((capacity, depth))
+        self.health = np.zeros((capacity, depth), dtype=np.int32)
+        self.seen = np.zeros(capacity, dtype=np.int32)  # number of frames recorded for the ship in the row
+        self.last_turn = np.zeros(capacity, dtype=np.int32)  # last frame the ship in the row was seen in
+        self._rows = {}  # (owner id, ship id) -> row
+        self._free = list(range(capacity - 1, -1, -1))
+
+    @staticmethod
+    def _key(ship):
+        # owner is a Player once the map is linked, a player id before that
+        return getattr(ship.owner, 'id', ship.owner), ship.id
+
+    def row(self, ship):
+        """
+        :param entity.Ship ship: The ship to look up
+        :return: The buffer row of the ship, or None if it was never recorded
+        :rtype: int
+        """
+        return self._rows.get(self._key(ship))
+
+    def record(self, ships):
+        """
+        Append the current frame. Ships not present any more are forgotten and their rows reused. Also sets
+        previous_health on every ship seen in the last frame.
+
+        :param list[entity.Ship] ships: Every ship on the map
+        :return: nothing
+        """
+        self.turn += 1
+        rows = np.empty(len(ships), dtype=np.intp)
+        for i, ship in enumerate(ships):
+            key = self._key(ship)
+            row = self._rows.get(key)
+            if row is None:
+                if not self._free:
+                    raise ValueError("More than {} ships alive, increase the ShipHistory capacity"
+                                     .format(self.capacity))
+                row = self._rows[key] = self._free.pop()
+                self.seen[row] = 0
+            rows[i] = row
+
+        column = self.turn % self.depth
+        previous = (self.turn - 1) % self.depth
+        self.x[rows, column] = [ship.x for ship in ships]
+        self.y[rows, column] = [ship.y for ship in ships]
+        self.vel_x[rows, column] = [ship.vel_x for ship in ships]
+        self.vel_y[rows, column] = [ship.vel_y for ship in ships]
+        self.health[rows, column] = [ship.health for ship in ships]
+        previous_health = np.where(self.seen[rows] > 0, self.health[rows, previous], 0)
+        self.seen[rows] += 1
+        self.last_turn[rows] = self.turn
+
+        for ship, health in zip(ships, previous_health.tolist()):
+            ship.previous_health = health
+
+        for key, row in list(self._rows.items()):
+            if self.last_turn[row] != self.turn:
+                del self._rows[key]
+                self._free.append(row)
+
+    def displacement(self, rows, turns=1):
+        """
+        Average movement per turn over the last `turns` turns (fewer if the ship is younger).
+
+        :param numpy.ndarray rows: Buffer rows of the ships
+        :param int turns: Number of past turns to average over, at most depth - 1
+        :return: x and y displacement per turn
+        :rtype: (numpy.ndarray, numpy.ndarray)
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        span = np.minimum(self.seen[rows] - 1, min(turns, self.depth - 1))
+        current = self.turn % self.depth
+        past = (self.turn - span) % self.depth
+        divisor = np.maximum(span, 1)
+        dx = (self.x[rows, current] - self.x[rows, past]) / divisor
+        dy = (self.y[rows, current] - self.y[rows, past]) / divisor
+        return dx, dy
+
+    def predict(self, rows, turns_ahead=1, smoothing=1):
+        """
+        Linear prediction of ship positions, assuming each ship keeps its recent average displacement. The
+        per-turn displacement is capped at MAX_SPEED.
+
+        :param numpy.ndarray rows: Buffer rows of the ships
+        :param int turns_ahead: How many turns into the future to predict
+        :param int smoothing: Number of past turns to average the displacement over
+        :return: Predicted x and y coordinates
+        :rtype: (numpy.ndarray, numpy.ndarray)
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        dx, dy = self.displacement(rows, smoothing)
+        speed = np.hypot(dx, dy)
+        scale = np.where(speed > constants.MAX_SPEED, constants.MAX_SPEED / np.maximum(speed, 1e-9), 1.0)
+        current = self.turn % self.depth
+        return (self.x[rows, current] + dx * scale * turns_ahead,
+                self.y[rows, current] + dy * scale * turns_ahead)
+
+    def predicted_position(self, ship, turns_ahead=1, smoothing=1):
+        """
+        :param entity.Ship ship: The ship to predict
+        :param int turns_ahead: How many turns into the future to predict
+        :param int smoothing: Number of past turns to average the displacement over
+        :return: The predicted position, or the current one if the ship has no history
+        :rtype: entity.Position
+        """
+        row = self.row(ship)
+        if row is None:
+            return entity.Position(ship.x, ship.y)
+        x, y = self.predict([row], turns_ahead, smoothing)
+        return entity.Position(float(x[0]), float(y[0]))
+
+
+class CommandHistory:
+    """
+    The command lists of the last few turns, keyed by turn number like a dict. Older turns are dropped, so memory
+    stays flat however long the game runs. If a log path is given, every committed turn is also appended to a
+    binary file of COMMAND_LOG_DTYPE records for post-game analysis (see read_log).
+
+    :ivar depth: Number of turns kept in memory
+    """
+
+    def __init__(self, depth=10, log_path=None):
+        """
+        :param int depth: Number of turns kept in memory
+        :param str log_path: File the full history is streamed to, None to keep no log
+        """
+        self.depth = depth
+        self._turns = deque(maxlen=depth)
+        self._log = open(log_path, 'wb') if log_path else None
+
+    def __setitem__(self, turn, commands):
+        if self._turns and self._turns[-1][0] == turn:
+            self._turns[-1] = (turn, commands)
+        else:
+            self._turns.append((turn, commands))
+
+    def __getitem__(self, turn):
+        for recorded_turn, commands in reversed(self._turns):
+            if recorded_turn == turn:
+                return commands
+        raise KeyError(turn)
+
+    def __contains__(self, turn):
+        return any(recorded_turn == turn for recorded_turn, _ in self._turns)
+
+    def __len__(self):
+        return len(self._turns)
+
+    def commit(self, turn):
+        """
+        Append the commands of a finished turn to the log, if there is one.
+
+        :param int turn: The turn to write
+        :return: nothing
+        """
+        if self._log is None:
+            return
+        commands = self[turn]
+        records = np.empty(len(commands), dtype=COMMAND_LOG_DTYPE)
+        records['turn'] = turn
+        records['kind'] = [command.kind for command in commands]
+        records['ship_id'] = [command.ship_id for command in commands]
+        records['magnitude'] = [command.magnitude for command in commands]
+        records['angle'] = [command.angle for command in commands]
+        records['planet_id'] = [-1 if command.planet_id is None else command.planet_id for command in commands]
+        self._log.write(records.tobytes())
+        self._log.flush()
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    @staticmethod
+    def read_log(log_path):
+        """
+        :param str log_path: A log written by CommandHistory, complete or cut short by the bot being killed
+        :return: All completely logged commands as a read-only memory-mapped record array, an empty array if there
+            are none
+        :rtype: numpy.ndarray
+        """
+        records = os.path.getsize(log_path) // COMMAND_LOG_DTYPE.itemsize
+        if not records:
+            # memory maps cannot be empty, e.g. the log of a game that ended before its first turn
+            return np.zeros(0, dtype=COMMAND_LOG_DTYPE)
+        return np.memmap(log_path, dtype=COMMAND_LOG_DTYPE, mode='r', shape=(records,))
+
+    @staticmethod
+    def to_commands(records):
+        """
+        :param numpy.ndarray records: Records from read_log
+        :return: The records as Command objects
+        :rtype: list[entity.Command]
+        """
+        return [entity.Command(record['kind'].decode(), int(record['ship_id']), int(record['magnitude']),
+                               int(record['angle']), None if record['planet_id'] < 0 else int(record['planet_id']))
+                for record in records]
@@ -0,0 +1,129 @@
+import math
+
+import numpy as np
+
+from . import constants
+from .entity import Ship
+
+
+class InfluenceMap:
+    """
+    Coarse grids of friendly and enemy strength over the whole map. Every undocked ship spreads its strength
+    (health / BASE_SHIP_HEALTH) evenly over a disk of radius MAX_SPEED + WEAPON_RADIUS, the area it can shoot into
+    next turn, so the enemy grid at a point is roughly the number of enemy ships able to hit it. Docked ships have no
+    weapons and add nothing.
+
+    The grids are rebuilt by FFT convolution. When only a few ships changed cell or health since the last update,
+    the kernel is stamped out of the old cells and into the new ones instead.
+
+    :ivar cell: Size of a grid cell in map units
+    :ivar radius: Radius of the influence of a ship in map units
+    :ivar friendly: Grid of the strength of my undocked ships, indexed [row, column]
+    :ivar enemy: Grid of the strength of all enemy undocked ships, indexed [row, column]
+    """
+
+    def __init__(self, width, height, cell=2, radius=constants.MAX_SPEED + constants.WEAPON_RADIUS,
+                 incremental_limit=None):
+        """
+        :param int width: Map width
+        :param int height: Map height
+        :param float cell: Size of a grid cell in map units
+        :param float radius: Radius of the influence of a ship in map units
+        :param int incremental_limit: Most changed ships updated by stamping rather than a full rebuild, estimated
+            from the relative cost of the two if None
+        """
+        self.cell = cell
+        self.radius = radius
+        self.rows = int(math.ceil(height / cell))
+        self.columns = int(math.ceil(width / cell))
+        reach = int(math.ceil(radius / cell))
+        offsets = np.arange(-reach, reach + 1)
+        self._kernel = ((offsets[:, None] ** 2 + offsets[None, :] ** 2) * cell ** 2 <= radius ** 2).astype(np.float64)
+        self._reach = reach
+        self._fft_shape = (self.rows + 2 * reach, self.columns + 2 * reach)
+        self._kernel_fft = np.fft.rfft2(self._kernel, self._fft_shape)
+        if incremental_limit is None:
+            # a stamp touches one kernel area, a rebuild costs about two passes over the padded grid per side
+            incremental_limit = max(1, 2 * self._fft_shape[0] * self._fft_shape[1] // self._kernel.size)
+        self.incremental_limit = incremental_limit
+        self.friendly = np.zeros((self.rows, self.columns))
+        self.enemy = np.zeros((self.rows, self.columns))
+        self._sources = {}  # (owner id, ship id) -> (row, column, strength, is friendly)
+        self.rebuilds = 0
+        self.stamps = 0
+
+    def _cell_of(self, x, y):
+        return (min(max(int(y // self.cell), 0), self.rows - 1),
+                min(max(int(x // self.cell), 0), self.columns - 1))
+
+    def update(self, game_map):
+        """
+        Bring the grids up to date with the ships of the current frame.
+
+        :param game_map.Map game_map: The parsed map
+        :return: nothing
+        """
+        sources = {}
+        for player in game_map.all_players():
+            friendly = player.id == game_map.my_id
+            for ship in game_map.player_ships(player.id, Ship.DockingStatus.UNDOCKED):
+                row, column = self._cell_of(ship.x, ship.y)
+                sources[(player.id, ship.id)] = (row, column, ship.health / constants.BASE_SHIP_HEALTH, friendly)
+
+        removed = [source for key, source in self._sources.items() if sources.get(key) != source]
+        added = [source for key, source in sources.items() if self._sources.get(key) != source]
+        self._sources = sources
+        if len(removed) + len(added) > self.incremental_limit:
+            self._rebuild()
+        else:
+            for row, column, strength, friendly in removed:
+                self._stamp(row, column, -strength, friendly)
+            for row, column, strength, friendly in added:
+                self._stamp(row, column, strength, friendly)
+
+    def _rebuild(self):
+        self.rebuilds += 1
+        for friendly, grid in ((True, self.friendly), (False, self.enemy)):
+            strength = np.zeros(self._fft_shape)
+            for row, column, ship_strength, is_friendly in self._sources.values():
+                if is_friendly == friendly:
+                    strength[row, column] += ship_strength
+            spread = np.fft.irfft2(np.fft.rfft2(strength) * self._kernel_fft, self._fft_shape)
+            # the kernel is centred at (reach, reach), so the unpadded grid starts there
+            grid[:] = spread[self._reach:self._reach + self.rows, self._reach:self._reach + self.columns]
+            # clear the round-off left in cells out of reach of any ship
+            grid[np.abs(grid) < 1e-9] = 0
+
+    def _stamp(self, row, column, strength, friendly):
+        self.stamps += 1
+        grid = self.friendly if friendly else self.enemy
+        reach = self._reach
+        top, bottom = max(row - reach, 0), min(row + reach + 1, self.rows)
+        left, right = max(column - reach, 0), min(column + reach + 1, self.columns)
+        grid[top:bottom, left:right] += strength * self._kernel[top - row + reach:bottom - row + reach,
+                                                                left - column + reach:right - column + reach]
+
+    def threat(self, entity):
+        """
+        :param entity.Entity entity: Where to read the grid (needs x, y attributes)
+        :return: Strength of the enemy ships able to shoot at that point next turn
+        :rtype: float
+        """
+        return self.enemy[self._cell_of(entity.x, entity.y)]
+
+    def support(self, entity):
+        """
+        :param entity.Entity entity: Where to read the grid (needs x, y attributes)
+        :return: Strength of my undocked ships able to shoot at that point next turn
+        :rtype: float
+        """
+        return self.friendly[self._cell_of(entity.x, entity.y)]
+
+    def balance(self, entity):
+        """
+        :param entity.Entity entity: Where to read the grid (needs x, y attributes)
+        :return: support minus threat at that point
+        :rtype: float
+        """
+        cell = self._cell_of(entity.x, entity.y)
+        return self.friendly[cell] - self.enemy[cell]
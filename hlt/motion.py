@@ -0,0 +1,68 @@
+"""
+Every move a ship can make in one turn. The engine truncates thrust magnitude and angle to integers, so the unit
+vectors of the 360 whole-degree headings, computed once at import, give the displacement of any thrust; they are
+indexed instead of calling cos/sin during the turn.
+"""
+
+import numpy as np
+
+from . import entity
+
+ANGLES = 360
+
+_radians = np.radians(np.arange(ANGLES))
+
+#: UNIT[angle] is the unit vector (cos, sin) of a heading in whole degrees
+UNIT = np.stack([np.cos(_radians), np.sin(_radians)], axis=-1)
+
+# plain list copies, indexing a list is much cheaper than indexing numpy for a single value
+_COS = UNIT[:, 0].tolist()
+_SIN = UNIT[:, 1].tolist()
+
+
+def heading(angle):
+    """
+    :param float angle: An angle in degrees
+    :return: The whole-degree heading the engine would use for a thrust at this angle
+    :rtype: int
+    """
+    return int(angle) % ANGLES
+
+
+def displacement(speed, angle):
+    """
+    Displacement of a thrust, truncated to whole units and degrees as the engine does.
+
+    :param int speed: Thrust magnitude
+    :param int angle: Thrust angle in degrees
+    :return: (dx, dy)
+    :rtype: (float, float)
+    """
+    angle = int(angle) % ANGLES
+    speed = int(speed)
+    return speed * _COS[angle], speed * _SIN[angle]
+
+
+def offset(distance, angle):
+    """
+    A point at any distance along a whole-degree heading, e.g. a target rotated by a navigation correction.
+
+    :param float distance: Distance from the origin
+    :param int angle: Heading in degrees
+    :return: (dx, dy)
+    :rtype: (float, float)
+    """
+    angle = int(angle) % ANGLES
+    return distance * _COS[angle], distance * _SIN[angle]
+
+
+def endpoint(origin, speed, angle):
+    """
+    :param entity.Entity origin: Where the thrust starts
+    :param int speed: Thrust magnitude
+    :param int angle: Thrust angle in degrees
+    :return: Where the thrust ends
+    :rtype: entity.Position
+    """
+    dx, dy = displacement(speed, angle)
+    return entity.Position(origin.x + dx, origin.y + dy)
@@ -1,14 +1,30 @@
 import sys
+import atexit
+import gzip
 import logging
+import logging.handlers
+import queue
 import copy
+import zlib
 
 from . import game_map
 
 
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    A QueueHandler which leaves the message formatting to the listener thread. The stock handler formats in the
+    calling thread, which is the cost we want out of the turn. Log arguments must therefore not be mutated after
+    the logging call.
+    """
+    def prepare(self, record):
+        return record
+
+
 class Game:
     """
     :ivar map: Current map representation
     :ivar initial_map: The initial version of the map before game starts
+    :ivar capture: File every line read from the engine is copied to, if capturing
     """
     @staticmethod
     def _send_string(s):
@@ -38,23 +54,91 @@ class Game:
 
         :return: The input read from the Halite engine
         :rtype: str
+        :raises EOFError: If the engine closed the input
+        """
+        result = sys.stdin.readline()
+        if not result:
+            raise EOFError("The Halite engine closed the input")
+        return result.rstrip('\n')
+
+    def _read(self):
+        """
+        Read a line from the game, copying it to the capture file if there is one.
+
+        :return: The input read from the Halite engine
+        :rtype: str
+        """
+        line = self._get_string()
+        if self.capture is not None:
+            # every line is a gzip member of its own, written straight to the OS: a bot killed mid-game leaves at
+            # most the member being written incomplete, and nothing waits on a sync flush
+            self.capture.write(gzip.compress(line.encode() + b'\n', compresslevel=1))
+        return line
+
+    @staticmethod
+    def read_capture(path):
+        """
+        :param str path: A file written in capture mode, complete or cut short by the bot being killed
+        :return: The captured engine lines: player tag, map size, then one line per frame, up to the last complete one
+        :rtype: list[str]
         """
-        result = sys.stdin.readline().rstrip('\n')
-        return result
+        with open(path, 'rb') as capture:
+            data = capture.read()
+        text = []
+        while data:
+            member = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            try:
+                text.append(member.decompress(data))
+            except zlib.error:
+                break
+            if not member.eof:
+                break
+            data = member.unused_data
+        # the last piece is empty after a complete line, else the part of a line the capture was cut short in
+        return b''.join(text).decode().split('\n')[:-1]
 
     @staticmethod
     def send_command_queue(command_queue):
         """
-        Issue the given list of commands.
+        Issue the given list of commands. This is the only place commands are turned into text.
 
-        :param list[str] command_queue: List of commands to send the Halite engine
+        :param list[entity.Command] command_queue: List of commands to send the Halite engine
         :return: nothing
         """
-        for command in command_queue:
-            Game._send_string(command)
-
+        Game._send_string(''.join(str(command) for command in command_queue))
         Game._done_sending()
 
+    @staticmethod
+    def set_up_logging(filename, level=logging.DEBUG, asynchronous=False, filemode='w'):
+        """
+        Send the root logger to a file, unless it is already configured. In asynchronous mode log calls only put
+        the record on a queue; a background thread formats and writes it. Records below level are dropped before
+        their message is formatted in both modes.
+
+        :param str filename: The log file
+        :param int level: The lowest level written
+        :param bool asynchronous: Whether to write from a background thread
+        :param str filemode: Mode the log file is opened with
+        :return: The running listener in asynchronous mode, else None
+        :rtype: logging.handlers.QueueListener
+        """
+        root = logging.getLogger()
+        if root.handlers:
+            return None
+        if not asynchronous:
+            logging.basicConfig(filename=filename, level=level, filemode=filemode)
+            return None
+        records = queue.SimpleQueue()
+        file_handler = logging.FileHandler(filename, mode=filemode)
+        file_handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+        listener = logging.handlers.QueueListener(records, file_handler)
+        root.addHandler(_DeferredQueueHandler(records))
+        root.setLevel(level)
+        listener.start()
+        # write out whatever is still queued when the engine closes the game
+        atexit.register(listener.stop)
+        return listener
+
     @staticmethod
     def _set_up_logging(tag, name):
         """
@@ -65,23 +149,35 @@ class Game:
         :return: nothing
         """
         log_file = "{}_{}.log".format(tag, name)
-        logging.basicConfig(filename=log_file, level=logging.DEBUG, filemode='w')
-        logging.info("Initialized bot {}".format(name))
+        Game.set_up_logging(log_file)
+        logging.info("Initialized bot %s", name)
 
-    def __init__(self, name):
+    def __init__(self, name, prepare=None, capture=None):
         """
-        Initialize the bot with the given name.
+        Initialize the bot with the given name. The engine sends the initial map along with the player tag and
+        only starts the game once the name is sent back, so prepare runs inside the initialization time limit
+        rather than the first turn's.
+
+        In capture mode every line read from the engine is appended, gzip compressed, to a file, so the game can be
+        fed to the bot again offline (see read_capture), even if the bot was killed.
 
         :param name: The name of the bot.
+        :param prepare: Called with this Game once the initial map is parsed, before the name is sent
+        :param str capture: File to append the engine's input to, None to not capture
         """
-        tag = int(self._get_string())
+        self.capture = open(capture, 'ab', buffering=0) if capture else None
+        if self.capture is not None:
+            atexit.register(self.capture.close)
+        tag = int(self._read())
         Game._set_up_logging(tag, name)
-        width, height = [int(x) for x in self._get_string().strip().split()]
-        self._send_string(name)
-        self._done_sending()
+        width, height = [int(x) for x in self._read().strip().split()]
         self.map = game_map.Map(tag, width, height)
         self.update_map()
         self.initial_map = copy.deepcopy(self.map)
+        if prepare is not None:
+            prepare(self)
+        self._send_string(name)
+        self._done_sending()
 
     def update_map(self):
         """
@@ -92,5 +188,5 @@ class Game:
         """
         import logging
         logging.info("---NEW TURN---")
-        self.map._parse(self._get_string())
+        self.map._parse(self._read())
         return self.map
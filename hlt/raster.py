@@ -0,0 +1,121 @@
+import math
+
+import numpy as np
+
+
+class PlanetRaster:
+    """
+    Bit-packed occupancy grid of the planets, each inflated by a clearance. A cell is set if any point of it is within
+    radius + clearance of a planet centre, so a segment that only crosses clear cells cannot come within clearance of
+    any planet; only segments touching a set cell need the exact per planet test.
+
+    Every row of the grid is packed into one int, bit i standing for column i, and so is every column. A segment is
+    checked one row (or column, whichever there are fewer of along it) at a time by masking the span of cells it
+    crosses in that row, so the cost grows with the segment's length, not with the number of planets.
+
+    Planets do not move, so the grid is built once and rebuilt only when planets are destroyed.
+
+    :ivar cell: Size of a grid cell in map units
+    :ivar clearance: Distance added to every planet radius
+    :ivar planet_ids: Ids of the planets in the grid
+    """
+
+    def __init__(self, width, height, planets, clearance, cell=1):
+        """
+        :param int width: Map width
+        :param int height: Map height
+        :param list[entity.Planet] planets: The planets to rasterize
+        :param float clearance: Distance added to every planet radius
+        :param float cell: Size of a grid cell in map units
+        """
+        self.cell = cell
+        self.clearance = clearance
+        self.rows = int(math.ceil(height / cell))
+        self.columns = int(math.ceil(width / cell))
+        self.planet_ids = set()
+        self._row_bits = self._column_bits = []
+        self.rebuild(planets)
+
+    def __len__(self):
+        return len(self.planet_ids)
+
+    @staticmethod
+    def _pack(lines):
+        return [int.from_bytes(np.packbits(line, bitorder='little').tobytes(), 'little') for line in lines]
+
+    def rebuild(self, planets):
+        """
+        Rasterize the planets again, e.g. after some were destroyed.
+
+        :param list[entity.Planet] planets: The planets still on the map
+        :return: nothing
+        """
+        occupied = np.zeros((self.rows, self.columns), dtype=bool)
+        for planet in planets:
+            reach = planet.radius + self.clearance
+            top = max(int((planet.y - reach) // self.cell), 0)
+            bottom = min(int((planet.y + reach) // self.cell) + 1, self.rows)
+            left = max(int((planet.x - reach) // self.cell), 0)
+            right = min(int((planet.x + reach) // self.cell) + 1, self.columns)
+            # distance from the centre to the nearest point of every cell in the planet's bounding box
+            cell_y = np.arange(top, bottom) * self.cell
+            cell_x = np.arange(left, right) * self.cell
+            gap_y = np.maximum(np.maximum(cell_y - planet.y, planet.y - cell_y - self.cell), 0)
+            gap_x = np.maximum(np.maximum(cell_x - planet.x, planet.x - cell_x - self.cell), 0)
+            # a hair of slack so that round-off never clears a cell the exact test would hit
+            occupied[top:bottom, left:right] |= gap_y[:, None] ** 2 + gap_x[None, :] ** 2 <= (reach + 1e-6) ** 2
+        self._row_bits = self._pack(occupied)
+        self._column_bits = self._pack(occupied.T)
+        self.planet_ids = {planet.id for planet in planets}
+
+    def occupied(self, x, y):
+        """
+        :param float x: Map x coordinate
+        :param float y: Map y coordinate
+        :return: Whether the cell containing the point is set
+        :rtype: bool
+        """
+        row = min(max(int(y // self.cell), 0), self.rows - 1)
+        column = min(max(int(x // self.cell), 0), self.columns - 1)
+        return bool(self._row_bits[row] >> column & 1)
+
+    def segment_clear(self, start, end, max_lines=None):
+        """
+        :param entity.Entity start: Start of the segment (needs x, y attributes)
+        :param entity.Entity end: End of the segment (needs x, y attributes)
+        :param int max_lines: Give up, returning False, if the segment spans more rows and columns than this, e.g.
+            when testing the planets one by one is cheaper
+        :return: True if the segment certainly keeps clear of every planet, False if it may not
+        :rtype: bool
+        """
+        x0, y0 = start.x / self.cell, start.y / self.cell
+        x1, y1 = end.x / self.cell, end.y / self.cell
+        if max_lines is not None and min(abs(x1 - x0), abs(y1 - y0)) >= max_lines:
+            return False
+        if abs(x1 - x0) >= abs(y1 - y0):
+            return self._spans_clear(x0, y0, x1, y1, self._row_bits, self.columns)
+        return self._spans_clear(y0, x0, y1, x1, self._column_bits, self.rows)
+
+    @staticmethod
+    def _spans_clear(u0, v0, u1, v1, lines, length):
+        """
+        Check the cells crossed by the segment (u0, v0) - (u1, v1), one line of constant v at a time. Points off the
+        grid count as the nearest cell on its edge; being closer to every planet, that cell is set if they are near one.
+        """
+        if v0 > v1:
+            u0, v0, u1, v1 = u1, v1, u0, v0
+        last_line = len(lines) - 1
+        first = min(max(int(math.floor(v0)), 0), last_line)
+        last = min(max(int(math.floor(v1)), 0), last_line)
+        slope = (u1 - u0) / (v1 - v0) if v1 != v0 else 0
+        for v in range(first, last + 1):
+            # the part of the segment within this line, the lines on the grid's edge extending off it
+            enter = u0 if v == first else u0 + slope * (v - v0)
+            leave = u1 if v == last else u0 + slope * (v + 1 - v0)
+            if enter > leave:
+                enter, leave = leave, enter
+            low = int(enter) if 0 < enter < length else (0 if enter <= 0 else length - 1)
+            high = int(leave) if 0 < leave < length else (0 if leave <= 0 else length - 1)
+            if lines[v] >> low & ((1 << (high - low + 1)) - 1):
+                return False
+        return True
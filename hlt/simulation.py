@@ -0,0 +1,324 @@
+import numpy as np
+
+from . import constants
+from .combat import ATTACK_RANGE
+from .entity import Ship
+
+#: Production a planet accumulates before it spawns a ship
+SHIP_COST = 72
+
+_UNDOCKED, _DOCKING, _DOCKED, _UNDOCKING = (status.value for status in Ship.DockingStatus)
+
+
+def _first_contact(dx, dy, vx, vy, radius):
+    """
+    Time in [0, 1] at which two moving circles first come within radius of each other, inf if they do not, for
+    arrays of pairs given by the offset (dx, dy) and velocity (vx, vy) of the second relative to the first. Pairs
+    already in contact count only if they are closing, as in collision.time_of_impact.
+    """
+    a = vx * vx + vy * vy
+    b = 2 * (dx * vx + dy * vy)
+    c = dx * dx + dy * dy - radius * radius
+    discriminant = b * b - 4 * a * c
+    with np.errstate(divide='ignore', invalid='ignore'):
+        time = (-b - np.sqrt(np.maximum(discriminant, 0))) / (2 * a)
+    hit = (a > 0) & (discriminant >= 0) & (time >= 0) & (time <= 1)
+    time = np.where(hit, time, np.inf)
+    return np.where((c <= 0) & (b < 0), 0, time)
+
+
+class BatchedGames:
+    """
+    Many Halite II games stepped in lockstep, the state of all of them held in arrays padded to the same number of
+    ship slots and planets, so that a turn of every game is a few array operations whatever the number of games.
+
+    A turn applies the commands (undocking, then docking in slot order, a planet taking no more ships than its
+    docking spots and no ships at all if players contest it while unowned), moves the ships, resolves collisions,
+    then combat, docking progress and production. It follows the engine's rules with a few simplifications:
+
+    - collisions are found from every ship's straight path over the turn: a ship hitting a planet is destroyed and
+      damages it by its health, ships hitting each other damage each other by their health, ships leaving the map
+      are destroyed
+    - combat happens at the end positions: every undocked ship with no weapon cooldown deals WEAPON_DAMAGE, split
+      evenly between the enemy ships within ATTACK_RANGE (the same model as combat.Skirmish)
+    - a destroyed planet takes the ships docked to it along but does not explode
+    - production ignores the planets' remaining resources; a planet spawns a ship every SHIP_COST units, towards the
+      centre of the map, if its game has a free slot
+
+    Bots are functions bot(games, player_id) returning commands for every slot as (speed, angle, dock, undock)
+    arrays shaped (games, slots); play only applies them to the player's ships. They read the state straight from
+    the arrays below.
+
+    :ivar turn: Number of turns played
+    :ivar width: Map width per game, shape (games,)
+    :ivar height: Map height per game, shape (games,)
+    :ivar alive: Whether each slot holds a ship, shape (games, slots), like all ship arrays
+    :ivar owner: Owner player ids, -1 for slots never used
+    :ivar x: Ship x-coordinates
+    :ivar y: Ship y-coordinates
+    :ivar health: Ship health
+    :ivar status: Docking status values
+    :ivar planet: Index of the planet a docking, docked or undocking ship is attached to, -1 if none
+    :ivar progress: Turns of docking or undocking left
+    :ivar cooldown: Turns of weapon cooldown left
+    :ivar planet_alive: Whether each planet index holds a planet, shape (games, planets), like all planet arrays
+    :ivar planet_owner: Owner player ids, -1 if unowned
+    :ivar planet_x: Planet x-coordinates
+    :ivar planet_y: Planet y-coordinates
+    :ivar planet_radius: Planet radii
+    :ivar planet_health: Planet health
+    :ivar planet_spots: Number of docking spots
+    :ivar production: Production accumulated towards the next ship
+    """
+
+    def __init__(self, games, slots, planets):
+        """
+        An empty batch, to be filled through the arrays (see from_maps).
+
+        :param int games: Number of games
+        :param int slots: Number of ship slots per game, the most ships a game can hold at once
+        :param int planets: Number of planets of the game with the most
+        """
+        self.turn = 0
+        self.width = np.zeros(games, dtype=np.float32)
+        self.height = np.zeros(games, dtype=np.float32)
+        self.alive = np.zeros((games, slots), dtype=bool)
+        self.owner = np.full((games, slots), -1, dtype=np.int8)
+        self.x = np.zeros((games, slots), dtype=np.float32)
+        self.y = np.zeros((games, slots), dtype=np.float32)
+        self.health = np.zeros((games, slots), dtype=np.float32)
+        self.status = np.zeros((games, slots), dtype=np.int8)
+        self.planet = np.full((games, slots), -1, dtype=np.int16)
+        self.progress = np.zeros((games, slots), dtype=np.int8)
+        self.cooldown = np.zeros((games, slots), dtype=np.int8)
+        self.planet_alive = np.zeros((games, planets), dtype=bool)
+        self.planet_owner = np.full((games, planets), -1, dtype=np.int8)
+        self.planet_x = np.zeros((games, planets), dtype=np.float32)
+        self.planet_y = np.zeros((games, planets), dtype=np.float32)
+        self.planet_radius = np.zeros((games, planets), dtype=np.float32)
+        self.planet_health = np.zeros((games, planets), dtype=np.float32)
+        self.planet_spots = np.zeros((games, planets), dtype=np.int16)
+        self.production = np.zeros((games, planets), dtype=np.float32)
+        self._games = np.arange(games)[:, None]
+
+    @classmethod
+    def from_maps(cls, maps, slots):
+        """
+        :param list[game_map.Map] maps: Parsed maps to start the games from, one per game
+        :param int slots: Number of ship slots per game, at least the number of ships of every map
+        :return: The batch
+        :rtype: BatchedGames
+        """
+        games = cls(len(maps), slots, max(len(game_map.all_planets()) for game_map in maps))
+        for g, game_map in enumerate(maps):
+            games.width[g], games.height[g] = game_map.width, game_map.height
+            planets = game_map.all_planets()
+            index = {planet.id: p for p, planet in enumerate(planets)}
+            for p, planet in enumerate(planets):
+                games.planet_alive[g, p] = True
+                games.planet_owner[g, p] = -1 if planet.owner is None else planet.owner.id
+                games.planet_x[g, p], games.planet_y[g, p] = planet.x, planet.y
+                games.planet_radius[g, p] = planet.radius
+                games.planet_health[g, p] = planet.health
+                games.planet_spots[g, p] = planet.num_docking_spots
+                games.production[g, p] = planet.current_production
+            ships = game_map._all_ships()
+            if len(ships) > slots:
+                raise ValueError("Map {} has {} ships, more than {} slots".format(g, len(ships), slots))
+            for s, ship in enumerate(ships):
+                games.alive[g, s] = True
+                games.owner[g, s] = ship.owner.id
+                games.x[g, s], games.y[g, s] = ship.x, ship.y
+                games.health[g, s] = ship.health
+                games.status[g, s] = ship.docking_status.value
+                games.planet[g, s] = -1 if ship.planet is None else index[ship.planet.id]
+                games.progress[g, s] = ship._docking_progress
+                games.cooldown[g, s] = ship._weapon_cooldown
+        return games
+
+    def __len__(self):
+        return len(self.alive)
+
+    def commands(self):
+        """
+        :return: Commands leaving every ship as it is: speed, angle in degrees, planet index to dock to (-1 for
+            none) and whether to undock, each shaped (games, slots)
+        :rtype: (numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray)
+        """
+        shape = self.alive.shape
+        return (np.zeros(shape, dtype=np.float32), np.zeros(shape, dtype=np.float32), np.full(shape, -1, dtype=np.int16),
+                np.zeros(shape, dtype=bool))
+
+    def ship_counts(self, num_players):
+        """
+        :param int num_players: Number of players
+        :return: Ships of every player per game, shape (games, players)
+        :rtype: numpy.ndarray
+        """
+        owners = np.where(self.alive, self.owner, num_players)
+        return np.stack([(owners == player_id).sum(axis=1) for player_id in range(num_players)], axis=1)
+
+    def play(self, bots, turns):
+        """
+        Let the bots command their ships for a number of turns.
+
+        :param dict[int, callable] bots: The bot of every player, by player id
+        :param int turns: Number of turns
+        :return: nothing
+        """
+        for _ in range(turns):
+            commands = self.commands()
+            for player_id, bot in bots.items():
+                mine = self.owner == player_id
+                for command, value in zip(commands, bot(self, player_id)):
+                    np.copyto(command, value, where=mine, casting='unsafe')
+            self.step(*commands)
+
+    def attached(self, status=None):
+        """
+        :param Ship.DockingStatus status: Count only ships in this docking status, all attached ones if None
+        :return: Number of ships docking, docked or undocking at every planet, shape (games, planets)
+        :rtype: numpy.ndarray
+        """
+        attached = self.alive & (self.planet >= 0)
+        if status is not None:
+            attached &= self.status == status.value
+        counts = np.zeros(self.planet_alive.shape, dtype=np.int16)
+        games, slots = np.nonzero(attached)
+        np.add.at(counts, (games, self.planet[games, slots]), 1)
+        return counts
+
+    def step(self, speed, angle, dock, undock):
+        """
+        Play one turn of every game.
+
+        :param numpy.ndarray speed: Thrust magnitude of every ship, shape (games, slots), capped at MAX_SPEED
+        :param numpy.ndarray angle: Thrust angle in degrees
+        :param numpy.ndarray dock: Index of the planet every ship should dock to, -1 for none
+        :param numpy.ndarray undock: Whether every docked ship should undock
+        :return: nothing
+        """
+        games = self._games
+        alive = self.alive
+        np.maximum(self.cooldown - 1, 0, out=self.cooldown)
+
+        undocking = alive & undock & (self.status == _DOCKED)
+        self.status[undocking] = _UNDOCKING
+        self.progress[undocking] = constants.DOCK_TURNS
+
+        self._dock(alive & (self.status == _UNDOCKED) & (dock >= 0), dock)
+
+        # movement and collisions along the straight paths
+        moving = alive & (self.status == _UNDOCKED)
+        speed = np.where(moving, np.minimum(speed, constants.MAX_SPEED), 0).astype(np.float32)
+        radians = np.radians(angle, dtype=np.float32)
+        vx, vy = speed * np.cos(radians), speed * np.sin(radians)
+
+        planet_time = _first_contact(self.planet_x[:, None, :] - self.x[:, :, None],
+                                     self.planet_y[:, None, :] - self.y[:, :, None],
+                                     -vx[:, :, None], -vy[:, :, None],
+                                     self.planet_radius[:, None, :] + constants.SHIP_RADIUS)
+        planet_time = np.where(self.planet_alive[:, None, :], planet_time, np.inf)
+        hit_planet = planet_time.argmin(axis=2)
+        planet_time = planet_time.min(axis=2)
+        planet_time[~alive] = np.inf
+
+        ship_time = _first_contact(self.x[:, None, :] - self.x[:, :, None], self.y[:, None, :] - self.y[:, :, None],
+                                   vx[:, None, :] - vx[:, :, None], vy[:, None, :] - vy[:, :, None],
+                                   2 * constants.SHIP_RADIUS)
+        # a pair collides unless one of them hit a planet first
+        collides = alive[:, :, None] & alive[:, None, :] & ~np.eye(alive.shape[1], dtype=bool)
+        collides &= np.isfinite(ship_time) & (ship_time <= np.minimum(planet_time[:, :, None], planet_time[:, None, :]))
+        crashed = np.isfinite(planet_time) & ~collides.any(axis=2)
+        slots = np.nonzero(crashed)
+        np.subtract.at(self.planet_health, (slots[0], hit_planet[slots]), self.health[slots])
+        damage = np.matmul(collides.astype(np.float32), self.health[:, :, None])[:, :, 0]
+        self.health -= damage
+        self.health[crashed] = 0
+
+        self.x += vx
+        self.y += vy
+        off_map = (self.x < 0) | (self.y < 0) | (self.x >= self.width[:, None]) | (self.y >= self.height[:, None])
+        self.health[off_map] = 0
+        alive &= self.health > 0
+
+        self._fight(alive)
+        alive &= self.health > 0
+
+        # destroyed planets take their docked ships along
+        self.planet_alive &= self.planet_health > 0
+        attached = self.planet >= 0
+        alive &= ~(attached & ~self.planet_alive[games, np.maximum(self.planet, 0)])
+
+        self.progress[alive & (self.status != _UNDOCKED) & (self.progress > 0)] -= 1
+        done = alive & (self.progress == 0)
+        self.status[done & (self.status == _DOCKING)] = _DOCKED
+        undocked = done & (self.status == _UNDOCKING)
+        self.status[undocked] = _UNDOCKED
+        self.planet[undocked | ~alive] = -1
+        self.planet_owner[(self.attached() == 0) | ~self.planet_alive] = -1
+
+        self.production += constants.BASE_PRODUCTIVITY * self.attached(Ship.DockingStatus.DOCKED)
+        self._spawn()
+        self.turn += 1
+
+    def _dock(self, docking, dock):
+        games = self._games
+        target = np.where(docking, dock, 0)
+        distance = np.hypot(self.x - self.planet_x[games, target], self.y - self.planet_y[games, target])
+        owner = self.planet_owner[games, target]
+        docking &= self.planet_alive[games, target] & ((owner == -1) | (owner == self.owner))
+        docking &= distance <= self.planet_radius[games, target] + constants.DOCK_RADIUS
+
+        # per (game, ship, planet): the ship docks there; every planet takes ships in slot order while it has spots
+        onto = docking[:, :, None] & (target[:, :, None] == np.arange(self.planet_alive.shape[1]))
+        rank = (np.cumsum(onto, axis=1) * onto).sum(axis=2)
+        docking &= self.attached()[games, target] + rank <= self.planet_spots[games, target]
+        # players docking to the same unowned planet in the same turn keep each other off it
+        owners = np.where(onto, self.owner[:, :, None], np.iinfo(np.int8).max).min(axis=1)
+        contested = (np.where(onto, self.owner[:, :, None], -1).max(axis=1) != owners) & (self.planet_owner == -1)
+        docking &= ~contested[games, target]
+
+        self.status[docking] = _DOCKING
+        self.progress[docking] = constants.DOCK_TURNS
+        self.planet[docking] = target[docking]
+        games, slots = np.nonzero(docking)
+        self.planet_owner[games, target[games, slots]] = self.owner[games, slots]
+
+    def _fight(self, alive):
+        dx = self.x[:, :, None] - self.x[:, None, :]
+        dy = self.y[:, :, None] - self.y[:, None, :]
+        attackers = alive & (self.status == _UNDOCKED) & (self.cooldown == 0)
+        # pairs[g, i, j]: ship i shoots ship j
+        pairs = attackers[:, :, None] & alive[:, None, :] & (self.owner[:, :, None] != self.owner[:, None, :])
+        pairs &= dx * dx + dy * dy <= ATTACK_RANGE ** 2
+        targets = pairs.sum(axis=2)
+        share = np.float32(constants.WEAPON_DAMAGE) / np.maximum(targets, 1)
+        self.health -= np.matmul(share[:, None, :], pairs.astype(np.float32))[:, 0, :]
+        self.cooldown[targets > 0] = constants.WEAPON_COOLDOWN
+
+    def _spawn(self):
+        ready = self.planet_alive & (self.planet_owner >= 0) & (self.production >= SHIP_COST)
+        for p in range(ready.shape[1]):
+            # the first free slot of every game with a ship to spawn at this planet
+            slot = np.argmin(self.alive, axis=1)
+            games = np.nonzero(ready[:, p] & ~self.alive[np.arange(len(self.alive)), slot])[0]
+            if not len(games):
+                continue
+            slot = slot[games]
+            dx = self.width[games] / 2 - self.planet_x[games, p]
+            dy = self.height[games] / 2 - self.planet_y[games, p]
+            length = np.hypot(dx, dy)
+            centred = length == 0
+            dx, dy, length = np.where(centred, 1, dx), np.where(centred, 0, dy), np.where(centred, 1, length)
+            reach = self.planet_radius[games, p] + constants.SPAWN_RADIUS
+            self.alive[games, slot] = True
+            self.owner[games, slot] = self.planet_owner[games, p]
+            self.x[games, slot] = self.planet_x[games, p] + dx / length * reach
+            self.y[games, slot] = self.planet_y[games, p] + dy / length * reach
+            self.health[games, slot] = constants.BASE_SHIP_HEALTH
+            self.status[games, slot] = _UNDOCKED
+            self.planet[games, slot] = -1
+            self.progress[games, slot] = 0
+            self.cooldown[games, slot] = 0
+            self.production[games, p] -= SHIP_COST
@@ -0,0 +1,240 @@
+import numpy as np
+from multiprocessing import shared_memory
+from time import sleep
+
+from . import entity
+
+#: Layout of one ship record. docking_status holds the Ship.DockingStatus value, planet is -1 when undocked.
+SHIP_DTYPE = np.dtype([
+    ('id', '<i4'),
+    ('owner', '<i4'),
+    ('x', '<f8'),
+    ('y', '<f8'),
+    ('vel_x', '<f8'),
+    ('vel_y', '<f8'),
+    ('health', '<i4'),
+    ('docking_status', '<i4'),
+    ('planet', '<i4'),
+    ('progress', '<i4'),
+    ('cooldown', '<i4'),
+], align=True)
+
+#: Layout of one planet record. owner is -1 when the planet is unowned.
+PLANET_DTYPE = np.dtype([
+    ('id', '<i4'),
+    ('owner', '<i4'),
+    ('x', '<f8'),
+    ('y', '<f8'),
+    ('radius', '<f8'),
+    ('health', '<i4'),
+    ('num_docking_spots', '<i4'),
+    ('current_production', '<i4'),
+    ('remaining_resources', '<i4'),
+    ('num_docked_ships', '<i4'),
+], align=True)
+
+#: Layout of the block header. sequence is odd while a frame is being written and grows by 2 with every frame, so
+#: readers can detect both a write in progress and a new frame.
+HEADER_DTYPE = np.dtype([
+    ('sequence', '<i8'),
+    ('my_id', '<i4'),
+    ('width', '<i4'),
+    ('height', '<i4'),
+    ('num_ships', '<i4'),
+    ('num_planets', '<i4'),
+    ('max_ships', '<i4'),
+    ('max_planets', '<i4'),
+], align=True)
+
+
+def _block_size(max_ships, max_planets):
+    return HEADER_DTYPE.itemsize + SHIP_DTYPE.itemsize * max_ships + PLANET_DTYPE.itemsize * max_planets
+
+
+class MapSnapshot:
+    """
+    A flat, fixed-layout copy of a Map living in a multiprocessing.shared_memory block. The block holds a header
+    followed by max_ships ship records and max_planets planet records, so workers can attach by name and read the
+    current frame as numpy structured arrays without unpickling any Player/Ship/Planet objects.
+
+    The writer does not wait for readers: the header's sequence counter is a seqlock, made odd before a frame is copied
+    in and even again after. read() retries until it copies a frame during which the counter stayed even and unchanged;
+    the ships and planets views are zero-copy but may change under the reader.
+
+    :ivar name: The name of the shared memory block (pass it to MapSnapshot.attach in a worker)
+    :ivar max_ships: Number of ship records the block can hold
+    :ivar max_planets: Number of planet records the block can hold
+    """
+
+    def __init__(self, max_ships=5000, max_planets=64, name=None, _create=True):
+        """
+        :param int max_ships: Ship capacity of the block
+        :param int max_planets: Planet capacity of the block
+        :param str name: Name of the block, generated by the OS if None
+        """
+        if _create:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=_block_size(max_ships, max_planets))
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+        self._owner = _create
+        self._map_views(max_ships, max_planets)
+        if _create:
+            self._header[:] = 0
+            self._header['max_ships'] = max_ships
+            self._header['max_planets'] = max_planets
+
+    def _map_views(self, max_ships, max_planets):
+        buf = self._shm.buf
+        self._header = np.ndarray((1,), dtype=HEADER_DTYPE, buffer=buf, offset=0)
+        offset = HEADER_DTYPE.itemsize
+        self._ships = np.ndarray((max_ships,), dtype=SHIP_DTYPE, buffer=buf, offset=offset)
+        offset += SHIP_DTYPE.itemsize * max_ships
+        self._planets = np.ndarray((max_planets,), dtype=PLANET_DTYPE, buffer=buf, offset=offset)
+        self.name = self._shm.name
+        self.max_ships = max_ships
+        self.max_planets = max_planets
+
+    @classmethod
+    def attach(cls, name):
+        """
+        Attach to a block created by another process. The arrays returned are read-only views onto the block.
+
+        :param str name: The name of the block
+        :return: The attached snapshot
+        :rtype: MapSnapshot
+        """
+        shm = shared_memory.SharedMemory(name=name)
+        header = np.ndarray((1,), dtype=HEADER_DTYPE, buffer=shm.buf)
+        max_ships, max_planets = int(header['max_ships'][0]), int(header['max_planets'][0])
+        del header
+        shm.close()
+        snapshot = cls(max_ships, max_planets, name=name, _create=False)
+        snapshot._header.flags.writeable = False
+        snapshot._ships.flags.writeable = False
+        snapshot._planets.flags.writeable = False
+        return snapshot
+
+    def _sequence(self):
+        return int(self._header['sequence'][0])
+
+    @property
+    def generation(self):
+        """
+        :return: The number of frames written so far
+        :rtype: int
+        """
+        return self._sequence() // 2
+
+    def read(self):
+        """
+        Copy the current frame, retrying while the writer is copying a new one in.
+
+        :return: The generation of the frame and copies of its ship and planet records
+        :rtype: (int, numpy.ndarray, numpy.ndarray)
+        """
+        while True:
+            sequence = self._sequence()
+            if sequence % 2:
+                sleep(0)
+                continue
+            header = self._header[0].copy()
+            ships = self._ships[:min(int(header['num_ships']), self.max_ships)].copy()
+            planets = self._planets[:min(int(header['num_planets']), self.max_planets)].copy()
+            if self._sequence() == sequence:
+                return sequence // 2, ships, planets
+
+    @property
+    def my_id(self):
+        return int(self._header['my_id'][0])
+
+    @property
+    def width(self):
+        return int(self._header['width'][0])
+
+    @property
+    def height(self):
+        return int(self._header['height'][0])
+
+    @property
+    def ships(self):
+        """
+        :return: View of the ship records of the current frame, not guarded against a concurrent write (see read)
+        :rtype: numpy.ndarray
+        """
+        return self._ships[:int(self._header['num_ships'][0])]
+
+    @property
+    def planets(self):
+        """
+        :return: View of the planet records of the current frame, not guarded against a concurrent write (see read)
+        :rtype: numpy.ndarray
+        """
+        return self._planets[:int(self._header['num_planets'][0])]
+
+    def write(self, game_map):
+        """
+        Copy the current state of the map into the block, the sequence counter odd for the duration of the copy.
+
+        :param game_map.Map game_map: A parsed and linked map
+        :return: nothing
+        """
+        ships = []
+        for player in game_map.all_players():
+            for ship in player.all_ships():
+                ships.append((ship.id, player.id, ship.x, ship.y, ship.vel_x, ship.vel_y, ship.health,
+                              ship.docking_status.value, ship.planet.id if ship.planet is not None else -1,
+                              ship._docking_progress, ship._weapon_cooldown))
+        planets = []
+        for planet in game_map.all_planets():
+            planets.append((planet.id, planet.owner.id if planet.owner is not None else -1,
+                            planet.x, planet.y, planet.radius, planet.health, planet.num_docking_spots,
+                            planet.current_production, planet.remaining_resources, len(planet._docked_ship_ids)))
+
+        if len(ships) > self.max_ships or len(planets) > self.max_planets:
+            raise ValueError("Map has {} ships and {} planets, snapshot holds at most {} and {}".format(
+                len(ships), len(planets), self.max_ships, self.max_planets))
+
+        header = self._header[0]
+        header['sequence'] += 1
+        self._ships[:len(ships)] = ships
+        self._planets[:len(planets)] = planets
+        header['my_id'] = game_map.my_id
+        header['width'] = game_map.width
+        header['height'] = game_map.height
+        header['num_ships'] = len(ships)
+        header['num_planets'] = len(planets)
+        header['sequence'] += 1
+
+    def ships_of(self, player_id):
+        """
+        :param int player_id: The owner to filter on
+        :return: Copy of the ship records owned by player_id
+        :rtype: numpy.ndarray
+        """
+        _, ships, _ = self.read()
+        return ships[ships['owner'] == player_id]
+
+    def undocked(self):
+        """
+        :return: Copy of the ship records which are undocked
+        :rtype: numpy.ndarray
+        """
+        _, ships, _ = self.read()
+        return ships[ships['docking_status'] == entity.Ship.DockingStatus.UNDOCKED.value]
+
+    def close(self):
+        """
+        Release this process' views onto the block. The creator also unlinks the block.
+
+        :return: nothing
+        """
+        del self._header, self._ships, self._planets
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
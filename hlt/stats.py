@@ -0,0 +1,80 @@
+import numpy as np
+
+from . import constants
+from .entity import Ship
+
+
+class TurnStats:
+    """
+    Whole-map figures derived once per turn from the parsed map: ship counts by owner and docking status, planets
+    owned and production per player. The bot updates the counts with set_status as it issues dock and undock commands,
+    so they describe the map as it will be once the turn's commands are applied.
+
+    :ivar player_ids: Ids of the players, in the order of the rows of the arrays below
+    :ivar ships: Ship counts, shape (players, 4), indexed [player, docking status value]
+    :ivar planets: Number of planets owned by each player
+    :ivar production: Units of production each player gains per turn, BASE_PRODUCTIVITY per docked ship
+    """
+
+    def __init__(self, game_map):
+        """
+        :param game_map.Map game_map: The parsed map
+        """
+        self.my_id = game_map.my_id
+        self.player_ids = sorted(player.id for player in game_map.all_players())
+        self._index = {player_id: i for i, player_id in enumerate(self.player_ids)}
+        self._status = {}  # (owner id, ship id) -> docking status value, of the ships changed this turn
+
+        ships = game_map._ships
+        owners = np.fromiter((self._index[ship.owner.id] for ship in ships), dtype=np.intp, count=len(ships))
+        statuses = np.fromiter((ship.docking_status.value for ship in ships), dtype=np.intp, count=len(ships))
+        self.ships = np.zeros((len(self.player_ids), len(Ship.DockingStatus)), dtype=np.int64)
+        np.add.at(self.ships, (owners, statuses), 1)
+
+        planets = game_map.all_planets()
+        owned = [self._index[planet.owner.id] for planet in planets if planet.owner is not None]
+        self.planets = np.bincount(owned, minlength=len(self.player_ids))
+        self.num_planets = len(planets)
+        self.production = self.ships[:, Ship.DockingStatus.DOCKED.value] * constants.BASE_PRODUCTIVITY
+
+    def ship_count(self, player_id, status=None):
+        """
+        :param int player_id: The player
+        :param Ship.DockingStatus status: Count only ships in this docking status, all of them if None
+        :return: The number of ships of the player
+        :rtype: int
+        """
+        counts = self.ships[self._index[player_id]]
+        return int(counts.sum() if status is None else counts[status.value])
+
+    def ship_share(self, player_id):
+        """
+        :param int player_id: The player
+        :return: Fraction of all ships on the map owned by the player
+        :rtype: float
+        """
+        total = self.ships.sum()
+        return self.ships[self._index[player_id]].sum() / total if total else 0.0
+
+    def strength(self, player_id):
+        """
+        :param int player_id: The player
+        :return: Fraction of the planets owned by the player
+        :rtype: float
+        """
+        return self.planets[self._index[player_id]] / self.num_planets if self.num_planets else 0.0
+
+    def set_status(self, ship, status):
+        """
+        Move a ship to another docking status in the counts, e.g. when ordering it to dock or undock.
+
+        :param Ship ship: The ship
+        :param Ship.DockingStatus status: Its new status
+        :return: nothing
+        """
+        key = (ship.owner.id, ship.id)
+        row = self._index[ship.owner.id]
+        self.ships[row, self._status.get(key, ship.docking_status.value)] -= 1
+        self.ships[row, status.value] += 1
+        self._status[key] = status.value
+        self.production[row] = self.ships[row, Ship.DockingStatus.DOCKED.value] * constants.BASE_PRODUCTIVITY
@@ -0,0 +1,110 @@
+"""
+Symmetries of the map. Halite II maps are generated symmetric between the players' starting positions: two player
+maps are rotated by 180 degrees around the centre, four player maps are mirrored across both centre lines. Static
+tables only need computing for one planet of every set of symmetric planets, the others are looked up through the
+transform.
+
+A transform is a pair of flags (flip_x, flip_y): flip_x mirrors across the vertical centre line, flip_y across the
+horizontal one, both is the 180 degree rotation. Each transform is its own inverse.
+"""
+
+import math
+
+IDENTITY = (False, False)
+TRANSFORMS = ((True, False), (False, True), (True, True))
+
+
+def apply(transform, x, y, width, height):
+    """
+    :param (bool, bool) transform: The transform
+    :param float x: X coordinate
+    :param float y: Y coordinate
+    :param int width: Map width
+    :param int height: Map height
+    :return: The transformed point
+    :rtype: (float, float)
+    """
+    flip_x, flip_y = transform
+    return (width - x if flip_x else x), (height - y if flip_y else y)
+
+
+def apply_heading(transform, angle):
+    """
+    :param (bool, bool) transform: The transform
+    :param int angle: A heading in degrees
+    :return: The transformed heading in degrees, in [0, 360)
+    :rtype: int
+    """
+    flip_x, flip_y = transform
+    if flip_x:
+        angle = 180 - angle
+    if flip_y:
+        angle = -angle
+    return angle % 360
+
+
+class Symmetry:
+    """
+    The transforms mapping the planets of a map onto themselves, and for every planet the representative planet of
+    its orbit with the transform taking the representative to it.
+
+    :ivar transforms: Transforms under which the planets are symmetric, not including the identity
+    """
+
+    def __init__(self, planets, width, height, tolerance=1e-3):
+        """
+        :param list[entity.Planet] planets: The planets of the initial map
+        :param int width: Map width
+        :param int height: Map height
+        :param float tolerance: Largest difference in position or radius still counted as the same planet
+        """
+        self.width = width
+        self.height = height
+        self.transforms = []
+        images = {}  # transform -> {planet id: id of its image}
+        for transform in TRANSFORMS:
+            image = self._match(planets, transform, tolerance)
+            if image is not None:
+                self.transforms.append(transform)
+                images[transform] = image
+
+        # the first planet of every orbit, in map order, stands for the whole orbit
+        self._representative = {}  # planet id -> (representative id, transform from the representative)
+        for planet in planets:
+            if planet.id in self._representative:
+                continue
+            self._representative[planet.id] = (planet.id, IDENTITY)
+            for transform in self.transforms:
+                self._representative.setdefault(images[transform][planet.id], (planet.id, transform))
+
+    def _match(self, planets, transform, tolerance):
+        image = {}
+        for planet in planets:
+            x, y = apply(transform, planet.x, planet.y, self.width, self.height)
+            match = next((other for other in planets
+                          if math.hypot(other.x - x, other.y - y) <= tolerance
+                          and abs(other.radius - planet.radius) <= tolerance), None)
+            if match is None:
+                return None
+            image[planet.id] = match.id
+        return image
+
+    def __len__(self):
+        """The order of the symmetry group, 1 for an asymmetric map."""
+        return len(self.transforms) + 1
+
+    def representative(self, planet_id):
+        """
+        :param int planet_id: A planet
+        :return: The id of the planet standing for its orbit, and the transform taking that planet to this one
+        :rtype: (int, (bool, bool))
+        """
+        return self._representative[planet_id]
+
+    def representatives(self):
+        """
+        :return: Ids of one planet per orbit, in map order
+        :rtype: list[int]
+        """
+        return [planet_id for planet_id, (representative, _) in self._representative.items()
+                if representative == planet_id]
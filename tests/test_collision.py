@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from hlt import collision, constants
+
+
+def test_time_of_impact_head_on():
+    # 10 apart, closing in at 10 per turn, touching once 1 apart
+    contact = collision.time_of_impact(0, 0, 5, 0, 0.5, 10, 0, -5, 0, 0.5)
+    assert contact == pytest.approx(0.9)
+
+
+def test_time_of_impact_misses():
+    # too slow to meet this turn, moving in parallel, and passing each other 2 apart
+    assert collision.time_of_impact(0, 0, 3, 0, 0.5, 10, 0, -3, 0, 0.5) == np.inf
+    assert collision.time_of_impact(0, 0, 7, 0, 0.5, 0, 2, 7, 0, 0.5) == np.inf
+    assert collision.time_of_impact(0, 0, 7, 0, 0.5, 7, 2, -7, 0, 0.5) == np.inf
+
+
+def test_time_of_impact_touching_at_the_start():
+    # touching ships may move apart, but not further into each other
+    assert collision.time_of_impact(0, 0, -3, 0, 0.5, 1, 0, 0, 0, 0.5) == np.inf
+    assert collision.time_of_impact(0, 0, 3, 0, 0.5, 1, 0, 0, 0, 0.5) == 0
+
+
+def test_time_of_impact_against_sampled_trajectories():
+    rng = np.random.default_rng(0)
+    count = 5000
+    x, y = rng.uniform(0, 20, (2, count))
+    vel_x, vel_y = rng.uniform(-constants.MAX_SPEED, constants.MAX_SPEED, (2, count))
+    other_x, other_y = rng.uniform(0, 20, (2, count))
+    other_vel_x, other_vel_y = rng.uniform(-constants.MAX_SPEED, constants.MAX_SPEED, (2, count))
+    radius = constants.SHIP_RADIUS
+    contact = collision.time_of_impact(x, y, vel_x, vel_y, radius, other_x, other_y, other_vel_x, other_vel_y, radius)
+
+    times = np.linspace(0, 1, 2001)[:, None]
+    distance = np.hypot(other_x + other_vel_x * times - x - vel_x * times,
+                        other_y + other_vel_y * times - y - vel_y * times)
+    # ships touching at the start are covered above; grazing ones are left to the sampling's resolution
+    separate = distance[0] > 2 * radius
+    apart = separate & (distance.min(axis=0) > 2 * radius + 1e-3)
+    touching = separate & (distance.min(axis=0) < 2 * radius - 1e-3)
+    assert apart.sum() > 1000 and touching.sum() > 100
+    assert np.isinf(contact[apart]).all()
+    first_touch = times[np.argmax(distance <= 2 * radius, axis=0), 0]
+    assert np.allclose(contact[touching], first_touch[touching], atol=1e-3)
+
+
+def test_time_of_impact_one_ship_against_many():
+    # the way the bot uses it: one move tested against the arrays of every other ship's move
+    rng = np.random.default_rng(1)
+    others = rng.uniform(-7, 7, (4, 50))
+    radius = constants.SHIP_RADIUS
+    contact = collision.time_of_impact(3, 4, 2, -1, radius, *others[:2], *others[2:], radius)
+    assert contact.shape == (50,)
+    for i in range(50):
+        assert contact[i] == collision.time_of_impact(3, 4, 2, -1, radius, *others[:, i], radius)
@@ -0,0 +1,67 @@
+from hlt.game_map import Map
+
+# player 0: ships 0-2 undocked, ship 3 docking to planet 0; player 1: ship 4 undocked
+# planet 0 is owned by player 0 with two spots, planet 1 is free with three
+MAP_STRING = ' '.join([
+    '2',
+    '0 4',
+    '0 10 10 255 0 0 0 0 0 0',
+    '1 12 10 255 0 0 0 0 0 0',
+    '2 14 10 255 0 0 0 0 0 0',
+    '3 50 44 255 0 0 1 0 3 0',
+    '1 1',
+    '4 100 100 255 0 0 0 0 0 0',
+    '2',
+    '0 50 50 2000 5 2 0 1000 1 0 1 3',
+    '1 150 50 2000 6 3 0 1000 0 0 0',
+])
+
+
+def parsed_map():
+    game_map = Map(0, 240, 160)
+    game_map._parse(MAP_STRING)
+    return game_map
+
+
+def test_counts_from_the_frame():
+    game_map = parsed_map()
+    first, second = game_map.all_planets()
+    ledger = game_map.docking
+    assert (ledger.docked(first), ledger.docking(first), ledger.committed(first)) == (1, 1, 0)
+    assert (ledger.docked(second), ledger.docking(second), ledger.committed(second)) == (0, 0, 0)
+    assert ledger.has_space(first) and ledger.has_space(second)
+
+
+def test_counts_follow_target_and_action():
+    game_map = parsed_map()
+    first, second = game_map.all_planets()
+    ledger = game_map.docking
+    ship, other, _ = game_map.player_ships(0)[:3]
+
+    ship.target = first
+    assert ledger.committed(first) == 1 and not ledger.has_space(first)
+    # attacking a planet's ships is no claim on its spots
+    ship.action = 'attack'
+    assert ledger.committed(first) == 0 and ledger.has_space(first)
+    ship.action = 'dock'
+    assert ledger.committed(first) == 1
+
+    ship.target = second
+    other.target = second
+    assert (ledger.committed(first), ledger.committed(second)) == (0, 2)
+    assert ledger.has_space(first) and ledger.has_space(second)
+    ship.target = game_map.player_ships(1)[0]
+    other.target = None
+    assert (ledger.committed(first), ledger.committed(second)) == (0, 0)
+
+
+def test_enemy_ships_and_new_frames_start_uncommitted():
+    game_map = parsed_map()
+    first, _ = game_map.all_planets()
+    game_map.player_ships(1)[0].target = first
+    assert game_map.docking.committed(first) == 0
+
+    game_map.player_ships(0)[0].target = first
+    game_map._parse(MAP_STRING)
+    assert game_map.docking.committed(first) == 0
+    assert game_map.docking.has_space(first)
@@ -0,0 +1,60 @@
+import pytest
+
+from benchmarks.frames import PATTERNS, SyntheticMap, synthetic_game, synthetic_map_string
+from hlt.entity import Ship
+from hlt.game_map import Map
+
+
+@pytest.mark.parametrize('pattern', PATTERNS)
+@pytest.mark.parametrize('num_players', (2, 4))
+def test_parse_synthetic_frame(pattern, num_players):
+    game_map = Map(0, 240, 160)
+    game_map._parse(synthetic_map_string(400, num_players=num_players, pattern=pattern, docked=0.3, seed=1))
+
+    assert len(game_map.all_players()) == num_players
+    assert len(game_map.all_planets()) == 28
+    assert len(game_map._all_ships()) == 400
+    for player in game_map.all_players():
+        assert len(game_map.player_ships(player.id)) == 400 // num_players
+
+    attached = 0
+    for planet in game_map.all_planets():
+        docked = game_map.docked_ships(planet)
+        assert len(docked) <= planet.num_docking_spots
+        assert [ship.id for ship in docked] == [ship.id for ship in planet.all_docked_ships()]
+        for ship in docked:
+            assert ship.planet is planet
+            assert ship.owner is planet.owner
+            assert ship.docking_status != Ship.DockingStatus.UNDOCKED
+        attached += len(docked)
+    undocked = sum(len(game_map.player_ships(player.id, Ship.DockingStatus.UNDOCKED))
+                   for player in game_map.all_players())
+    assert attached > 0
+    assert attached + undocked == 400
+
+
+def test_undocked_ships_stay_on_the_map_and_off_the_planets():
+    synthetic = SyntheticMap(200, num_players=2, pattern='home', spread=30, seed=2)
+    for _ in range(20):
+        synthetic.step()
+    game_map = Map(0, 240, 160)
+    game_map._parse(synthetic.frame())
+    for ship in game_map._all_ships():
+        assert 0 <= ship.x < 240 and 0 <= ship.y < 160
+        if ship.docking_status == Ship.DockingStatus.UNDOCKED:
+            assert all(ship.calculate_distance_between(planet) > planet.radius for planet in game_map.all_planets())
+
+
+def test_synthetic_game():
+    lines = synthetic_game(100, 5, player_id=1, seed=3)
+    assert lines[:2] == ['1', '240 160']
+    assert len(lines) == 2 + 1 + 5
+    game_map = Map(1, 240, 160)
+    for line in lines[2:]:
+        game_map._parse(line)
+        assert len(game_map._all_ships()) == 100
+
+
+def test_unknown_pattern():
+    with pytest.raises(ValueError):
+        SyntheticMap(10, pattern='spiral')
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from hlt import constants
+from hlt.entity import Command, Ship
+from hlt.history import COMMAND_LOG_DTYPE, CommandHistory, ShipHistory
+
+
+def ship(ship_id, x, y, health=255, owner=0):
+    return Ship(owner, ship_id, x, y, health, 0, 0, Ship.DockingStatus.UNDOCKED, 0, 0, 0)
+
+
+def test_predict_extrapolates_the_last_moves():
+    history = ShipHistory(depth=4, capacity=8)
+    for turn in range(3):
+        history.record([ship(0, 10 + 2 * turn, 20), ship(1, 50, 50 - turn * turn)])
+    rows = [history.row(ship(0, 0, 0)), history.row(ship(1, 0, 0))]
+
+    x, y = history.predict(rows)
+    assert x.tolist() == [16, 50] and y.tolist() == [20, 43]
+    # averaged over both moves ship 1 went 2 per turn
+    x, y = history.predict(rows, turns_ahead=2, smoothing=2)
+    assert x.tolist() == [18, 50] and y.tolist() == [20, 42]
+
+
+def test_predict_caps_the_speed():
+    history = ShipHistory(depth=3, capacity=4)
+    history.record([ship(0, 10, 10)])
+    # a jump no ship could make, e.g. a new ship in a recycled row would look like this
+    history.record([ship(0, 40, 50)])
+    x, y = history.predict([history.row(ship(0, 0, 0))])
+    assert np.hypot(x[0] - 40, y[0] - 50) == pytest.approx(constants.MAX_SPEED)
+
+
+def test_predicted_position():
+    history = ShipHistory(depth=3, capacity=4)
+    history.record([ship(0, 10, 10), ship(0, 30, 30, owner=1)])
+    history.record([ship(0, 11, 10), ship(0, 30, 32, owner=1)])
+    predicted = [history.predicted_position(ship(0, 11, 10), turns_ahead=3),
+                 history.predicted_position(ship(0, 30, 32, owner=1)),
+                 history.predicted_position(ship(5, 1, 2))]
+    # ships are told apart by owner too, and ships never recorded stay where they are
+    assert [(position.x, position.y) for position in predicted] == [(14, 10), (30, 34), (1, 2)]
+
+
+def test_rows_are_recycled_once_a_ship_is_gone():
+    history = ShipHistory(depth=3, capacity=2)
+    history.record([ship(0, 10, 10), ship(1, 20, 20)])
+    history.record([ship(1, 20, 20)])
+    assert history.row(ship(0, 0, 0)) is None
+    history.record([ship(1, 20, 20), ship(2, 5, 5)])
+    # the new ship starts without history, so it is predicted to stay
+    x, y = history.predict([history.row(ship(2, 0, 0))])
+    assert (x[0], y[0]) == (5, 5)
+    with pytest.raises(ValueError):
+        history.record([ship(1, 20, 20), ship(2, 5, 5), ship(3, 0, 0)])
+
+
+def test_command_log_round_trip(tmp_path):
+    path = str(tmp_path / 'command_log.bin')
+    turns = {
+        1: [Command(Command.THRUST, 0, 7, 359, None), Command(Command.DOCK, 1, 0, 0, 12)],
+        2: [],
+        3: [Command(Command.UNDOCK, 1, 0, 0, None), Command(Command.THRUST, 2, 3, 90, None)],
+    }
+    history = CommandHistory(depth=2, log_path=path)
+    for turn, commands in turns.items():
+        history[turn] = commands
+        history.commit(turn)
+    history.close()
+
+    # only the last turns stay in memory, the log has them all
+    assert len(history) == 2 and 1 not in history and history[3] == turns[3]
+    records = CommandHistory.read_log(path)
+    assert records['turn'].tolist() == [1, 1, 3, 3]
+    assert CommandHistory.to_commands(records) == turns[1] + turns[3]
+
+
+def test_read_empty_or_cut_log(tmp_path):
+    path = str(tmp_path / 'command_log.bin')
+    CommandHistory(log_path=path).close()
+    assert len(CommandHistory.read_log(path)) == 0
+    assert CommandHistory.read_log(path).dtype == COMMAND_LOG_DTYPE
+
+    history = CommandHistory(log_path=path)
+    history[1] = [Command(Command.THRUST, 0, 7, 10, None)]
+    history.commit(1)
+    history.close()
+    # a record cut short by the bot being killed while writing it
+    with open(path, 'ab') as log:
+        log.write(np.zeros(1, dtype=COMMAND_LOG_DTYPE).tobytes()[:5])
+    assert CommandHistory.to_commands(CommandHistory.read_log(path)) == history[1]
@@ -0,0 +1,45 @@
+import io
+import sys
+
+import pytest
+
+from benchmarks.frames import synthetic_game
+from hlt.networking import Game
+
+
+@pytest.fixture
+def capture(tmp_path, monkeypatch):
+    """A capture of a whole synthetic game, as the bot leaves it when the engine ends the game."""
+    monkeypatch.chdir(tmp_path)
+    lines = synthetic_game(50, 10, seed=6)
+    monkeypatch.setattr(sys, 'stdin', io.StringIO('\n'.join(lines) + '\n'))
+    monkeypatch.setattr(Game, '_send_string', staticmethod(lambda s: None))
+    monkeypatch.setattr(Game, '_done_sending', staticmethod(lambda: None))
+    path = str(tmp_path / 'engine_input.gz')
+    game = Game('test', capture=path)
+    for _ in lines[3:]:
+        game.update_map()
+    return path, lines
+
+
+def test_read_capture(capture):
+    path, lines = capture
+    assert Game.read_capture(path) == lines
+
+
+def test_read_truncated_capture(capture):
+    path, lines = capture
+    with open(path, 'rb') as complete:
+        data = complete.read()
+    # cut anywhere, as when the bot is killed in the middle of a write
+    for size in (0, 10, len(data) // 3, len(data) // 2, len(data) - 100):
+        with open(path, 'wb') as truncated:
+            truncated.write(data[:size])
+        read = Game.read_capture(path)
+        assert read == lines[:len(read)]
+        assert len(read) < len(lines)
+    assert len(Game.read_capture(path)) == len(lines) - 1
+    # only the gzip trailer of the last line missing: the line itself is complete
+    with open(path, 'wb') as truncated:
+        truncated.write(data[:-1])
+    assert Game.read_capture(path) == lines
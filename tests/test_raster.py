@@ -0,0 +1,79 @@
+import math
+import random
+from collections import namedtuple
+
+import numpy as np
+import pytest
+
+from hlt import collision, constants
+from hlt.entity import Position
+from hlt.raster import PlanetRaster
+
+Circle = namedtuple('Circle', 'id x y radius')
+
+
+def random_planets(rng, count=28, width=240, height=160):
+    planets = []
+    while len(planets) < count:
+        radius = rng.uniform(3, 10)
+        x, y = rng.uniform(radius, width - radius), rng.uniform(radius, height - radius)
+        if all(math.hypot(x - other.x, y - other.y) > radius + other.radius + 5 for other in planets):
+            planets.append(Circle(len(planets), x, y, radius))
+    return planets
+
+
+def random_segments(rng, count, width=240, height=160, longest=40):
+    for _ in range(count):
+        # starting off the map too, where the lines on the grid's edge extend
+        start = Position(rng.uniform(-5, width + 5), rng.uniform(-5, height + 5))
+        length = rng.uniform(0, longest)
+        angle = rng.uniform(0, 2 * math.pi)
+        yield start, Position(start.x + length * math.cos(angle), start.y + length * math.sin(angle))
+
+
+@pytest.mark.parametrize('cell', (1, 2.5))
+def test_raster_never_clears_a_segment_touching_a_planet(cell):
+    rng = random.Random(5)
+    planets = random_planets(rng)
+    clearance = constants.SHIP_RADIUS + 0.1
+    raster = PlanetRaster(240, 160, planets, clearance, cell=cell)
+
+    cleared = 0
+    for start, end in random_segments(rng, 20000):
+        if raster.segment_clear(start, end):
+            cleared += 1
+            assert not any(collision.intersect_segment_circle(start, end, planet, fudge=clearance)
+                           for planet in planets)
+    # most short segments miss every planet, the raster should see that
+    assert cleared > 5000
+
+
+def test_rebuild_clears_destroyed_planets():
+    rng = random.Random(6)
+    planets = random_planets(rng)
+    raster = PlanetRaster(240, 160, planets, 0.6)
+    destroyed = planets.pop()
+    assert raster.occupied(destroyed.x, destroyed.y)
+    raster.rebuild(planets)
+    assert len(raster) == len(planets)
+    assert not raster.occupied(destroyed.x, destroyed.y)
+    assert all(raster.occupied(planet.x, planet.y) for planet in planets)
+
+
+def test_max_lines():
+    raster = PlanetRaster(240, 160, [], 0.6)
+    start, end = Position(10, 10), Position(50, 50)
+    assert raster.segment_clear(start, end)
+    assert not raster.segment_clear(start, end, max_lines=20)
+
+
+def test_intersect_segment_circles_agrees_with_one_at_a_time():
+    rng = random.Random(7)
+    planets = random_planets(rng)
+    x = np.array([planet.x for planet in planets])
+    y = np.array([planet.y for planet in planets])
+    radius = np.array([planet.radius for planet in planets])
+    for start, end in random_segments(rng, 2000, longest=80):
+        hits = collision.intersect_segment_circles(start, end, x, y, radius, fudge=0.6)
+        assert hits.tolist() == [collision.intersect_segment_circle(start, end, planet, fudge=0.6)
+                                 for planet in planets]
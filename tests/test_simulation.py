@@ -0,0 +1,125 @@
+import numpy as np
+import pytest
+
+from hlt import constants
+from hlt.entity import Ship
+from hlt.game_map import Map
+from hlt.simulation import SHIP_COST, BatchedGames
+
+DOCKED = Ship.DockingStatus.DOCKED.value
+
+
+def game_map(ships, planets, num_players=2):
+    """
+    A parsed map of undocked, unowned ships and unowned planets.
+
+    :param ships: (owner, x, y) of every ship
+    :param planets: (x, y, radius, docking spots) of every planet
+    """
+    tokens = [num_players]
+    for player_id in range(num_players):
+        mine = [(i, x, y) for i, (owner, x, y) in enumerate(ships) if owner == player_id]
+        tokens += [player_id, len(mine)]
+        for i, x, y in mine:
+            tokens += [i, x, y, constants.BASE_SHIP_HEALTH, 0, 0, 0, 0, 0, 0]
+    tokens.append(len(planets))
+    for i, (x, y, radius, spots) in enumerate(planets):
+        tokens += [i, x, y, 2000, radius, spots, 0, 1000, 0, 0, 0]
+    result = Map(0, 240, 160)
+    result._parse(' '.join(map(str, tokens)))
+    return result
+
+
+def batch(ships, planets=((200, 140, 5, 3),), slots=4):
+    return BatchedGames.from_maps([game_map(ships, planets)], slots)
+
+
+def test_from_maps():
+    games = BatchedGames.from_maps([game_map([(0, 10, 20), (1, 30, 40)], [(100, 80, 6, 2)]),
+                                    game_map([(1, 50, 60)], [(100, 80, 6, 2), (20, 150, 4, 3)])], slots=3)
+    assert len(games) == 2
+    assert games.alive.tolist() == [[True, True, False], [True, False, False]]
+    assert games.owner[0, :2].tolist() == [0, 1]
+    assert (games.x[1, 0], games.y[1, 0]) == (50, 60)
+    assert games.planet_alive.tolist() == [[True, False], [True, True]]
+    assert games.planet_spots[1].tolist() == [2, 3]
+    assert games.ship_counts(2).tolist() == [[1, 1], [0, 1]]
+    with pytest.raises(ValueError):
+        BatchedGames.from_maps([game_map([(0, 10, 20), (1, 30, 40)], [(100, 80, 6, 2)])], slots=1)
+
+
+def test_zero_move_turn_changes_nothing():
+    games = batch([(0, 10, 20), (1, 60, 90)])
+    before = {name: value.copy() for name, value in vars(games).items() if isinstance(value, np.ndarray)}
+    games.step(*games.commands())
+    assert games.turn == 1
+    for name, value in before.items():
+        assert np.array_equal(getattr(games, name), value), name
+
+
+def test_movement_is_capped_and_leaving_the_map_destroys():
+    games = batch([(0, 10, 20), (0, 10, 100), (1, 3, 150)])
+    speed, angle, dock, undock = games.commands()
+    speed[0, :3] = 5, 20, 7
+    angle[0, :3] = 90, 0, 180
+    games.step(speed, angle, dock, undock)
+    assert (games.x[0, 0], games.y[0, 0]) == pytest.approx((10, 25), abs=1e-4)
+    assert (games.x[0, 1], games.y[0, 1]) == pytest.approx((10 + constants.MAX_SPEED, 100), abs=1e-4)
+    assert games.alive[0].tolist() == [True, True, False, False]
+
+
+def test_collisions():
+    # ship 0 flies into the planet, ships 1 and 2 into each other
+    games = batch([(0, 100, 80), (0, 20, 40), (1, 30, 40)], planets=((110, 80, 5, 3),))
+    speed, angle, dock, undock = games.commands()
+    speed[0, :3] = 7
+    angle[0, :3] = 0, 0, 180
+    games.step(speed, angle, dock, undock)
+    assert not games.alive[0, :3].any()
+    assert games.planet_health[0, 0] == 2000 - constants.BASE_SHIP_HEALTH
+
+
+def test_combat_splits_damage_between_targets():
+    games = batch([(0, 50, 50), (1, 54, 50), (1, 50, 54), (1, 70, 50)])
+    games.step(*games.commands())
+    health = constants.BASE_SHIP_HEALTH
+    # ship 0 is shot by both ships in range and shoots them with half its damage each
+    assert games.health[0].tolist() == [health - 2 * constants.WEAPON_DAMAGE, health - constants.WEAPON_DAMAGE / 2,
+                                        health - constants.WEAPON_DAMAGE / 2, health]
+    assert games.cooldown[0].tolist() == [constants.WEAPON_COOLDOWN] * 3 + [0]
+
+
+def test_docking():
+    # ships 0 and 1 in range, ship 2 too far, the planet has one spot left for them
+    games = batch([(0, 100, 87), (0, 100, 73), (0, 120, 80)], planets=((100, 80, 5, 1),))
+    speed, angle, dock, undock = games.commands()
+    dock[0, :3] = 0
+    games.step(speed, angle, dock, undock)
+    assert games.status[0, :3].tolist() == [Ship.DockingStatus.DOCKING.value, 0, 0]
+    assert games.planet[0, :3].tolist() == [0, -1, -1]
+    assert games.planet_owner[0, 0] == 0
+    for _ in range(constants.DOCK_TURNS - 1):
+        games.step(*games.commands())
+    assert games.status[0, 0] == DOCKED
+    assert games.attached(Ship.DockingStatus.DOCKED)[0, 0] == 1
+
+
+def test_contested_docking():
+    games = batch([(0, 100, 87), (1, 100, 73)], planets=((100, 80, 5, 3),))
+    speed, angle, dock, undock = games.commands()
+    dock[0, :2] = 0
+    games.step(speed, angle, dock, undock)
+    assert games.status[0, :2].tolist() == [0, 0]
+    assert games.planet_owner[0, 0] == -1
+
+
+def test_spawning():
+    games = batch([(0, 100, 74)], planets=((100, 80, 5, 3),))
+    games.status[0, 0], games.planet[0, 0], games.planet_owner[0, 0] = DOCKED, 0, 0
+    games.production[0, 0] = SHIP_COST - constants.BASE_PRODUCTIVITY
+    games.step(*games.commands())
+    assert games.alive[0].tolist() == [True, True, False, False]
+    assert games.owner[0, 1] == 0
+    assert games.production[0, 0] == 0
+    # spawned towards the centre of the map
+    assert (games.x[0, 1], games.y[0, 1]) == pytest.approx((100 + 5 + constants.SPAWN_RADIUS, 80))
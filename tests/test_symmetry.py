@@ -0,0 +1,94 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from hlt import symmetry
+from hlt.entity import Position
+from hlt.flow import FlowFields
+from hlt.game_map import Map
+
+WIDTH, HEIGHT = 240, 160
+
+
+def symmetric_map(transforms, seed=0, count=5):
+    """A map with no ships whose planets are the images of `count` random ones under `transforms`."""
+    rng = random.Random(seed)
+    planets = []
+    while len(planets) < count * (len(transforms) + 1):
+        radius = rng.uniform(3, 8)
+        x, y = rng.uniform(radius + 10, WIDTH - radius - 10), rng.uniform(radius + 10, HEIGHT - radius - 10)
+        images = [(x, y, radius)] + [symmetry.apply(transform, x, y, WIDTH, HEIGHT) + (radius,)
+                                     for transform in transforms]
+        placed = planets + images
+        if all(math.hypot(a[0] - b[0], a[1] - b[1]) > a[2] + b[2] + 8
+               for i, a in enumerate(placed) for b in placed[i + 1:]):
+            planets = placed
+    tokens = ['0', str(len(planets))]
+    for i, (x, y, radius) in enumerate(planets):
+        tokens += map(str, (i, x, y, 1000, radius, 3, 0, 1000, 0, 0, 0))
+    game_map = Map(0, WIDTH, HEIGHT)
+    game_map._parse(' '.join(tokens))
+    return game_map
+
+
+@pytest.mark.parametrize('transform', symmetry.TRANSFORMS)
+def test_apply_is_its_own_inverse(transform):
+    x, y = symmetry.apply(transform, 30.5, 12.25, WIDTH, HEIGHT)
+    assert symmetry.apply(transform, x, y, WIDTH, HEIGHT) == (30.5, 12.25)
+    assert symmetry.apply(symmetry.IDENTITY, 30.5, 12.25, WIDTH, HEIGHT) == (30.5, 12.25)
+
+
+@pytest.mark.parametrize('transform', symmetry.TRANSFORMS)
+@pytest.mark.parametrize('angle', (0, 17, 90, 135, 200, 271, 359))
+def test_apply_heading_follows_apply(transform, angle):
+    # a move along the heading, transformed, is a move along the transformed heading
+    x, y = 100, 40
+    end_x, end_y = x + 7 * math.cos(math.radians(angle)), y + 7 * math.sin(math.radians(angle))
+    image_x, image_y = symmetry.apply(transform, x, y, WIDTH, HEIGHT)
+    image_end_x, image_end_y = symmetry.apply(transform, end_x, end_y, WIDTH, HEIGHT)
+    heading = symmetry.apply_heading(transform, angle)
+    assert 0 <= heading < 360
+    assert image_end_x - image_x == pytest.approx(7 * math.cos(math.radians(heading)))
+    assert image_end_y - image_y == pytest.approx(7 * math.sin(math.radians(heading)))
+
+
+@pytest.mark.parametrize('transforms', (((True, True),), symmetry.TRANSFORMS))
+def test_symmetry_representatives(transforms):
+    game_map = symmetric_map(transforms, seed=len(transforms))
+    found = symmetry.Symmetry(game_map.all_planets(), WIDTH, HEIGHT)
+    assert sorted(found.transforms) == sorted(transforms)
+    assert len(found) == len(transforms) + 1
+    assert len(found.representatives()) == 5
+    for planet in game_map.all_planets():
+        representative, transform = found.representative(planet.id)
+        source = game_map.get_planet(representative)
+        assert symmetry.apply(transform, source.x, source.y, WIDTH, HEIGHT) == pytest.approx((planet.x, planet.y))
+
+
+def test_asymmetric_map():
+    game_map = symmetric_map(((True, True),), seed=3)
+    planets = game_map.all_planets()[:-1]
+    found = symmetry.Symmetry(planets, WIDTH, HEIGHT)
+    assert len(found) == 1
+    assert found.representatives() == [planet.id for planet in planets]
+
+
+@pytest.mark.parametrize('transforms', (((True, True),), symmetry.TRANSFORMS))
+def test_flow_fields_through_a_transform_match_the_full_fields(transforms):
+    game_map = symmetric_map(transforms, seed=len(transforms))
+    found = symmetry.Symmetry(game_map.all_planets(), WIDTH, HEIGHT)
+    full = FlowFields(game_map)
+    reduced = FlowFields(game_map, symmetry=found)
+    assert len(reduced.distances) == 5
+    assert len(full.distances) == 5 * len(found)
+
+    # cell centres, which the transforms map onto cell centres
+    rng = np.random.default_rng(0)
+    rows, columns = rng.integers(0, full.rows, 300), rng.integers(0, full.columns, 300)
+    for planet in game_map.all_planets():
+        for row, column in zip(rows, columns):
+            start = Position((column + 0.5) * full.cell, (row + 0.5) * full.cell)
+            assert reduced.distance(planet, start) == pytest.approx(full.distance(planet, start), abs=0.1)
+            assert (reduced.heading(planet, start) is None) == (full.heading(planet, start) is None)